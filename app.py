@@ -5,7 +5,10 @@ A RAG-powered chatbot for CloudWalk, InfinitePay, JIM, and Stratus.
 
 import time
 import streamlit as st
-from src.rag_chain import simple_ask, ask
+# Only the lightweight startup module is imported here; LangChain, the
+# embedding model and the vector store load on a background thread
+from src.quick_actions import QUICK_ACTIONS
+from src.startup import STARTUP_PROFILE, preload_ready, start_preload, startup_profile, wait_for_pipeline
 
 
 # Page configuration
@@ -128,6 +131,8 @@ def init_session_state():
         st.session_state.messages = []
     if "initialized" not in st.session_state:
         st.session_state.initialized = False
+    if "memory" not in st.session_state:
+        st.session_state.memory = None  # ConversationMemory, created with the first question
 
 
 def display_header():
@@ -149,23 +154,27 @@ def display_quick_actions():
         st.markdown("---")
         st.markdown("**Quick questions:**")
         
-        col1, col2 = st.columns(2)
+        columns = st.columns(2)
+        half = (len(QUICK_ACTIONS) + 1) // 2
         
-        with col1:
-            if st.button("🏢 What is CloudWalk?", use_container_width=True):
-                return "What is CloudWalk?"
-            if st.button("💳 InfinitePay rates", use_container_width=True):
-                return "What are the fees and rates for InfinitePay debit and credit card transactions?"
-        
-        with col2:
-            if st.button("🤖 What is JIM?", use_container_width=True):
-                return "What is JIM?"
-            if st.button("⛓️ About Stratus", use_container_width=True):
-                return "What is Stratus blockchain?"
+        for index, (label, question) in enumerate(QUICK_ACTIONS):
+            with columns[index // half]:
+                if st.button(label, use_container_width=True):
+                    return question
     
     return None
 
 
+def display_startup_profile():
+    """Show per-component import and initialization times (STARTUP_PROFILE=true)."""
+    with st.sidebar:
+        st.markdown("**Startup profile**")
+        if preload_ready():
+            st.code(startup_profile.format())
+        else:
+            st.caption("Still loading...")
+
+
 def display_chat_history():
     """Display the chat message history."""
     for message in st.session_state.messages:
@@ -173,26 +182,103 @@ def display_chat_history():
             st.markdown(message["content"])
             # Show response time for assistant messages if available
             if message["role"] == "assistant" and "response_time" in message:
-                st.caption(f"⏱️ Response time: {message['response_time']:.2f}s")
+                st.caption(format_timing(message))
+
+
 
+def format_timing(message: dict) -> str:
+    """Format the timing caption shown under an assistant message."""
+    caption = f"⏱️ Response time: {message['response_time']:.2f}s"
+    if message.get("precomputed"):
+        return caption + " · precomputed answer"
+    if message.get("cached"):
+        return caption + " · cached answer"
+    if message.get("coalesced"):
+        return caption + " · shared with an identical question in progress"
+    if message.get("time_to_first_token") is not None:
+        caption += f" · first token: {message['time_to_first_token']:.2f}s"
+    if message.get("retrieval_time") is not None:
+        caption += f" · retrieval: {message['retrieval_time']:.2f}s"
+    if message.get("queue_time"):
+        caption += f" · queued: {message['queue_time']:.1f}s"
+    return caption
 
 
-def get_response(user_input: str) -> tuple[str, float]:
-    """Get response from the RAG chain with timing."""
-    start_time = time.time()
+def first_chunk_with_queue_status(stream, status) -> str:
+    """Wait for the first chunk, showing the question's place in the LLM queue while it waits for capacity."""
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor, wait
+    
+    notice = st.empty()
+    pool = ThreadPoolExecutor(max_workers=1)
+    # The copied context carries the QueueStatus to the LLM call
+    future = pool.submit(contextvars.copy_context().run, next, stream, "")
     try:
-        response = simple_ask(user_input)
-        elapsed = time.time() - start_time
-        return response, elapsed
+        # Poll with wait() rather than result(timeout=...): its TimeoutError is the one the queue raises
+        while not wait([future], timeout=0.25).done:
+            if status.position is not None:
+                eta = f", about {status.eta:.0f}s to go" if status.eta else ""
+                notice.info(f"⏳ Lots of questions right now: you are #{status.position} in line{eta}")
+        return future.result()
+    finally:
+        notice.empty()
+        pool.shutdown(wait=False)
+
+
+def busy_message(status) -> str:
+    """Shown instead of an error when the LLM queue cannot take the question in time."""
+    message = "⏳ CloudWalk Helper is answering a lot of questions right now"
+    if status.position is not None and status.eta:
+        message += f" (you would be #{status.position} in line, about {status.eta:.0f}s)"
+    return message + ". Please ask again in a moment."
+
+
+def stream_response(user_input: str, metrics: dict):
+    """Stream the answer from the RAG chain, filling `metrics` with per-stage timings."""
+    from src.llm_scheduler import QueueStatus, llm_admission
+    
+    status = QueueStatus()
+    try:
+        if not preload_ready():
+            with st.spinner("Loading knowledge base..."):
+                wait_for_pipeline()
+        from src.conversation import ConversationMemory
+        from src.rag_chain import stream_ask
+        
+        if st.session_state.memory is None:
+            st.session_state.memory = ConversationMemory()
+        with llm_admission("interactive", status=status):
+            stream = stream_ask(user_input, metrics, st.session_state.memory)
+            with st.spinner("Thinking..."):
+                first_chunk = first_chunk_with_queue_status(stream, status)
+        metrics["queue_time"] = status.waited
+        yield first_chunk
+        yield from stream
+    except TimeoutError:
+        yield busy_message(status)
     except Exception as e:
-        elapsed = time.time() - start_time
-        return f"Sorry, I encountered an error: {str(e)}. Please make sure Ollama is running with the llama3.2 model.", elapsed
+        yield f"Sorry, I encountered an error: {str(e)}. Please make sure Ollama is running with the llama3.2 model."
+
+
+def remember_turn(user_input: str, response: str, metrics: dict):
+    """Add an answered turn to the conversation memory used for follow-up questions."""
+    if st.session_state.memory is None or "total_time" not in metrics:
+        return  # The question failed before or during generation
+    from src.rag_chain import get_pipeline
+    
+    # Folds the oldest turn into the rolling summary once the verbatim window is full
+    st.session_state.memory.add_turn(user_input, response, get_pipeline().llm)
 
 
 def main():
     """Main application function."""
+    # Shared by every session; returns immediately so the page renders while models load
+    start_preload()
+    
     init_session_state()
     display_header()
+    if STARTUP_PROFILE:
+        display_startup_profile()
     
     # Check for quick action clicks
     quick_question = display_quick_actions()
@@ -211,20 +297,28 @@ def main():
         with st.chat_message("user"):
             st.markdown(user_input)
         
-        # Get and display assistant response
+        # Stream and display assistant response as tokens arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response, response_time = get_response(user_input)
-            st.markdown(response)
-            # Display response time in muted text
-            st.caption(f"⏱️ Response time: {response_time:.2f}s")
+            metrics = {}
+            start_time = time.time()
+            response = st.write_stream(stream_response(user_input, metrics))
+            message = {
+                "role": "assistant",
+                "content": response,
+                "response_time": time.time() - start_time,
+                "time_to_first_token": metrics.get("time_to_first_token"),
+                "retrieval_time": metrics.get("retrieval_time"),
+                "cached": metrics.get("cached", False),
+                "precomputed": metrics.get("precomputed", False),
+                "coalesced": metrics.get("coalesced", False),
+                "queue_time": metrics.get("queue_time")
+            }
+            # Display timings in muted text
+            st.caption(format_timing(message))
         
         # Add assistant message to history (with timing metadata)
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": response,
-            "response_time": response_time
-        })
+        st.session_state.messages.append(message)
+        remember_turn(user_input, response, metrics)
         
         # Rerun to update UI
         st.rerun()
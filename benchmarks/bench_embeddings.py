@@ -0,0 +1,117 @@
+"""
+Benchmark: PyTorch vs quantized ONNX embeddings.
+Measures model load time, single-query latency, batch throughput over the
+knowledge-base chunks and resident memory for each backend, each in a fresh
+process so load times and memory are cold. The embedding cache is bypassed.
+
+Run with: python benchmarks/bench_embeddings.py [--threads 4] [--queries 100]
+"""
+
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_vector_index import rss_mb
+
+QUESTIONS = [
+    "What is CloudWalk?",
+    "What are the fees and rates for InfinitePay debit and credit card transactions?",
+    "What is JIM?",
+    "What is Stratus blockchain?",
+    "Quais são as taxas da maquininha InfinitePay?",
+    "O que é o JIM?",
+]
+
+
+def run_one(backend: str, threads: int, queries: int, onnx_file: str, result_queue):
+    try:
+        result_queue.put(measure(backend, threads, queries, onnx_file))
+    except Exception as e:
+        result_queue.put({"backend": backend, "error": f"{type(e).__name__}: {e}"})
+
+
+def measure(backend: str, threads: int, queries: int, onnx_file: str) -> dict:
+    baseline_rss = rss_mb()
+    load_start = time.perf_counter()
+    from src.embeddings import EMBEDDING_MODEL, load_documents, split_documents
+    if backend == "onnx":
+        from src.onnx_embeddings import OnnxEmbeddings
+        embeddings = OnnxEmbeddings(EMBEDDING_MODEL, onnx_file, threads=threads)
+    else:
+        import torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if threads:
+            torch.set_num_threads(threads)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    load_time = time.perf_counter() - load_start
+
+    texts = [chunk.page_content for chunk in split_documents(load_documents())]
+    embeddings.embed_query("warmup")
+    latencies = []
+    for i in range(queries):
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"
+        start = time.perf_counter()
+        embeddings.embed_query(question)
+        latencies.append(time.perf_counter() - start)
+
+    batch_start = time.perf_counter()
+    embeddings.embed_documents(texts)
+    batch_time = time.perf_counter() - batch_start
+
+    return {
+        "backend": backend,
+        "threads": threads or "auto",
+        "load_s": round(load_time, 3),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        "batch_texts_per_s": round(len(texts) / batch_time, 1),
+        "rss_mb": round(rss_mb() - baseline_rss, 1),
+    }
+
+
+def main():
+    from src.onnx_embeddings import EMBEDDING_ONNX_FILE
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backends", default="torch,onnx", help="Comma-separated backends")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads, 0 = library default")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--onnx-file", default=EMBEDDING_ONNX_FILE)
+    parser.add_argument("--output", type=Path, help="Also write results as JSON")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in args.backends.split(","):
+        queue = context.Queue()
+        process = context.Process(target=run_one,
+                                  args=(backend, args.threads, args.queries, args.onnx_file, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        results.append(result)
+        if "error" in result:
+            print(f"{backend:>6}  failed: {result['error']}")
+            continue
+        print(f"{backend:>6}  load {result['load_s']:>6.2f}s  "
+              f"query p50 {result['query_p50_ms']:>7.2f}ms  p95 {result['query_p95_ms']:>7.2f}ms  "
+              f"batch {result['batch_texts_per_s']:>8.1f} texts/s  RSS +{result['rss_mb']:.0f}MB")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: streaming ingestion of a large synthetic knowledge base.
+Generates help-center-like markdown pages, then runs a full index sync
+(src/indexer.py) per configuration of split workers, embedding batch size
+and embedding threads, reporting docs/sec, chunks/sec and peak RSS. Each
+run happens in a fresh process so memory numbers don't bleed into each other.
+
+Run with: python benchmarks/bench_ingest.py [--files 2000] [--embeddings fake|model]
+          python benchmarks/bench_ingest.py --configs 1:64:1,4:64:2,4:256:4
+"""
+
+import sys
+import json
+import random
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+TOPICS = ["InfinitePay", "InfiniteTap", "Pix", "JIM", "Stratus", "card machine", "fees", "payouts", "account"]
+
+
+def write_corpus(data_dir: Path, files: int, sections: int, seed: int = 42):
+    """Markdown pages of `sections` headed sections each, with varied text so chunks don't repeat."""
+    rng = random.Random(seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(files):
+        parts = [f"# Help article {i}"]
+        for j in range(sections):
+            topic = rng.choice(TOPICS)
+            sentences = " ".join(f"{topic} detail {i}.{j}.{k} explains how {rng.choice(TOPICS)} works."
+                                 for k in range(rng.randint(8, 20)))
+            parts.append(f"## {topic} question {j}\n\n{sentences}")
+        (data_dir / f"article_{i:05d}.md").write_text("\n\n".join(parts), encoding="utf-8")
+
+
+def run_one(data_dir: str, config: tuple, embeddings_kind: str, result_queue):
+    from src.indexer import sync_vector_store
+    from src.vector_index import NumpyVectorStore
+
+    if embeddings_kind == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        from src.embeddings import get_embeddings
+        embeddings = get_embeddings()
+
+    workers, batch_size, threads = config
+    workdir = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    try:
+        store = NumpyVectorStore(embeddings, persist_directory=workdir / "index")
+        report = sync_vector_store(store, manifest_path=workdir / "index" / "index_manifest.json",
+                                   data_dir=Path(data_dir), batch_size=batch_size, workers=workers,
+                                   embed_threads=threads)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        result_queue.put({
+            "workers": workers,
+            "batch_size": batch_size,
+            "embed_threads": threads,
+            "docs": len(report.files_added),
+            "chunks": report.chunks_added,
+            "seconds": round(report.elapsed, 2),
+            "docs_per_sec": round(report.docs_per_sec, 1),
+            "chunks_per_sec": round(report.chunks_per_sec, 1),
+            "peak_rss_mb": round(peak, 1),
+            "index_mb": round(store.matrix.nbytes / 1024 / 1024, 1),
+        })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=6, help="Headed sections per page")
+    parser.add_argument("--configs", default="1:64:1,4:64:2,4:128:4",
+                        help="Comma-separated workers:batch_size:embed_threads")
+    parser.add_argument("--embeddings", choices=["fake", "model"], default="fake")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    args = parser.parse_args()
+
+    configs = [tuple(int(v) for v in c.split(":")) for c in args.configs.split(",") if c]
+    corpus = Path(tempfile.mkdtemp(prefix="bench_corpus_"))
+    results = []
+    try:
+        write_corpus(corpus, args.files, args.sections)
+        print(f"Corpus: {args.files} files, {sum(p.stat().st_size for p in corpus.iterdir()) / 1e6:.1f} MB\n")
+        print(f"{'workers':>7} {'batch':>6} {'threads':>7} {'chunks':>8} {'sec':>7} "
+              f"{'docs/s':>8} {'chunks/s':>9} {'peak RSS':>9}")
+        for config in configs:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_one, args=(str(corpus), config, args.embeddings, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            print(f"{result['workers']:>7} {result['batch_size']:>6} {result['embed_threads']:>7} "
+                  f"{result['chunks']:>8} {result['seconds']:>7} {result['docs_per_sec']:>8} "
+                  f"{result['chunks_per_sec']:>9} {result['peak_rss_mb']:>7}MB")
+    finally:
+        shutil.rmtree(corpus, ignore_errors=True)
+
+    args.output.write_text(json.dumps({"files": args.files, "embeddings": args.embeddings,
+                                       "results": results}, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
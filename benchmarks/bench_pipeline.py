@@ -0,0 +1,335 @@
+"""
+Benchmark: every stage of the RAG pipeline.
+Times document loading, splitting, embedding, vector search (NumPy and
+Chroma), BM25, language detection, context formatting/packing and
+end-to-end answers, with warmup and repetitions, on the real data/ corpus
+and on synthetic corpora of increasing size. The LLM is a deterministic
+fake, so no network is needed; embeddings are fake too unless
+--embeddings model is given (the model must already be downloaded).
+
+Results are written as JSON. Given --baseline, medians are compared against
+a stored run and regressions beyond --tolerance make the exit code 1.
+
+Run with: python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000]
+          python benchmarks/bench_pipeline.py --baseline benchmarks/baseline_pipeline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Every question must reach the LLM stage, and nothing may touch the real indexes
+os.environ["ANSWER_CACHE_ENABLED"] = "false"
+os.environ["COALESCE_QUESTIONS"] = "false"
+os.environ["PRECOMPUTED_ANSWERS"] = "false"
+os.environ.setdefault("LLM_PROVIDER", "ollama")
+
+DIM = 384
+K = 8
+SYNTHETIC_CHARS_PER_CHUNK = 590  # New text per chunk after overlap and section breaks
+FAKE_ANSWER = ("CloudWalk is a fintech company building the interplanetary payment network. "
+               "See https://www.cloudwalk.io/ for details.")
+QUESTIONS = [
+    "What is CloudWalk?",
+    "What are the fees and rates for InfinitePay debit and credit card transactions?",
+    "What is JIM?",
+    "What is Stratus blockchain?",
+    "Quais são as taxas da maquininha InfinitePay?",
+    "O que é o JIM?",
+]
+_WORDS = (
+    "cloudwalk infinitepay jim stratus pix card machine debit credit fee rate installment "
+    "merchant payment blockchain assistant sales loan account transfer instant settlement "
+    "taxa maquininha parcelamento vendas conta empréstimo transferência cartão crédito débito"
+).split()
+
+
+def measure(func, warmup: int, repeat: int) -> dict:
+    """Run func warmup + repeat times; timing statistics of the repeats in milliseconds."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(float(np.median(times)), 4),
+        "p95_ms": round(float(np.percentile(times, 95)), 4),
+        "min_ms": round(min(times), 4),
+        "repeat": repeat,
+    }
+
+
+def synthetic_text(rng: random.Random, chars: int) -> str:
+    """Markdown-ish text from the product vocabulary, with fee-like numbers."""
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(_WORDS) if rng.random() > 0.1 else f"{rng.randint(0, 9)},{rng.randint(10, 99)}%"
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.02:
+            words.append(f"\n\n## {rng.choice(_WORDS).title()}\n")
+    return " ".join(words)
+
+
+def write_synthetic_corpus(directory: Path, chunks: int, seed: int = 42):
+    """Markdown files that split into roughly `chunks` chunks of the configured size."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    chunks_per_file = 200
+    for index in range(max(1, chunks // chunks_per_file)):
+        suffix = "_pt" if index % 2 else ""
+        text = synthetic_text(rng, SYNTHETIC_CHARS_PER_CHUNK * min(chunks, chunks_per_file))
+        (directory / f"synthetic_{index:04d}{suffix}.md").write_text(text, encoding="utf-8")
+
+
+def make_embeddings(kind: str):
+    if kind == "model":
+        from src.embeddings import EMBEDDING_BACKEND, EMBEDDING_MODEL
+        if EMBEDDING_BACKEND == "onnx":
+            from src.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(EMBEDDING_MODEL)
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={'device': 'cpu'},
+                                     encode_kwargs={'normalize_embeddings': True})
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    return DeterministicFakeEmbedding(size=DIM)
+
+
+def random_vectors(rng: np.random.Generator, n: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_corpus(name: str, data_dir: Path, embeddings, args, results: dict, workdir: Path):
+    """Every stage that depends on corpus size, on the markdown files in data_dir."""
+    from src import embeddings as embeddings_module
+    from src.context_packer import pack_context
+    from src.hybrid import BM25Index
+    from src.rag_chain import format_docs
+    from src.vector_index import NumpyVectorStore
+
+    def record(stage: str, stats: dict, **extra):
+        key = f"{stage}@{name}"
+        results[key] = dict(stats, **extra)
+        print(f"{key:<36} median {stats['median_ms']:>11.3f}ms  p95 {stats['p95_ms']:>11.3f}ms"
+              + "".join(f"  {k} {v}" for k, v in extra.items()))
+
+    big = name != "real" and int(name) >= 10_000
+    repeat = max(1, args.repeat // 5) if big else args.repeat
+    embeddings_module.DATA_DIR = data_dir
+
+    docs = embeddings_module.load_documents()
+    record("load_documents", measure(embeddings_module.load_documents, args.warmup, repeat), docs=len(docs))
+    chunks = embeddings_module.split_documents(docs)
+    record("split_documents", measure(lambda: embeddings_module.split_documents(docs), args.warmup, repeat),
+           chunks=len(chunks))
+    texts = [chunk.page_content for chunk in chunks]
+
+    embed_texts = texts[:args.embed_max]
+    stats = measure(lambda: embeddings.embed_documents(embed_texts), args.warmup, repeat)
+    record("embed_documents", stats, texts=len(embed_texts),
+           texts_per_s=round(len(embed_texts) / (stats["median_ms"] / 1000), 1))
+    record("embed_query", measure(lambda: embeddings.embed_query(QUESTIONS[1]), args.warmup, args.repeat * 10))
+
+    # Search stages use precomputed random vectors so large corpora don't wait on the embedder
+    rng = np.random.default_rng(0)
+    vectors = random_vectors(rng, len(texts))
+    queries = random_vectors(rng, 64)
+    metadatas = [chunk.metadata for chunk in chunks]
+    numpy_store = NumpyVectorStore(embeddings)
+    build_start = time.perf_counter()
+    numpy_store.add_vectors(vectors, texts, metadatas, ids=[str(i) for i in range(len(texts))])
+    build_ms = (time.perf_counter() - build_start) * 1000
+    query_iter = itertools.count()
+    record("numpy_search", measure(lambda: numpy_store.similarity_search_by_vector(
+        queries[next(query_iter) % len(queries)].tolist(), k=K), args.warmup, args.repeat * 10),
+        build_ms=round(build_ms, 1))
+    record("numpy_search_filtered", measure(lambda: numpy_store.similarity_search_by_vector(
+        queries[next(query_iter) % len(queries)].tolist(), k=K, filter={"language": "Portuguese"}),
+        args.warmup, args.repeat * 10))
+
+    if len(texts) <= args.chroma_max:
+        from langchain_chroma import Chroma
+
+        chroma_store = Chroma(collection_name="bench", embedding_function=embeddings,
+                              persist_directory=str(workdir / f"chroma_{name}"))
+        build_start = time.perf_counter()
+        for start in range(0, len(texts), 5_000):
+            end = min(start + 5_000, len(texts))
+            chroma_store._collection.add(ids=[str(i) for i in range(start, end)], embeddings=vectors[start:end],
+                                         documents=texts[start:end], metadatas=metadatas[start:end])
+        build_ms = (time.perf_counter() - build_start) * 1000
+        record("chroma_search", measure(lambda: chroma_store.similarity_search_by_vector(
+            queries[next(query_iter) % len(queries)].tolist(), k=K), args.warmup, args.repeat * 10),
+            build_ms=round(build_ms, 1))
+
+    bm25_start = time.perf_counter()
+    bm25 = BM25Index(chunks)
+    bm25_ms = (time.perf_counter() - bm25_start) * 1000
+    question_iter = itertools.count()
+    record("bm25_search", measure(lambda: bm25.search(QUESTIONS[next(question_iter) % len(QUESTIONS)], K),
+                                  args.warmup, args.repeat * 10), build_ms=round(bm25_ms, 1))
+
+    retrieved = chunks[:K]
+    record("format_docs", measure(lambda: format_docs(retrieved), args.warmup, args.repeat * 10))
+    record("pack_context", measure(lambda: pack_context(retrieved), args.warmup, args.repeat * 10))
+
+
+def bench_end_to_end(embeddings, args, results: dict, workdir: Path):
+    """simple_ask and stream_ask through the full pipeline, with a fake streaming LLM."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from src import embeddings as embeddings_module, rag_chain
+    from src.language import detect_language
+    from src.vector_index import NumpyVectorStore
+
+    def record(stage: str, stats: dict):
+        results[f"{stage}@real"] = stats
+        print(f"{stage + '@real':<36} median {stats['median_ms']:>11.3f}ms  p95 {stats['p95_ms']:>11.3f}ms")
+
+    question_iter = itertools.count()
+    record("detect_language", measure(lambda: detect_language(QUESTIONS[next(question_iter) % len(QUESTIONS)]),
+                                      args.warmup, args.repeat * 100))
+
+    # Indexes (and the BM25 file kept next to their manifest) live in the scratch directory; the real ones are untouched
+    embeddings_module.CHROMA_DB_DIR = workdir / "chroma_db"
+    embeddings_module.NUMPY_INDEX_DIR = workdir / "numpy_index"
+
+    vector_store = NumpyVectorStore(embeddings)
+    vector_store.add_documents(embeddings_module.split_documents(embeddings_module.load_documents()))
+    retriever = rag_chain.get_retriever(vector_store)
+    prompt = rag_chain.get_prompt()
+    llm = FakeListChatModel(responses=[FAKE_ANSWER])
+    rag_chain._pipeline = rag_chain.RAGPipeline(
+        embeddings=embeddings,
+        vector_store=vector_store,
+        retriever=retriever,
+        prompt=prompt,
+        llm=llm,
+        chain=rag_chain.create_rag_chain(llm=llm, retriever=retriever, prompt=prompt),
+        generation_chain=rag_chain.create_generation_chain(llm, prompt)
+    )
+
+    record("retrieval", measure(lambda: rag_chain.prepare_inputs(
+        QUESTIONS[next(question_iter) % len(QUESTIONS)], retriever), args.warmup, args.repeat * 10))
+    inputs = rag_chain.prepare_inputs(QUESTIONS[0], retriever)
+    record("prompt_build", measure(lambda: prompt.invoke(inputs), args.warmup, args.repeat * 10))
+    record("simple_ask", measure(lambda: rag_chain.simple_ask(QUESTIONS[next(question_iter) % len(QUESTIONS)]),
+                                 args.warmup, args.repeat * 5))
+
+    ttfts = []
+
+    def first_token():
+        start = time.perf_counter()
+        stream = rag_chain.stream_ask(QUESTIONS[next(question_iter) % len(QUESTIONS)])
+        next(stream)
+        ttfts.append((time.perf_counter() - start) * 1000)
+        for _ in stream:
+            pass
+
+    record("stream_ask", measure(first_token, args.warmup, args.repeat * 5))
+    results["stream_ask_ttft@real"] = {"median_ms": round(float(np.median(ttfts)), 4),
+                                       "p95_ms": round(float(np.percentile(ttfts, 95)), 4),
+                                       "min_ms": round(min(ttfts), 4), "repeat": len(ttfts)}
+
+
+def compare(results: dict, baseline: dict, tolerance: float, noise_ms: float) -> list:
+    """Stages whose median got slower than the baseline by more than `tolerance` (and `noise_ms`)."""
+    regressions = []
+    for key, stats in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        before, after = previous["median_ms"], stats["median_ms"]
+        if after > before * (1 + tolerance) and after - before > noise_ms:
+            regressions.append({"stage": key, "baseline_ms": before, "current_ms": after,
+                                "change": round(after / before - 1, 3) if before else None})
+    return regressions
+
+
+def run_metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent.parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embeddings": args.embeddings,
+        "sizes": args.sizes,
+        "warmup": args.warmup,
+        "repeat": args.repeat,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Synthetic corpus sizes in chunks ('' for none)")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=10, help="Base repetitions (fast stages run more)")
+    parser.add_argument("--embeddings", choices=["fake", "model"], default="fake")
+    parser.add_argument("--embed-max", type=int, default=2000, help="Texts per embed_documents measurement")
+    parser.add_argument("--chroma-max", type=int, default=10_000, help="Skip Chroma above this corpus size")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, help="Compare against this stored run")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of a median (0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    from src.embeddings import DATA_DIR
+
+    embeddings = make_embeddings(args.embeddings)
+    results = {}
+    workdir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    try:
+        bench_corpus("real", DATA_DIR, embeddings, args, results, workdir)
+        bench_end_to_end(embeddings, args, results, workdir)
+        for size in (int(s) for s in args.sizes.split(",") if s):
+            corpus_dir = workdir / f"corpus_{size}"
+            write_synthetic_corpus(corpus_dir, size)
+            bench_corpus(str(size), corpus_dir, embeddings, args, results, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"meta": run_metadata(args), "results": results}
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["meta"].get("embeddings") != args.embeddings:
+            print(f"Warning: baseline used {baseline['meta'].get('embeddings')} embeddings, this run {args.embeddings}")
+        regressions = compare(results, baseline["results"], args.tolerance, args.noise_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']}: {regression['baseline_ms']:.3f}ms -> "
+                  f"{regression['current_ms']:.3f}ms (+{regression['change']:.0%})")
+        print(f"{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
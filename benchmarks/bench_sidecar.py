@@ -0,0 +1,230 @@
+"""
+Benchmark: per-process model and index vs. the shared embedding sidecar.
+Starts N worker processes that each answer the same stream of retrieval
+queries (embed the question + top-k vector search), first with their own
+embedding model and index copy, then as clients of one sidecar process
+(src/sidecar.py). Reports per-worker and total memory (RSS and PSS) and
+query latency p50/p95 with all workers querying at once.
+
+--embeddings minilm-random runs a BERT with the MiniLM-L6 architecture
+(384 hidden, 6 layers) and random weights, built offline: it has the
+memory footprint and compute cost of the real model but meaningless
+vectors. Use --embeddings model for the configured model when it can be
+downloaded.
+
+Run with: python benchmarks/bench_sidecar.py [--workers 4] [--queries 50] [--embeddings minilm-random]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_ingest import write_corpus
+
+QUESTIONS = [
+    "What is InfiniteTap?", "How do I get paid with Pix?", "What are the card machine fees?",
+    "Quanto custa a maquininha?", "What is JIM?", "Como funciona o Stratus?", "When do payouts arrive?",
+    "How do I open an account?",
+]
+
+
+def memory_mb() -> dict:
+    """RSS and PSS of this process in MB. PSS splits shared pages between the processes mapping them."""
+    result = {}
+    for path, keys in (("/proc/self/status", {"VmRSS:": "rss"}), ("/proc/self/smaps_rollup", {"Pss:": "pss"})):
+        try:
+            with open(path) as f:
+                for line in f:
+                    key = keys.get(line.split(":")[0] + ":")
+                    if key:
+                        result[key] = round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+    return result
+
+
+def make_embeddings(kind: str):
+    if kind == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        return DeterministicFakeEmbedding(size=384)
+    if kind == "model":
+        from src.embeddings import get_embeddings
+        return get_embeddings()
+    return random_minilm_embeddings()
+
+
+def random_minilm_embeddings():
+    """MiniLM-L6-shaped BERT with random weights; words are hashed to token ids (no tokenizer download)."""
+    import torch
+    from langchain_core.embeddings import Embeddings
+    from transformers import BertConfig, BertModel
+
+    class _RandomMiniLM(Embeddings):
+        def __init__(self):
+            torch.manual_seed(0)
+            config = BertConfig(vocab_size=30522, hidden_size=384, num_hidden_layers=6, num_attention_heads=12,
+                                intermediate_size=1536, max_position_embeddings=512)
+            self.model = BertModel(config).eval()
+
+        def _ids(self, text):
+            words = text.lower().split()[:254]
+            return [101] + [1000 + sum(map(ord, w)) * 31 % 29000 for w in words] + [102]
+
+        def embed_documents(self, texts):
+            if not texts:
+                return []
+            ids = [self._ids(t) for t in texts]
+            width = max(len(i) for i in ids)
+            input_ids = torch.tensor([i + [0] * (width - len(i)) for i in ids])
+            mask = (input_ids != 0).long()
+            with torch.inference_mode():
+                hidden = self.model(input_ids=input_ids, attention_mask=mask).last_hidden_state
+            pooled = (hidden * mask.unsqueeze(-1)).sum(1) / mask.sum(1, keepdim=True)
+            return torch.nn.functional.normalize(pooled, dim=1).tolist()
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    return _RandomMiniLM()
+
+
+def build_index(index_dir: Path, files: int, kind: str) -> int:
+    from src.indexer import sync_vector_store
+    from src.vector_index import NumpyVectorStore
+
+    corpus = index_dir.parent / "corpus"
+    write_corpus(corpus, files, sections=4)
+    store = NumpyVectorStore(make_embeddings(kind), persist_directory=index_dir)
+    sync_vector_store(store, manifest_path=index_dir / "index_manifest.json", data_dir=corpus)
+    return len(store)
+
+
+def run_sidecar(kind: str, index_dir: str, socket_path: str):
+    from src.sidecar import serve
+    from src.vector_index import NumpyVectorStore
+
+    embeddings = make_embeddings(kind)
+    serve(socket_path, embeddings, NumpyVectorStore(embeddings, persist_directory=Path(index_dir)))
+
+
+def run_worker(mode: str, kind: str, index_dir: str, socket_path: str, queries: int, barrier, result_queue):
+    if mode == "sidecar":
+        from src.sidecar import SidecarClient, SidecarVectorStore
+        store = SidecarVectorStore(SidecarClient(socket_path))
+    else:
+        from src.vector_index import NumpyVectorStore
+        store = NumpyVectorStore(make_embeddings(kind), persist_directory=Path(index_dir))
+    store.similarity_search("warmup", k=4)
+    barrier.wait()
+
+    latencies = []
+    start_time = time.perf_counter()
+    for i in range(queries):
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} ({os.getpid()} {i})"
+        t = time.perf_counter()
+        store.similarity_search(question, k=4)
+        latencies.append(time.perf_counter() - t)
+    result_queue.put({"latencies": latencies, "seconds": time.perf_counter() - start_time,
+                      "torch_loaded": "torch" in sys.modules, **memory_mb()})
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_mode(mode: str, args, index_dir: Path) -> dict:
+    context = multiprocessing.get_context("spawn")  # Workers must not inherit the parent's model
+    sidecar = None
+    socket_path = str(index_dir.parent / "sidecar.sock")
+    if mode == "sidecar":
+        from src.sidecar import SidecarClient
+        sidecar = context.Process(target=run_sidecar, args=(args.embeddings, str(index_dir), socket_path))
+        sidecar.start()
+        client = SidecarClient(socket_path, timeout=1.0)
+        while True:
+            try:
+                client.call({"op": "info"})
+                break
+            except OSError:
+                time.sleep(0.2)
+
+    barrier = context.Barrier(args.workers)
+    result_queue = context.Queue()
+    workers = [context.Process(target=run_worker, args=(mode, args.embeddings, str(index_dir), socket_path,
+                                                         args.queries, barrier, result_queue))
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    results = [result_queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    sidecar_stats = None
+    if sidecar is not None:
+        sidecar_stats = client.call({"op": "stats"})
+        sidecar.terminate()
+        sidecar.join()
+
+    latencies = [latency for result in results for latency in result["latencies"]]
+    per_worker_rss = sum(r["rss"] for r in results) / len(results)
+    per_worker_pss = sum(r.get("pss", 0) for r in results) / len(results)
+    sidecar_rss = sidecar_stats["rss_mb"] if sidecar_stats else 0.0
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "worker_rss_mb": round(per_worker_rss, 1),
+        "worker_pss_mb": round(per_worker_pss, 1),
+        "sidecar_rss_mb": sidecar_rss,
+        "total_rss_mb": round(per_worker_rss * len(results) + sidecar_rss, 1),
+        "torch_in_workers": any(r["torch_loaded"] for r in results),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "queries_per_sec": round(len(latencies) / max(r["seconds"] for r in results), 1),
+        "avg_batch": sidecar_stats["avg_batch"] if sidecar_stats else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50, help="Queries per worker")
+    parser.add_argument("--files", type=int, default=200, help="Synthetic help pages to index")
+    parser.add_argument("--embeddings", choices=["fake", "minilm-random", "model"], default="minilm-random")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_sidecar_"))
+    results = []
+    try:
+        rows = build_index(workdir / "index", args.files, args.embeddings)
+        print(f"Index: {rows} chunks, {args.embeddings} embeddings, {args.workers} workers x "
+              f"{args.queries} queries, {os.cpu_count()} CPUs\n")
+        print(f"{'mode':>8} {'worker RSS':>11} {'worker PSS':>11} {'sidecar':>8} {'total RSS':>10} "
+              f"{'p50':>8} {'p95':>8} {'q/s':>7} {'batch':>6}")
+        for mode in ("process", "sidecar"):
+            result = run_mode(mode, args, workdir / "index")
+            results.append(result)
+            print(f"{mode:>8} {result['worker_rss_mb']:>9}MB {result['worker_pss_mb']:>9}MB "
+                  f"{result['sidecar_rss_mb']:>6}MB {result['total_rss_mb']:>8}MB "
+                  f"{result['p50_ms']:>6}ms {result['p95_ms']:>6}ms {result['queries_per_sec']:>7} "
+                  f"{result['avg_batch'] or '-':>6}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    args.output.write_text(json.dumps({"embeddings": args.embeddings, "chunks": rows, "cpus": os.cpu_count(),
+                                       "results": results}, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: NumPy exact-search index vs ChromaDB.
+Measures build time, per-query latency and resident memory at several
+corpus sizes, using random normalized 384-dim vectors (all-MiniLM-L6-v2 size)
+so no embedding model is needed. Each run happens in a fresh process so
+memory numbers don't bleed into each other. Building Chroma's HNSW index at
+1M chunks takes a long time; --chroma-max lowers the largest Chroma run.
+
+Run with: python benchmarks/bench_vector_index.py [--sizes 100,10000,1000000]
+"""
+
+import sys
+import json
+import time
+import shutil
+import tempfile
+import zlib
+import queue
+import argparse
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DIM = 384
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def random_vectors(rng, n: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class RandomEmbeddings:
+    """Fixed random unit vector per text, so stores that embed on their own still work without a model."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        return random_vectors(rng, 1)[0].tolist()
+
+
+def run_one(backend: str, size: int, queries: int, result_queue):
+    try:
+        result_queue.put(measure(backend, size, queries))
+    except Exception as e:
+        result_queue.put({"backend": backend, "chunks": size, "error": f"{type(e).__name__}: {e}"})
+
+
+def measure(backend: str, size: int, queries: int) -> dict:
+    from src.vector_index import NumpyVectorStore
+    from langchain_chroma import Chroma
+
+    rng = np.random.default_rng(42)
+    query_vectors = random_vectors(rng, queries)
+    baseline_rss = rss_mb()
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        build_start = time.perf_counter()
+        if backend == "numpy":
+            store = NumpyVectorStore(RandomEmbeddings())
+            for start in range(0, size, 100_000):
+                n = min(100_000, size - start)
+                store.add_vectors(random_vectors(rng, n), (f"chunk {i}" for i in range(start, start + n)),
+                                  ids=[str(i) for i in range(start, start + n)])
+        else:
+            store = Chroma(collection_name="bench", embedding_function=RandomEmbeddings(),
+                           persist_directory=str(workdir))
+            for start in range(0, size, 5_000):
+                n = min(5_000, size - start)
+                store._collection.add(ids=[str(i) for i in range(start, start + n)],
+                                      embeddings=random_vectors(rng, n),
+                                      documents=[f"chunk {i}" for i in range(start, start + n)])
+        build_time = time.perf_counter() - build_start
+        memory = rss_mb() - baseline_rss
+
+        for vector in query_vectors[:5]:  # Warmup
+            store.similarity_search_by_vector(vector.tolist(), k=8)
+        latencies = []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            store.similarity_search_by_vector(vector.tolist(), k=8)
+            latencies.append(time.perf_counter() - start)
+
+        result = {
+            "backend": backend,
+            "chunks": size,
+            "build_s": round(build_time, 3),
+            "rss_delta_mb": round(memory, 1),
+            "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "query_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        }
+        if backend == "numpy":
+            start = time.perf_counter()
+            store.search_batch(query_vectors, k=8)
+            result["batched_query_ms"] = round((time.perf_counter() - start) / queries * 1000, 3)
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def wait_for_result(process, result_queue) -> dict:
+    """The child's result, or an error if it died without sending one (e.g. killed for memory)."""
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                try:
+                    return result_queue.get_nowait()  # Sent just before the child exited
+                except queue.Empty:
+                    return {"error": f"process exited with code {process.exitcode}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default="100,10000,1000000", help="Comma-separated chunk counts")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chroma-max", type=int, default=1_000_000,
+                        help="Skip Chroma above this size (HNSW build at 1M takes a long time)")
+    parser.add_argument("--output", type=Path, help="Also write results as JSON")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for backend in ("numpy", "chroma"):
+            if backend == "chroma" and size > args.chroma_max:
+                print(f"{backend:>6} {size:>9,}  skipped (raise --chroma-max to include)")
+                continue
+            result_queue = context.Queue()
+            process = context.Process(target=run_one, args=(backend, size, args.queries, result_queue))
+            process.start()
+            result = wait_for_result(process, result_queue)
+            process.join()
+            results.append(result)
+            if "error" in result:
+                print(f"{backend:>6} {size:>9,}  failed: {result['error']}")
+                continue
+            print(f"{backend:>6} {size:>9,}  build {result['build_s']:>8.2f}s  "
+                  f"RSS +{result['rss_delta_mb']:>8.1f}MB  "
+                  f"p50 {result['query_p50_ms']:>8.3f}ms  p95 {result['query_p95_ms']:>8.3f}ms"
+                  + (f"  batched {result['batched_query_ms']:.3f}ms/query" if "batched_query_ms" in result else ""))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
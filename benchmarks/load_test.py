@@ -0,0 +1,304 @@
+"""
+Load test: how many concurrent users one CloudWalk Helper process can serve.
+Simulated users (threads) ask questions in a loop through the same
+streaming path as simple_ask()/ask(), at increasing concurrency levels. The
+LLM is the local mock server (benchmarks/mock_llm_server.py, started as a
+subprocess unless --llm-url is given) with a configurable time to first
+token and token rate, reached through the real provider pool over HTTP.
+
+For each level it reports throughput, p50/p95/p99 end-to-end latency, time
+to first token and per-stage latency (from the tracing spans), and process
+CPU and RSS sampled over time. The answer cache and the precomputed
+quick-action answers are off unless --answer-cache is given, and identical
+concurrent questions are only coalesced with --coalesce, so every question
+goes through the whole pipeline.
+
+Run with: python benchmarks/load_test.py [--users 1,4,16,32] [--duration 30] [--ttft 0.5]
+          python benchmarks/load_test.py --embeddings fake --users 1,8 --duration 10
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import shutil
+import argparse
+import tempfile
+import platform
+import threading
+import subprocess
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_vector_index import rss_mb
+
+MOCK_SERVER = Path(__file__).parent / "mock_llm_server.py"
+
+
+def percentiles(seconds) -> dict:
+    """p50/p95/p99 in milliseconds (None when there are no samples)."""
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    values = np.asarray(seconds) * 1000
+    return {f"p{q}_ms": round(float(np.percentile(values, q)), 2) for q in (50, 95, 99)}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock_server(args):
+    """Start the mock LLM server as a subprocess (its CPU is not counted) and wait until it answers."""
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, str(MOCK_SERVER), "--port", str(port), "--ttft", str(args.ttft),
+        "--tokens-per-sec", str(args.tokens_per_sec), "--answer-tokens", str(args.answer_tokens),
+    ], stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/v1"
+    deadline = time.time() + 15
+    while True:
+        try:
+            urllib.request.urlopen(f"{url}/models", timeout=1).close()
+            return process, url
+        except OSError:
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("Mock LLM server did not start")
+            time.sleep(0.1)
+
+
+class ResourceSampler(threading.Thread):
+    """Samples process CPU (percent of one core, summed over threads) and RSS at a fixed interval."""
+
+    def __init__(self, interval: float, progress):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.interval = interval
+        self.progress = progress
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        start = last_wall = time.perf_counter()
+        last_cpu = time.process_time()
+        while not self._done.wait(self.interval):
+            wall, cpu = time.perf_counter(), time.process_time()
+            self.samples.append({
+                "t": round(wall - start, 2),
+                "cpu_percent": round(100 * (cpu - last_cpu) / (wall - last_wall), 1),
+                "rss_mb": round(rss_mb(), 1),
+                "completed": self.progress(),
+            })
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self) -> list:
+        self._done.set()
+        self.join()
+        return self.samples
+
+
+class SpanCollector:
+    """Span listener keeping every duration per stage (list.append is atomic, no lock needed)."""
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+
+    def __call__(self, span):
+        self.durations[span.name].append(span.duration)
+
+
+def run_level(users: int, args, questions: list, stream_ask, collector: SpanCollector) -> dict:
+    """Run `users` simulated users for args.duration seconds and summarize their requests."""
+    collector.durations.clear()
+    records = []  # (latency, time to first token, error name or None)
+    stop_at = time.perf_counter() + args.duration
+
+    def user(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        while time.perf_counter() < stop_at:
+            question = rng.choice(questions)
+            metrics = {}
+            start = time.perf_counter()
+            try:
+                for _ in stream_ask(question, metrics):
+                    pass
+                records.append((time.perf_counter() - start, metrics.get("time_to_first_token"), None))
+            except Exception as e:
+                records.append((time.perf_counter() - start, None, type(e).__name__))
+            if args.think_time > 0:
+                time.sleep(rng.expovariate(1 / args.think_time))
+
+    sampler = ResourceSampler(args.sample_interval, lambda: len(records))
+    sampler.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,), name=f"user-{i}") for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    timeline = sampler.stop()
+
+    ok = [r for r in records if r[2] is None]
+    errors = defaultdict(int)
+    for record in records:
+        if record[2] is not None:
+            errors[record[2]] += 1
+    return {
+        "users": users,
+        "requests": len(records),
+        "errors": dict(errors),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 3),
+        "latency": percentiles([r[0] for r in ok]),
+        "time_to_first_token": percentiles([r[1] for r in ok if r[1] is not None]),
+        "stages": {name: dict(percentiles(values), count=len(values))
+                   for name, values in sorted(collector.durations.items())},
+        "cpu_percent_avg": round(float(np.mean([s["cpu_percent"] for s in timeline])), 1) if timeline else None,
+        "cpu_percent_max": max((s["cpu_percent"] for s in timeline), default=None),
+        "rss_mb_max": max((s["rss_mb"] for s in timeline), default=None),
+        "timeline": timeline,
+    }
+
+
+def build_fake_pipeline(workdir: Path):
+    """Pipeline with fake embeddings whose indexes live in `workdir` (the real ones are untouched)."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src import embeddings as embeddings_module, rag_chain
+
+    embeddings_module.CHROMA_DB_DIR = workdir / "chroma_db"
+    embeddings_module.NUMPY_INDEX_DIR = workdir / "numpy_index"
+    rag_chain._pipeline = rag_chain.build_pipeline(DeterministicFakeEmbedding(size=384))
+
+
+def print_level(level: dict):
+    latency, ttft = level["latency"], level["time_to_first_token"]
+    errors = sum(level["errors"].values())
+    print(f"{level['users']:>5} users  {level['requests']:>6} req  {errors:>4} err  "
+          f"{level['throughput_rps']:>7.2f} req/s  "
+          f"latency p50/p95/p99 {latency['p50_ms']}/{latency['p95_ms']}/{latency['p99_ms']}ms  "
+          f"TTFT p50/p95 {ttft['p50_ms']}/{ttft['p95_ms']}ms  "
+          f"CPU avg {level['cpu_percent_avg']}% max {level['cpu_percent_max']}%  RSS max {level['rss_mb_max']}MB")
+    for name, stats in level["stages"].items():
+        print(f"        {name:<20} n={stats['count']:<6} p50 {stats['p50_ms']:>9}ms  "
+              f"p95 {stats['p95_ms']:>9}ms  p99 {stats['p99_ms']:>9}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a user's questions")
+    parser.add_argument("--questions", type=Path, help="Question mix, one per line (repeat a line to weight it); "
+                                                       "default: the app's quick-action questions")
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model",
+                        help="'model' runs the pipeline as deployed; 'fake' needs no model download")
+    parser.add_argument("--llm-url", help="Use an already running OpenAI-compatible server instead of the mock")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Mock LLM time to first token (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="Mock LLM token rate")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="Mock LLM answer length")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache and precomputed answers on")
+    parser.add_argument("--coalesce", action="store_true", help="Let identical concurrent questions share one answer")
+    parser.add_argument("--rate-limit", default="", help="LLM rate limit as requests/seconds, e.g. 20/60 "
+                                                          "(default: none, the mock takes everything)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between CPU/RSS samples")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=Path("load_test_results.json"))
+    args = parser.parse_args()
+
+    mock = None
+    if args.llm_url:
+        llm_url = args.llm_url
+    else:
+        mock, llm_url = start_mock_server(args)
+        print(f"Mock LLM at {llm_url} (TTFT {args.ttft}s, {args.tokens_per_sec} tokens/s)")
+
+    # Provider settings are read when src.llm_pool is imported
+    os.environ.update({
+        "LLM_PROVIDERS": "openrouter",
+        "OPENROUTER_BASE_URL": llm_url,
+        "OPENROUTER_API_KEY": os.environ.get("LOAD_TEST_API_KEY", "mock"),
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+        "PRECOMPUTED_ANSWERS": "true" if args.answer_cache else "false",
+        "COALESCE_QUESTIONS": "true" if args.coalesce else "false",
+        "LLM_RATE_LIMITS": f"openrouter={args.rate_limit}" if args.rate_limit else "",
+    })
+    from src import rag_chain, tracing
+    from src.quick_actions import QUICK_QUESTIONS
+
+    questions = QUICK_QUESTIONS
+    if args.questions:
+        questions = [line.strip() for line in args.questions.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    workdir = Path(tempfile.mkdtemp(prefix="load_test_"))
+    collector = SpanCollector()
+    tracing.add_span_listener(collector)
+    levels = []
+    try:
+        start = time.perf_counter()
+        if args.embeddings == "fake":
+            build_fake_pipeline(workdir)
+        else:
+            rag_chain.warmup()
+        print(f"Pipeline ready in {time.perf_counter() - start:.1f}s, RSS {rss_mb():.0f}MB\n")
+        for _ in rag_chain.stream_ask(questions[0]):
+            pass  # Opens the LLM connection and warms every stage once
+
+        for users in (int(u) for u in args.users.split(",") if u):
+            level = run_level(users, args, questions, rag_chain.stream_ask, collector)
+            levels.append(level)
+            print_level(level)
+    finally:
+        tracing.remove_span_listener(collector)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+
+    if levels:
+        best = max(levels, key=lambda level: level["throughput_rps"])
+        print(f"\nPeak throughput {best['throughput_rps']:.2f} req/s at {best['users']} users")
+    single_flight = None
+    if args.coalesce:
+        from src.singleflight import get_single_flight
+        single_flight = get_single_flight().stats()
+        print(f"Coalesced {single_flight['coalesced']} requests, {single_flight['llm_calls_saved']} LLM calls saved")
+    scheduler = None
+    if args.rate_limit:
+        scheduler = rag_chain.get_pipeline().llm.snapshot()["scheduler"]
+        print(f"LLM queue: {scheduler['admitted']} calls admitted, {scheduler['queued']} queued "
+              f"(avg wait {scheduler['avg_queue_wait']}s), {scheduler['dropped'] + scheduler['rejected']} turned away")
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "embeddings": args.embeddings,
+            "llm": args.llm_url or {"mock_ttft": args.ttft, "tokens_per_sec": args.tokens_per_sec,
+                                    "answer_tokens": args.answer_tokens},
+            "duration_s": args.duration,
+            "think_time_s": args.think_time,
+            "answer_cache": args.answer_cache,
+            "coalesce": args.coalesce,
+            "rate_limit": args.rate_limit or None,
+            "questions": len(questions),
+        },
+        "levels": levels,
+        "single_flight": single_flight,
+        "scheduler": scheduler,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Mock OpenAI-compatible LLM server for load tests.
+Answers POST /v1/chat/completions (streaming or not) with a canned answer
+after a configurable time to first token, then emits tokens at a fixed
+rate, so the rest of the pipeline can be load-tested without a real
+provider and with controlled LLM latency.
+
+Point the app at it with:
+    LLM_PROVIDERS=openrouter OPENROUTER_API_KEY=mock OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1
+
+Run with: python benchmarks/mock_llm_server.py [--port 8089] [--ttft 0.5] [--tokens-per-sec 40]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = ("CloudWalk is a Brazilian fintech that builds payment solutions such as the InfinitePay "
+          "card machine, Pix and the JIM sales assistant, and runs the Stratus blockchain. "
+          "See https://www.cloudwalk.io/ for details.")
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, ttft: float, tokens_per_sec: float, answer_tokens: int, jitter: float):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.jitter = jitter
+        words = ANSWER.split(" ")
+        self.tokens = [words[i % len(words)] + " " for i in range(answer_tokens)]
+
+    def handle_error(self, request, client_address):
+        # Clients may drop a connection after the last event instead of reading the stream's end
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def delay(self, seconds: float) -> float:
+        """`seconds` with up to ±jitter relative noise."""
+        return max(0.0, seconds * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json({"error": {"message": "not found"}}, status=404)
+            return
+        server = self.server
+        time.sleep(server.delay(server.ttft))
+        interval = 1.0 / server.tokens_per_sec if server.tokens_per_sec > 0 else 0.0
+        if not body.get("stream"):
+            time.sleep(server.delay(interval * (len(server.tokens) - 1)))
+            self._send_json({
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": "mock",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(server.tokens)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(server.tokens),
+                          "total_tokens": len(server.tokens)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(server.tokens):
+                if i:
+                    time.sleep(server.delay(interval))
+                self._chunk(_event({"role": "assistant", "content": token}, None))
+            self._chunk(_event({}, "stop") + b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload: dict, status: int = 200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _event(delta: dict, finish_reason) -> bytes:
+    chunk = {
+        "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": "mock",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="Token rate after the first token")
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--jitter", type=float, default=0.1, help="Relative random noise on every delay")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.port, args.ttft, args.tokens_per_sec, args.answer_tokens, args.jitter)
+    print(f"Mock LLM listening on http://127.0.0.1:{server.server_address[1]}/v1 "
+          f"(TTFT {args.ttft}s, {args.tokens_per_sec} tokens/s, {args.answer_tokens} tokens)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
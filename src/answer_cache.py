@@ -0,0 +1,166 @@
+"""
+Semantic answer cache for CloudWalk Helper.
+Returns a stored answer when a new question is a close paraphrase of one
+already answered, skipping retrieval and the LLM call entirely.
+"""
+
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.AnswerCache")
+
+# Configuration
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+@dataclass
+class CacheEntry:
+    """A cached answer together with the embedding of the question it answers."""
+    question: str
+    vector: np.ndarray
+    language: str
+    answer: str
+    created_at: float
+    size: int
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe answer cache keyed by question embedding and language.
+
+    A lookup hits when the cosine similarity between the incoming question
+    and a cached question of the same language reaches the threshold.
+    Entries are evicted least-recently-used first when the entry or byte
+    budget is exceeded, expire after the TTL, and are all dropped when the
+    knowledge base hash changes.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES, max_bytes=ANSWER_CACHE_MAX_BYTES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._next_key = 0
+        self._kb_hash = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def lookup(self, vector, language: str, kb_hash: Optional[str] = None) -> Optional[str]:
+        """Return the cached answer most similar to `vector`, or None on a miss."""
+        query = _normalize(vector)
+        with self._lock:
+            self._check_kb_hash(kb_hash)
+            self._expire(time.time())
+            keys = [key for key, entry in self._entries.items() if entry.language == language]
+            if keys:
+                matrix = np.stack([self._entries[key].vector for key in keys])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    entry = self._entries[key]
+                    logger.info(f"Answer cache hit (similarity {scores[best]:.3f}): '{entry.question[:50]}'")
+                    return entry.answer
+            self.misses += 1
+            return None
+
+    def store(self, question: str, vector, language: str, answer: str, kb_hash: Optional[str] = None):
+        """Cache `answer` for `question`, evicting old entries to stay within budget."""
+        vector = _normalize(vector)
+        size = vector.nbytes + len(question.encode("utf-8")) + len(answer.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_kb_hash(kb_hash)
+            entry = CacheEntry(question, vector, language, answer, time.time(), size)
+            self._entries[self._next_key] = entry
+            self._next_key += 1
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _check_kb_hash(self, kb_hash):
+        # Answers are only valid for the knowledge base they were generated from
+        if kb_hash is None or kb_hash == self._kb_hash:
+            return
+        if self._kb_hash is not None and self._entries:
+            logger.info(f"Knowledge base changed, dropping {len(self._entries)} cached answers")
+            self.invalidations += 1
+        self._entries.clear()
+        self._bytes = 0
+        self._kb_hash = kb_hash
+
+    def _expire(self, now):
+        # Entries are in LRU order, not insertion order, so scan them all
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            self._bytes -= self._entries.pop(key).size
+        self.expirations += len(expired)
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the process-wide answer cache, or None when disabled."""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache()
+        return _answer_cache
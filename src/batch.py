@@ -0,0 +1,203 @@
+"""
+Batch question answering for CloudWalk Helper.
+Answers a file of questions (JSONL or CSV) with one batched embedding pass,
+the same retrieval as the app (hybrid search, language routing, reranking)
+on the bounded retrieval pool, a bounded number of concurrent LLM calls, backoff on provider rate limits,
+and a resumable JSONL output that doubles as the checkpoint.
+
+Run with: python -m src.batch questions.jsonl -o answers.jsonl
+"""
+
+import os
+import csv
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from .llm_pool import rate_limit_delay
+from .llm_scheduler import llm_admission
+from .rag_chain import get_pipeline, prepare_inputs, run_blocking
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Batch")
+
+# Configuration
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "6"))
+BATCH_BACKOFF_BASE = float(os.getenv("BATCH_BACKOFF_BASE", "2.0"))  # Seconds
+BATCH_BACKOFF_MAX = float(os.getenv("BATCH_BACKOFF_MAX", "120.0"))  # Seconds
+
+
+def load_questions(path: Path) -> list:
+    """
+    Read questions from a JSONL file ({"question": ..., "id": ...} per line)
+    or a CSV file with a `question` column and optional `id` column.
+
+    Questions without an id get one derived from their text, so reruns
+    over the same file resume correctly.
+    """
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    questions = []
+    for row in rows:
+        question = (row.get("question") or "").strip()
+        if not question:
+            continue
+        question_id = str(row.get("id") or hashlib.sha1(question.encode("utf-8")).hexdigest()[:12])
+        questions.append({"id": question_id, "question": question})
+    return questions
+
+
+def load_completed(output_path: Path) -> set:
+    """IDs already answered successfully in a previous (possibly crashed) run."""
+    completed = set()
+    if not output_path.exists():
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from a crash
+            if "answer" in record:
+                completed.add(record["id"])
+    return completed
+
+
+class RateLimitGate:
+    """Shared pause: once any call is rate-limited, every worker waits it out."""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.time() + seconds)
+
+    async def wait(self):
+        delay = self.resume_at - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def generate_with_backoff(chain, inputs: dict, gate: RateLimitGate,
+                                max_retries: int = BATCH_MAX_RETRIES) -> tuple:
+    """
+    Run the generation chain, retrying rate-limited calls with exponential
+    backoff (or the provider's Retry-After, when given).
+
+    Returns:
+        (answer, attempts)
+    """
+    for attempt in range(1, max_retries + 2):
+        await gate.wait()
+        try:
+            return await chain.ainvoke(inputs), attempt
+        except Exception as e:
+            delay = rate_limit_delay(e)
+            if delay is None or attempt > max_retries:
+                raise
+            backoff = min(BATCH_BACKOFF_MAX, BATCH_BACKOFF_BASE * 2 ** (attempt - 1))
+            wait = max(delay, backoff) * random.uniform(1.0, 1.25)
+            logger.warning(f"Rate limited (attempt {attempt}), backing off {wait:.1f}s")
+            gate.pause(wait)
+
+
+async def run_batch(questions: list, output_path: Path, concurrency: int = BATCH_CONCURRENCY,
+                    max_retries: int = BATCH_MAX_RETRIES) -> dict:
+    """
+    Answer `questions`, appending one JSON record per question to `output_path`.
+
+    Returns:
+        Summary with counts and wall time
+    """
+    start_time = time.time()
+    completed = load_completed(output_path)
+    pending = [q for q in questions if q["id"] not in completed]
+    logger.info(f"{len(questions)} questions, {len(completed)} already answered, {len(pending)} to go")
+    summary = {"total": len(questions), "skipped": len(questions) - len(pending), "answered": 0, "failed": 0}
+    if not pending:
+        summary["elapsed"] = time.time() - start_time
+        return summary
+
+    pipeline = await run_blocking(get_pipeline)
+
+    # One batched embedding pass for every pending question; retrieval below then hits the embedding cache
+    embedding_time = None
+    if hasattr(pipeline.embeddings, "embed_queries"):
+        embed_start = time.time()
+        await run_blocking(pipeline.embeddings.embed_queries, [q["question"] for q in pending])
+        embedding_time = (time.time() - embed_start) / len(pending)
+        logger.info(f"Embedded {len(pending)} questions in {time.time() - embed_start:.2f}s")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateLimitGate()
+    write_lock = asyncio.Lock()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def answer_one(item):
+            record = {"id": item["id"], "question": item["question"]}
+            timings = {} if embedding_time is None else {"embedding": embedding_time}
+            try:
+                # Same retrieval as interactive questions; runs ahead of the LLM calls on the retrieval pool
+                retrieval_start = time.time()
+                inputs = await run_blocking(prepare_inputs, item["question"], pipeline.retriever,
+                                            pipeline.reranker)
+                timings["retrieval"] = time.time() - retrieval_start
+                async with semaphore:
+                    llm_start = time.time()
+                    answer, attempts = await generate_with_backoff(
+                        pipeline.generation_chain, inputs, gate, max_retries
+                    )
+                    timings["llm"] = time.time() - llm_start
+                record.update(answer=answer, language=inputs["language"], partition=inputs["partition"],
+                              attempts=attempts)
+                summary["answered"] += 1
+            except Exception as e:
+                logger.error(f"Question {item['id']} failed: {e}")
+                record["error"] = str(e)
+                summary["failed"] += 1
+            timings["total"] = sum(timings.values())
+            record["timings"] = timings
+            async with write_lock:
+                # Flushed per record: the output file is the resume checkpoint
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+        # Queued behind interactive questions when the LLM is rate limited (see src/llm_scheduler.py)
+        with llm_admission("batch"):
+            await asyncio.gather(*(answer_one(item) for item in pending))
+
+    summary["elapsed"] = time.time() - start_time
+    logger.info(f"Batch finished: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Answer a file of questions in batch")
+    parser.add_argument("input", type=Path, help="Questions as .jsonl or .csv")
+    parser.add_argument("-o", "--output", type=Path, default=Path("answers.jsonl"),
+                        help="JSONL output; rerunning resumes from it")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="Maximum concurrent LLM calls")
+    parser.add_argument("--max-retries", type=int, default=BATCH_MAX_RETRIES,
+                        help="Retries per question on rate-limit (429) responses")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_batch(load_questions(args.input), args.output, args.concurrency, args.max_retries))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,143 @@
+"""
+Context packing for CloudWalk Helper.
+Turns retrieved chunks into the prompt context without redundant tokens:
+overlapping or adjacent chunks of the same file are merged back into one
+passage, near-duplicates are dropped by word-shingle overlap, and passages
+are added in relevance order until the token budget is spent.
+"""
+
+import os
+import math
+import logging
+
+logger = logging.getLogger("CloudWalkHelper.ContextPacker")
+
+# Configuration
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() == "true"
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "8192"))  # Tokens the model accepts
+LLM_RESERVED_TOKENS = int(os.getenv("LLM_RESERVED_TOKENS", "2048"))  # System prompt, question and answer
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # Tokens of retrieved context
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))  # Jaccard similarity of shingles
+SHINGLE_SIZE = 3  # Words per shingle
+CHARS_PER_TOKEN = 4.0  # Rough average for English/Portuguese with Llama-style tokenizers
+ADJACENT_GAP = 8  # Characters between chunks (stripped whitespace) still treated as adjacent
+SEPARATOR = "\n\n---\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count; no tokenizer download needed."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_token_budget() -> int:
+    """Context tokens per request: the configured budget, capped by what fits the model's window."""
+    return max(0, min(CONTEXT_TOKEN_BUDGET, LLM_CONTEXT_WINDOW - LLM_RESERVED_TOKENS))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> frozenset:
+    """Set of `size`-word sequences in the text (case-folded); the text itself when it is shorter."""
+    words = text.lower().split()
+    if len(words) <= size:
+        return frozenset([" ".join(words)])
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def drop_near_duplicates(docs, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> list:
+    """
+    Keep docs in order, skipping any whose shingles overlap one already kept
+    by at least `threshold` (Jaccard similarity). Pure text comparison, so
+    packing never calls the embedding model.
+    """
+    kept = []
+    for doc in docs:
+        doc_shingles = shingles(doc.page_content)
+        if any(len(doc_shingles & other) >= threshold * len(doc_shingles | other) for _, other in kept):
+            continue
+        kept.append((doc, doc_shingles))
+    return [doc for doc, _ in kept]
+
+
+def merge_passages(docs) -> list:
+    """
+    Merge chunks of the same source that overlap or touch, using the
+    `start_index` recorded by split_documents.
+
+    Returns:
+        List of (rank, text) passages, where rank is the best (lowest)
+        retrieval rank among the merged chunks
+    """
+    by_source = {}
+    passages = []
+    for rank, doc in enumerate(docs):
+        start = doc.metadata.get("start_index")
+        source = doc.metadata.get("source")
+        if start is None or source is None:
+            passages.append((rank, doc.page_content))
+        else:
+            by_source.setdefault(source, []).append((start, rank, doc.page_content))
+
+    for spans in by_source.values():
+        spans.sort()
+        start, rank, text = spans[0]
+        end = start + len(text)  # Offset in the source, not len(text): stripped gaps aren't in the text
+        for next_start, next_rank, next_text in spans[1:]:
+            if next_start > end + ADJACENT_GAP:
+                passages.append((rank, text))
+                rank, text, end = next_rank, next_text, next_start + len(next_text)
+                continue
+            if next_start + len(next_text) > end:
+                overlap = end - next_start
+                text = text + next_text[overlap:] if overlap >= 0 else text + "\n" + next_text
+                end = next_start + len(next_text)
+            rank = min(rank, next_rank)
+        passages.append((rank, text))
+
+    passages.sort(key=lambda passage: passage[0])
+    return passages
+
+
+def pack_context(docs, budget: int = None) -> tuple:
+    """
+    Build the prompt context from retrieved docs (best first).
+
+    Args:
+        docs: Retrieved documents in relevance order
+        budget: Token budget, defaults to context_token_budget()
+
+    Returns:
+        (context text, stats dict with chunk counts and estimated tokens before/after)
+    """
+    budget = context_token_budget() if budget is None else budget
+    unique = drop_near_duplicates(docs)
+    passages = merge_passages(unique)
+
+    selected = []
+    used = 0
+    for _, text in passages:
+        cost = estimate_tokens(text) + (estimate_tokens(SEPARATOR) if selected else 0)
+        if used + cost > budget:
+            if selected:
+                continue  # A smaller, less relevant passage may still fit
+            # Never drop the most relevant passage entirely
+            text = text[:int(budget * CHARS_PER_TOKEN)]
+            cost = estimate_tokens(text)
+        selected.append(text)
+        used += cost
+
+    context = SEPARATOR.join(selected)
+    stats = {
+        "chunks": len(docs),
+        "duplicates": len(docs) - len(unique),
+        "passages": len(passages),
+        "passages_used": len(selected),
+        "tokens_before": estimate_tokens(SEPARATOR.join(doc.page_content for doc in docs)),
+        "tokens_after": estimate_tokens(context),
+        "budget": budget,
+    }
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    logger.info(
+        f"Packed {stats['chunks']} chunks into {stats['passages_used']} passages "
+        f"({stats['duplicates']} duplicates): ~{stats['tokens_after']} tokens, "
+        f"~{stats['tokens_saved']} saved (budget {budget})"
+    )
+    return context, stats
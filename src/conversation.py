@@ -0,0 +1,256 @@
+"""
+Bounded conversation memory for CloudWalk Helper.
+Keeps the last few turns verbatim and folds older turns into a rolling
+summary with a hard token cap, so the history sent with each question stays
+the same size however long a session runs. Follow-up questions are
+condensed into standalone queries for retrieval and the answer cache.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from .context_packer import CHARS_PER_TOKEN, estimate_tokens
+from .tracing import span
+
+logger = logging.getLogger("CloudWalkHelper.Conversation")
+
+# Configuration
+MEMORY_TURNS = int(os.getenv("MEMORY_TURNS", "3"))  # Most recent turns kept verbatim
+MEMORY_TURN_TOKENS = int(os.getenv("MEMORY_TURN_TOKENS", "300"))  # Cap per verbatim question or answer
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "250"))  # Cap for the summary of older turns
+CONDENSE_QUESTIONS = os.getenv("CONDENSE_QUESTIONS", "true").lower() == "true"
+MEMORY_SUMMARY_CACHE_SIZE = int(os.getenv("MEMORY_SUMMARY_CACHE_SIZE", "256"))  # Histories whose summary is kept
+
+CONDENSE_PROMPT = """Given the conversation so far and a follow-up question, rewrite the follow-up as a single standalone question that can be understood without the conversation.
+Resolve pronouns and references ("it", "that card machine", "and the fees?") to what they refer to.
+Keep the language of the follow-up question. If it is already standalone, return it unchanged.
+Reply with the question only."""
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and CloudWalk Helper, an assistant about CloudWalk, InfinitePay, JIM and Stratus.
+Update the summary with the new turns. Keep the products, facts and user intentions that later questions may refer to; drop greetings and repetition.
+Reply with the updated summary only, in at most {max_words} words."""
+
+
+def truncate_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Cut `text` to about `max_tokens` tokens at a word boundary, keeping its head or its tail."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, int(max_tokens * CHARS_PER_TOKEN) - 1)
+    if keep == "tail":
+        cut = text[len(text) - limit:]
+        return "…" + cut[cut.find(" ") + 1:] if " " in cut else "…" + cut
+    cut = text[:limit]
+    return (cut[:cut.rfind(" ")] if " " in cut else cut) + "…"
+
+
+def _format_turns(turns) -> str:
+    return "\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+
+
+@dataclass
+class ConversationMemory:
+    """
+    History of one conversation: a rolling summary plus the last `max_turns` turns.
+
+    Turns are (question, answer) pairs. When a new turn pushes one out of the
+    verbatim window it is folded into the summary with one LLM call; without
+    an LLM (or if the call fails) the evicted text is appended to the summary
+    instead. Either way the summary is cut to `summary_tokens`, so
+    messages() never exceeds summary_tokens + 2 * max_turns * turn_tokens.
+    """
+    max_turns: int = MEMORY_TURNS
+    turn_tokens: int = MEMORY_TURN_TOKENS
+    summary_tokens: int = MEMORY_SUMMARY_TOKENS
+    summary: str = ""
+    turns: list = field(default_factory=list)
+    summarized_turns: int = 0
+
+    @classmethod
+    def from_messages(cls, messages, llm=None, summary_cache=None, **kwargs) -> "ConversationMemory":
+        """
+        Build a memory from a chat history: LangChain messages or dicts with
+        'role' ('user'/'assistant') and 'content', such as Streamlit's
+        session messages. Older turns are folded in a single call.
+
+        With a SummaryCache, the summary of the longest already-folded prefix
+        of the older turns is reused and only the turns after it are folded,
+        so a caller resending its history each question pays for one fold
+        per new turn instead of re-summarizing the whole history.
+        """
+        memory = cls(**kwargs)
+        turns, question = [], None
+        for message in messages or []:
+            if isinstance(message, dict):
+                role, content = message.get("role"), message.get("content", "")
+            else:
+                role, content = message.type, message.content
+            if role in ("user", "human"):
+                question = content
+            elif role in ("assistant", "ai") and question is not None:
+                turns.append((question, content))
+                question = None
+        evicted = turns[:max(0, len(turns) - memory.max_turns)]
+        if summary_cache is not None and evicted:
+            folded, summary = summary_cache.lookup(evicted, memory)
+            memory.summary, memory.summarized_turns = summary, folded
+            turns = turns[folded:]
+        memory.extend(turns, llm)
+        if summary_cache is not None and evicted:
+            summary_cache.store(evicted, memory)
+        return memory
+
+    def __len__(self) -> int:
+        return self.summarized_turns + len(self.turns)
+
+    def add_turn(self, question: str, answer: str, llm=None):
+        """Record a finished turn, folding the oldest verbatim turn into the summary if the window is full."""
+        self.extend([(question, answer)], llm)
+
+    def extend(self, turns, llm=None):
+        """Record several finished turns; everything pushed out of the window is folded in one call."""
+        self.turns.extend((truncate_tokens(q, self.turn_tokens), truncate_tokens(a, self.turn_tokens))
+                          for q, a in turns)
+        overflow = len(self.turns) - self.max_turns
+        if overflow > 0:
+            evicted, self.turns = self.turns[:overflow], self.turns[overflow:]
+            self._fold(evicted, llm)
+
+    def _fold(self, turns, llm):
+        with span("memory_summary", turns=len(turns)) as summary_span:
+            summary = None
+            if llm is not None:
+                try:
+                    summary = summarize(llm, self.summary, turns, self.summary_tokens)
+                except Exception as e:
+                    logger.warning(f"Conversation summary failed, keeping the raw turns: {e}")
+            if not summary:
+                # Extractive fallback: the most recent text is the most likely to be referred to
+                summary = "\n".join(part for part in (self.summary, _format_turns(turns)) if part)
+                summary = truncate_tokens(summary, self.summary_tokens, keep="tail")
+            self.summary = truncate_tokens(summary, self.summary_tokens)
+            self.summarized_turns += len(turns)
+            summary_span.set(summary_tokens=estimate_tokens(self.summary))
+
+    def messages(self) -> list:
+        """Chat history for the prompt's chat_history placeholder."""
+        messages = []
+        if self.summary:
+            messages.append(SystemMessage(f"Summary of the earlier conversation:\n{self.summary}"))
+        for question, answer in self.turns:
+            messages.extend([HumanMessage(question), AIMessage(answer)])
+        return messages
+
+    def token_count(self) -> int:
+        """Approximate tokens messages() adds to the prompt."""
+        return sum(estimate_tokens(message.content) for message in self.messages())
+
+    def clear(self):
+        self.summary, self.turns, self.summarized_turns = "", [], 0
+
+
+class SummaryCache:
+    """
+    Summaries of the older part of chat histories, keyed by a hash of those
+    turns and the memory's caps (bounded, least recently used out first).
+    """
+
+    def __init__(self, max_entries: int = MEMORY_SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(turns, memory: ConversationMemory) -> list:
+        """One key per prefix of `turns`: keys[i] covers turns[:i + 1]."""
+        digest = hashlib.sha256(f"{memory.turn_tokens}\0{memory.summary_tokens}".encode("utf-8"))
+        keys = []
+        for question, answer in turns:
+            digest.update(f"\0{question}\0{answer}".encode("utf-8"))
+            keys.append(digest.copy().hexdigest())
+        return keys
+
+    def lookup(self, turns, memory: ConversationMemory) -> tuple:
+        """
+        Returns:
+            (number of leading turns the summary covers, summary), (0, "") on a miss
+        """
+        keys = self._keys(turns, memory)
+        with self._lock:
+            for count in range(len(keys), 0, -1):
+                summary = self._entries.get(keys[count - 1])
+                if summary is not None:
+                    self._entries.move_to_end(keys[count - 1])
+                    return count, summary
+        return 0, ""
+
+    def store(self, turns, memory: ConversationMemory):
+        """Remember memory.summary as the summary of `turns`."""
+        key = self._keys(turns, memory)[-1]
+        with self._lock:
+            self._entries[key] = memory.summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Get the process-wide summary cache used for stateless chat histories."""
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache()
+        return _summary_cache
+
+
+def summarize(llm, summary: str, turns, max_tokens: int = MEMORY_SUMMARY_TOKENS) -> str:
+    """Ask the LLM to fold `turns` into the existing `summary`."""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", SUMMARY_PROMPT),
+        ("human", "Current summary:\n{summary}\n\nNew turns:\n{turns}"),
+    ])
+    chain = prompt | llm | StrOutputParser()
+    # Words run a little over one token each; leave headroom so the hard cut rarely applies
+    return chain.invoke({
+        "summary": summary or "(empty)",
+        "turns": _format_turns(turns),
+        "max_words": max(20, int(max_tokens * 0.6)),
+    }).strip()
+
+
+def condense_question(question: str, memory: ConversationMemory, llm) -> str:
+    """
+    Rewrite a follow-up question as a standalone query using the conversation.
+
+    The first question of a conversation is returned as is (no LLM call), as
+    is every question when CONDENSE_QUESTIONS=false or the call fails.
+    """
+    if not CONDENSE_QUESTIONS or memory is None or not len(memory):
+        return question
+    with span("condense_question", history_tokens=memory.token_count()) as condense_span:
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", CONDENSE_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "Follow-up question: {question}"),
+        ])
+        try:
+            chain = prompt | llm | StrOutputParser()
+            standalone = chain.invoke({"chat_history": memory.messages(), "question": question}).strip()
+        except Exception as e:
+            logger.warning(f"Question condensing failed, retrieving with the raw question: {e}")
+            return question
+        standalone = standalone.strip('"').strip() or question
+        condense_span.set(changed=standalone != question)
+    logger.info(f"Condensed follow-up '{question[:50]}' -> '{standalone[:80]}'")
+    return standalone
@@ -0,0 +1,329 @@
+"""
+Persistent embedding cache for CloudWalk Helper.
+Stores vectors content-addressed by (model, normalization, text hash) so
+rebuilds and chunking experiments only encode text they have never seen.
+
+Layout per model: `vectors-<generation>.f32` (rows of float32, memory-mapped
+for reads) and `index.sqlite` (text hash -> row, last use). Rows of evicted
+entries stay in the vectors file until `compact()` writes the next generation.
+"""
+
+import os
+import re
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+from .tracing import span
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.EmbeddingCache")
+
+# Configuration
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = Path(os.getenv(
+    "EMBEDDING_CACHE_DIR", str(Path(__file__).parent.parent / "embedding_cache")
+))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+
+_SQLITE_MAX_PARAMS = 900
+
+
+class EmbeddingCache:
+    """
+    On-disk vector cache for one (model, normalization) pair.
+
+    Safe to share between threads and processes: writers serialize on the
+    SQLite write lock, and readers look up rows and the vectors file's
+    generation in one read transaction, re-mapping the file when it grows
+    or is compacted.
+    """
+
+    def __init__(self, model_name: str, normalize: bool, cache_dir: Path = None,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.model_name = model_name
+        self.normalize = normalize
+        self.max_entries = max_entries
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+        self.path = (cache_dir or EMBEDDING_CACHE_DIR) / f"{slug}-{'normalized' if normalize else 'raw'}"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / "index.sqlite"), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+        self._db.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('rows', 0), ('dim', NULL), ('generation', 0), ('model', ?)",
+            (model_name,)
+        )
+        self._vectors_file(self._meta("generation")).touch(exist_ok=True)
+        self._mmap = None
+        self._mmap_rows = 0
+        self._mmap_generation = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, kind: str = "document") -> str:
+        """Content address of a text; queries and documents may embed differently."""
+        return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Look up vectors by key; returns a list with None for every miss."""
+        if not keys:
+            return []
+        with self._lock:
+            for attempt in range(3):
+                # One snapshot for the rows and the generation: a compaction in another
+                # process renumbers rows and switches files in a single commit
+                self._db.execute("BEGIN")
+                try:
+                    rows = self._rows(keys)
+                    vectors = self._vectors(max(rows.values()) + 1) if rows else None
+                    result = [np.array(vectors[rows[key]]) if key in rows else None for key in keys]
+                    break
+                except FileNotFoundError:
+                    # That compaction already removed our snapshot's file; read the new generation
+                    self._mmap = None
+                    if attempt == 2:
+                        raise
+                finally:
+                    self._db.execute("COMMIT")
+            if not rows:
+                self.misses += len(keys)
+                return result
+            self._touch(list(rows))
+            hits = sum(1 for key in keys if key in rows)
+            self.hits += hits
+            self.misses += len(keys) - hits
+            return result
+
+    def put_many(self, keys, vectors):
+        """Append vectors for new keys and evict least recently used entries over the cap."""
+        if not keys:
+            return
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows, dim = self._meta("rows"), self._meta("dim")
+                path = self._vectors_file(self._meta("generation"))
+                if dim is None:
+                    dim = matrix.shape[1]
+                    self._set_meta("dim", dim)
+                elif dim != matrix.shape[1]:
+                    raise ValueError(f"Cached vectors have {dim} dims, got {matrix.shape[1]}")
+                with open(path, "r+b") as f:
+                    # Drop rows a crashed writer appended but never committed
+                    f.truncate(rows * dim * 4)
+                    f.seek(0, os.SEEK_END)
+                    f.write(matrix.tobytes())
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                    [(key, rows + i, now) for i, key in enumerate(keys)]
+                )
+                self._set_meta("rows", rows + len(keys))
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            needs_compaction = rows + len(keys) > 2 * self.max_entries
+        if needs_compaction:
+            self.compact()
+
+    def compact(self) -> dict:
+        """Evict entries over the size cap, then rewrite the vectors file keeping only live ones."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._evict()
+                rows, dim = self._meta("rows"), self._meta("dim")
+                generation = self._meta("generation")
+                live = self._db.execute("SELECT key, row FROM entries ORDER BY row").fetchall()
+                # The new generation only becomes visible when the index commits
+                new_path = self._vectors_file(generation + 1)
+                if dim is not None and rows:
+                    old = np.memmap(self._vectors_file(generation), dtype=np.float32, mode="r", shape=(rows, dim))
+                    old[[row for _, row in live]].tofile(new_path)
+                    del old
+                else:
+                    new_path.touch()
+                self._db.executemany("UPDATE entries SET row = ? WHERE key = ?",
+                                     [(i, key) for i, (key, _) in enumerate(live)])
+                self._set_meta("rows", len(live))
+                self._set_meta("generation", generation + 1)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._mmap = None
+            self._remove_old_generations(generation + 1)
+        logger.info(f"Compacted embedding cache: {rows} rows -> {len(live)} live entries")
+        return {"rows_before": rows, "rows_after": len(live)}
+
+    def clear(self):
+        """Remove every cached vector."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            generation = self._meta("generation") + 1
+            self._vectors_file(generation).touch()
+            self._db.execute("DELETE FROM entries")
+            self._set_meta("rows", 0)
+            self._set_meta("generation", generation)
+            self._db.execute("COMMIT")
+            self._mmap = None
+            self._remove_old_generations(generation)
+
+    def stats(self) -> dict:
+        """Entry counts, file size and hit/miss counters."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "model": self.model_name,
+                "normalize": self.normalize,
+                "entries": entries,
+                "rows": self._meta("rows"),
+                "max_entries": self.max_entries,
+                "file_bytes": self._vectors_file(self._meta("generation")).stat().st_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _rows(self, keys) -> dict:
+        rows = {}
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            batch = keys[start:start + _SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(self._db.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return rows
+
+    def _vectors(self, min_rows: int):
+        """Memory-map the vectors file, re-mapping after appends or compaction."""
+        generation = self._meta("generation")
+        if self._mmap is None or self._mmap_rows < min_rows or self._mmap_generation != generation:
+            rows, dim = self._meta("rows"), self._meta("dim")
+            self._mmap = np.memmap(self._vectors_file(generation), dtype=np.float32, mode="r", shape=(rows, dim))
+            self._mmap_rows = rows
+            self._mmap_generation = generation
+        return self._mmap
+
+    def _vectors_file(self, generation) -> Path:
+        return self.path / f"vectors-{generation}.f32"
+
+    def _remove_old_generations(self, current):
+        # Other processes may still have the old file mapped; unlinking is safe on POSIX
+        for path in self.path.glob("vectors-*.f32"):
+            if path != self._vectors_file(current):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _touch(self, keys):
+        now = time.time()
+        self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in keys])
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Evict down to 90% so the cap isn't hit again on the very next insert
+        excess = count - int(self.max_entries * 0.9)
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        logger.info(f"Evicted {excess} least recently used embeddings")
+
+    def _meta(self, name):
+        return self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()[0]
+
+    def _set_meta(self, name, value):
+        self._db.execute("UPDATE meta SET value = ? WHERE name = ?", (value, name))
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves vectors from an EmbeddingCache and encodes only misses."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        with span("embedding", texts=len(texts)) as embed_span:
+            vectors, encoded = self._embed_documents(texts)
+            embed_span.set(encoded=encoded)
+        return vectors
+
+    def embed_queries(self, texts):
+        """
+        Embed many queries in one model call and cache them as queries, so
+        the embed_query() calls retrieval makes for them are cache hits. The
+        models used here encode a query exactly like a one-text document.
+        """
+        with span("embedding", texts=len(texts)) as embed_span:
+            vectors, encoded = self._embed_documents(texts, kind="query")
+            embed_span.set(encoded=encoded)
+        return vectors
+
+    def _embed_documents(self, texts, kind: str = "document"):
+        keys = [EmbeddingCache.make_key(text, kind) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        if missing:
+            encoded = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing), encoded)
+            by_key = dict(zip(missing, encoded))
+            vectors = [by_key[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        logger.debug(f"Embedded {len(texts)} texts ({len(missing)} encoded, {len(texts) - len(missing)} cached)")
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors], len(missing)
+
+    def embed_query(self, text):
+        with span("embedding", texts=1) as embed_span:
+            key = EmbeddingCache.make_key(text, "query")
+            vector = self.cache.get_many([key])[0]
+            embed_span.set(encoded=int(vector is None))
+            if vector is None:
+                vector = self.embeddings.embed_query(text)
+                self.cache.put_many([key], [vector])
+            return np.asarray(vector, dtype=np.float32).tolist()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from .embeddings import embedding_id
+
+    parser = argparse.ArgumentParser(description="Manage the on-disk embedding cache")
+    parser.add_argument("command", choices=["stats", "compact", "clear"])
+    parser.add_argument("--model", default=embedding_id())
+    parser.add_argument("--raw", action="store_true", help="Use the non-normalized cache")
+    parser.add_argument("--max-entries", type=int, default=EMBEDDING_CACHE_MAX_ENTRIES,
+                        help="Evict least recently used entries down to this cap before compacting")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.model, normalize=not args.raw, max_entries=args.max_entries)
+    if args.command == "compact":
+        cache.compact()
+    elif args.command == "clear":
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
@@ -1,16 +1,16 @@
 """
 Embeddings module for CloudWalk Helper.
 Handles document loading, chunking, and vector database operations.
+
+Run with: python -m src.embeddings
 """
 
 import os
+import hashlib
 import logging
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
 # Load environment variables
 load_dotenv()
@@ -26,100 +26,200 @@ logger = logging.getLogger("CloudWalkHelper.Embeddings")
 # Configuration
 DATA_DIR = Path(__file__).parent.parent / "data"
 CHROMA_DB_DIR = Path(__file__).parent.parent / "chroma_db"
+NUMPY_INDEX_DIR = Path(__file__).parent.parent / "numpy_index"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # 'chroma' or 'numpy'
 COLLECTION_NAME = "cloudwalk_knowledge"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # 'torch' or 'onnx' (int8, see src/onnx_embeddings.py)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+_kb_hash_lock = threading.Lock()
+_kb_hash_state = {"signature": None, "hash": None}
+
+
+def knowledge_base_hash() -> str:
+    """
+    Content hash of the markdown files in the data directory.
+    
+    Cheap to call per question: files are only re-read when their
+    size or modification time changed since the last call.
+    """
+    paths = sorted(DATA_DIR.glob("**/*.md"))
+    signature = tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in paths)
+    with _kb_hash_lock:
+        if signature == _kb_hash_state["signature"]:
+            return _kb_hash_state["hash"]
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.relative_to(DATA_DIR).as_posix().encode("utf-8"))
+            digest.update(path.read_bytes())
+        _kb_hash_state["signature"] = signature
+        _kb_hash_state["hash"] = digest.hexdigest()
+        return _kb_hash_state["hash"]
+
+
+def embedding_id() -> str:
+    """Identity of the vectors get_embeddings() produces, for caches and index manifests."""
+    if EMBEDDING_BACKEND == "onnx":
+        from .onnx_embeddings import EMBEDDING_ONNX_FILE
+        return f"{EMBEDDING_MODEL}#{EMBEDDING_ONNX_FILE}"
+    return EMBEDDING_MODEL
 
 
 def get_embeddings():
-    """Get HuggingFace embeddings model (lightweight, runs locally)."""
-    logger.info(f"Loading embeddings model: {EMBEDDING_MODEL}")
-    return HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
+    """
+    Get the embeddings model (lightweight, runs locally).
+    
+    PyTorch by default; EMBEDDING_BACKEND=onnx runs the quantized ONNX
+    export of the same model instead. Unless EMBEDDING_CACHE_ENABLED=false,
+    the model is wrapped in the persistent embedding cache so previously
+    seen texts are not re-encoded. With EMBEDDING_SIDECAR_SOCKET set, the
+    model lives in the shared sidecar process instead (see src/sidecar.py).
+    """
+    from .embedding_cache import EMBEDDING_CACHE_ENABLED, EmbeddingCache, CachedEmbeddings
+    from . import sidecar
+    
+    if sidecar.EMBEDDING_SIDECAR_SOCKET:
+        return sidecar.SidecarEmbeddings(sidecar.get_sidecar_client())
+    logger.info(f"Loading embeddings model: {EMBEDDING_MODEL} ({EMBEDDING_BACKEND})")
+    if EMBEDDING_BACKEND == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+        embeddings = OnnxEmbeddings(EMBEDDING_MODEL)
+    else:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    if not EMBEDDING_CACHE_ENABLED:
+        return embeddings
+    return CachedEmbeddings(embeddings, EmbeddingCache(embedding_id(), normalize=True))
 
 
 def load_documents():
-    """Load all markdown documents from the data directory."""
+    """Load all markdown documents from the data directory, tagged with their language."""
+    from langchain_community.document_loaders import DirectoryLoader, TextLoader
+    from .language import tag_language
+    
     loader = DirectoryLoader(
         str(DATA_DIR),
         glob="**/*.md",
         loader_cls=TextLoader,
         loader_kwargs={"encoding": "utf-8"}
     )
-    documents = loader.load()
+    documents = tag_language(loader.load())
     logger.info(f"Loaded {len(documents)} documents from {DATA_DIR}")
     return documents
 
 
-def split_documents(documents, chunk_size=1000, chunk_overlap=200):
-    """Split documents into smaller chunks for better retrieval."""
+def split_documents(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Split documents into smaller chunks for better retrieval.
+    
+    Each chunk keeps its document's language and records its `start_index`
+    in the document, so the context packer can merge overlapping chunks.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from .language import tag_language
+    
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         length_function=len,
+        add_start_index=True,
         separators=["\n---\n", "\n## ", "\n### ", "\n\n", "\n", " ", ""]
     )
-    chunks = text_splitter.split_documents(documents)
+    chunks = text_splitter.split_documents(tag_language(documents))
     logger.info(f"Split into {len(chunks)} chunks (chunk_size={chunk_size}, overlap={chunk_overlap})")
     return chunks
 
 
 def create_vector_store(chunks, embeddings=None):
-    """Create or update ChromaDB vector store with document chunks."""
+    """
+    Create or update ChromaDB vector store with document chunks.
+    
+    `chunks` may be any iterable (e.g. a generator); it is embedded and
+    written in batches of INGEST_BATCH_SIZE, never held in memory at once.
+    """
+    import uuid
+    from .indexer import INGEST_BATCH_SIZE, embed_and_upsert, iter_batches
+    
     if embeddings is None:
         embeddings = get_embeddings()
     
-    # Ensure directory exists
-    CHROMA_DB_DIR.mkdir(parents=True, exist_ok=True)
+    vector_store = open_chroma(embeddings)
+    ids_and_docs = ((chunk.metadata.get("chunk_id") or str(uuid.uuid4()), chunk) for chunk in chunks)
+    batches = embed_and_upsert(vector_store, iter_batches(ids_and_docs, INGEST_BATCH_SIZE))
+    logger.info(f"Created vector store at {CHROMA_DB_DIR} ({batches} batches)")
+    return vector_store
+
+
+def vector_store_dir() -> Path:
+    """Directory of the configured vector backend (holds the index manifest too)."""
+    return NUMPY_INDEX_DIR if VECTOR_BACKEND == "numpy" else CHROMA_DB_DIR
+
+
+def open_vector_store(embeddings=None):
+    """Open the configured vector backend without touching its contents."""
+    if embeddings is None:
+        embeddings = get_embeddings()
+    
+    if VECTOR_BACKEND == "numpy":
+        from .vector_index import NumpyVectorStore
+        return NumpyVectorStore(embeddings, persist_directory=NUMPY_INDEX_DIR)
     
-    # Create vector store
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
+    return open_chroma(embeddings)
+
+
+def open_chroma(embeddings):
+    """Open (creating if needed) the persistent ChromaDB collection."""
+    from langchain_chroma import Chroma
+    
+    CHROMA_DB_DIR.mkdir(parents=True, exist_ok=True)
+    return Chroma(
         collection_name=COLLECTION_NAME,
+        embedding_function=embeddings,
         persist_directory=str(CHROMA_DB_DIR)
     )
-    logger.info(f"Created vector store with {len(chunks)} documents at {CHROMA_DB_DIR}")
-    return vector_store
 
 
 def get_vector_store(embeddings=None):
-    """Get existing ChromaDB vector store or create new one."""
-    if embeddings is None:
-        embeddings = get_embeddings()
+    """
+    Get the vector store, synced with the data directory.
     
-    # Check if vector store exists
-    if CHROMA_DB_DIR.exists() and any(CHROMA_DB_DIR.iterdir()):
-        logger.info("Loading existing vector store...")
-        vector_store = Chroma(
-            collection_name=COLLECTION_NAME,
-            embedding_function=embeddings,
-            persist_directory=str(CHROMA_DB_DIR)
-        )
-        return vector_store
-    else:
-        logger.info("Creating new vector store...")
-        documents = load_documents()
-        chunks = split_documents(documents)
-        return create_vector_store(chunks, embeddings)
+    Only chunks from files that changed since the last sync are embedded;
+    see src/indexer.py. A prebuilt snapshot of the current data/ (see
+    src/snapshot.py) is opened memory-mapped instead, with nothing to embed.
+    With EMBEDDING_SIDECAR_SOCKET set, this is a read-only view of the
+    sidecar's index.
+    """
+    from .indexer import sync_vector_store, MANIFEST_NAME
+    from .snapshot import open_current_snapshot
+    from . import sidecar
+    
+    if sidecar.EMBEDDING_SIDECAR_SOCKET:
+        return sidecar.SidecarVectorStore(sidecar.get_sidecar_client())
+    snapshot = open_current_snapshot(embeddings)
+    if snapshot is not None:
+        return snapshot
+    
+    logger.info(f"Loading vector store ({VECTOR_BACKEND})...")
+    vector_store = open_vector_store(embeddings)
+    sync_vector_store(vector_store, manifest_path=vector_store_dir() / MANIFEST_NAME, data_dir=DATA_DIR)
+    return vector_store
 
 
-def rebuild_vector_store():
+def rebuild_vector_store(embeddings=None):
     """Force rebuild of the vector store from documents."""
-    import shutil
-    
-    # Remove existing store
-    if CHROMA_DB_DIR.exists():
-        shutil.rmtree(CHROMA_DB_DIR)
-        logger.info("Removed existing vector store")
+    from .indexer import sync_vector_store, MANIFEST_NAME
     
-    # Rebuild
-    embeddings = get_embeddings()
-    documents = load_documents()
-    chunks = split_documents(documents)
-    return create_vector_store(chunks, embeddings)
+    # Reset and re-embed in place; removing chroma_db/ under an open client leaves it read-only
+    vector_store = open_vector_store(embeddings)
+    sync_vector_store(vector_store, manifest_path=vector_store_dir() / MANIFEST_NAME, data_dir=DATA_DIR, full=True)
+    return vector_store
 
 
 if __name__ == "__main__":
@@ -128,12 +228,8 @@ if __name__ == "__main__":
     print(f"Data directory: {DATA_DIR}")
     print(f"ChromaDB directory: {CHROMA_DB_DIR}")
     
-    # Load and process documents
-    docs = load_documents()
-    chunks = split_documents(docs)
-    
-    # Create vector store
-    vs = create_vector_store(chunks)
+    # Sync vector store with the documents
+    vs = get_vector_store()
     
     # Test retrieval
     results = vs.similarity_search("What is CloudWalk?", k=3)
@@ -0,0 +1,270 @@
+"""
+Hybrid retrieval for CloudWalk Helper.
+Combines a BM25 inverted index (exact product names, fees, numbers) with
+dense MiniLM retrieval (paraphrases), fused by reciprocal rank fusion.
+"""
+
+import json
+import math
+import contextvars
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .tracing import span
+
+logger = logging.getLogger("CloudWalkHelper.Hybrid")
+
+# Configuration
+BM25_FILE = "bm25_index.json"  # Kept next to the index manifest it was built from
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Rank offset in reciprocal rank fusion
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "in", "is", "it", "of", "on", "or",
+    "the", "to", "with", "o", "os", "de", "do", "da", "dos", "das", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "para", "por", "com", "que", "se", "ao", "aos",
+}
+
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip diacritics so 'crédito' matches 'credito'."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list:
+    """Accent-folded word and number tokens, without common EN/PT stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(fold_accents(text)) if token not in _STOPWORDS]
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a chunk across retrievers."""
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, with precomputed postings."""
+
+    def __init__(self, documents, fingerprint: str = None, k1: float = BM25_K1, b: float = BM25_B):
+        self.documents = list(documents)
+        self.fingerprint = fingerprint
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = []
+        self.postings = defaultdict(list)
+        for position, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((position, tf))
+        self._prepare()
+
+    def _prepare(self):
+        n = len(self.documents)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 8, filter: dict = None) -> list:
+        """Top-k (Document, score) pairs for the query terms."""
+        with span("bm25_search", k=k, filtered=bool(filter)):
+            return self._search(query, k, filter)
+
+    def _search(self, query: str, k: int, filter: dict) -> list:
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / self.avg_length)
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if filter:
+            scores = {
+                position: score for position, score in scores.items()
+                if all(self.documents[position].metadata.get(key) == value for key, value in filter.items())
+            }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[position], score) for position, score in ranked]
+
+    def save(self, path: Path):
+        """Persist postings and chunks so startup doesn't re-tokenize the corpus."""
+        data = {
+            "fingerprint": self.fingerprint,
+            "k1": self.k1,
+            "b": self.b,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+            "documents": [{"id": doc.id, "text": doc.page_content, "metadata": doc.metadata}
+                          for doc in self.documents],
+        }
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        index = cls.__new__(cls)
+        index.documents = [Document(id=d["id"], page_content=d["text"], metadata=d["metadata"])
+                           for d in data["documents"]]
+        index.fingerprint = data["fingerprint"]
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = defaultdict(list, {term: [tuple(p) for p in postings]
+                                            for term, postings in data["postings"].items()})
+        index._prepare()
+        return index
+
+
+def chunks_fingerprint(manifest: dict) -> str:
+    """Identity of the indexed chunk set and their offsets, from the incremental indexer's manifest."""
+    chunks = sorted((chunk_id, entry.get("offsets", {}).get(chunk_id))
+                    for entry in manifest["files"].values() for chunk_id in entry["chunks"])
+    payload = json.dumps({"config": manifest["config"], "chunks": chunks})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_or_build_bm25_index(manifest_path: Path, data_dir: Path = None,
+                             index_path: Path = None) -> BM25Index:
+    """
+    Load the persisted BM25 index if it matches the chunks in the vector
+    store's manifest; otherwise rebuild it from the same chunks and save it.
+
+    The index lives next to the manifest (in the vector store's directory)
+    unless `index_path` is given.
+    """
+    from .indexer import load_manifest, chunk_file
+    from .embeddings import DATA_DIR
+
+    data_dir = data_dir or DATA_DIR
+    index_path = index_path or manifest_path.parent / BM25_FILE
+    manifest = load_manifest(manifest_path)
+    fingerprint = chunks_fingerprint(manifest) if manifest else None
+    if fingerprint and index_path.exists():
+        try:
+            index = BM25Index.load(index_path)
+            if index.fingerprint == fingerprint:
+                logger.info(f"Loaded BM25 index ({len(index.documents)} chunks) from {index_path}")
+                return index
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"Ignoring unreadable BM25 index at {index_path}")
+
+    start_time = time.time()
+    documents = []
+    for path in sorted(data_dir.glob("**/*.md")):
+        for chunk_id, _, doc in chunk_file(path, path.relative_to(data_dir).as_posix()):
+            doc.id = chunk_id
+            documents.append(doc)
+    index = BM25Index(documents, fingerprint)
+    if fingerprint:
+        index.save(index_path)
+    logger.info(f"Built BM25 index over {len(documents)} chunks in {time.time() - start_time:.2f}s")
+    return index
+
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = RRF_K) -> list:
+    """Fuse ranked document lists: score = sum of 1 / (rrf_k + rank) over lists."""
+    scores = defaultdict(float)
+    docs = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in ranked]
+
+
+def _chroma_similarity(vector_store, distance: float) -> float:
+    """Cosine similarity from a Chroma distance; the embeddings are normalized."""
+    hnsw = (getattr(vector_store._collection, "configuration", None) or {}).get("hnsw") or {}
+    # Squared L2 between unit vectors is 2 - 2cos; cosine and inner product distances are 1 - cos
+    return 1.0 - distance / 2 if hnsw.get("space", "l2") == "l2" else 1.0 - distance
+
+
+def dense_search_by_vector(vector_store, vector, k: int, filter: dict = None) -> list:
+    """Top-k (Document, cosine similarity) pairs for an embedded query, from any backend."""
+    if not hasattr(vector_store, "_collection"):
+        return vector_store.similarity_search_with_score_by_vector(vector, k, filter=filter)
+    with span("vector_search", k=k, filtered=bool(filter)):
+        hits = vector_store.similarity_search_by_vector_with_relevance_scores(vector, k, filter=filter)
+    return [(doc, _chroma_similarity(vector_store, distance)) for doc, distance in hits]
+
+
+def dense_search(vector_store, query: str, k: int, filter: dict = None) -> list:
+    """
+    Top-k (Document, cosine similarity) pairs for the query, timed as a vector_search span.
+
+    The NumPy index and the sidecar record that span and score by cosine
+    similarity themselves; for Chroma the query is embedded first so the
+    span times the collection query only, and its distances are converted.
+    """
+    if not hasattr(vector_store, "_collection"):
+        return vector_store.similarity_search_with_score(query, k, filter=filter)
+    return dense_search_by_vector(vector_store, vector_store.embeddings.embed_query(query), k, filter)
+
+
+class DenseRetriever(BaseRetriever):
+    """Dense retrieval only (RETRIEVAL_MODE=dense)."""
+
+    vector_store: Any
+    k: int = 8
+
+    def scored_search(self, query: str, filter: dict = None) -> tuple:
+        """
+        Returns:
+            (documents, cosine similarity of the best match, 0.0 when there is none)
+        """
+        hits = dense_search(self.vector_store, query, self.k, filter)
+        return [doc for doc, _ in hits], max((score for _, score in hits), default=0.0)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+                                **kwargs) -> list:
+        return self.scored_search(query, kwargs.get("filter"))[0]
+
+
+class HybridRetriever(BaseRetriever):
+    """Runs dense and BM25 retrieval concurrently and fuses them with RRF."""
+
+    vector_store: Any
+    bm25: Any
+    k: int = 8
+    candidates: int = 16  # Fetched from each retriever before fusion
+
+    def scored_search(self, query: str, filter: dict = None) -> tuple:
+        """
+        Returns:
+            (fused documents, cosine similarity of the best dense match, 0.0 when there is none)
+        """
+        # Each search runs in a copy of the caller's context so its spans join the request trace
+        dense = _search_executor.submit(contextvars.copy_context().run, dense_search, self.vector_store,
+                                        query, self.candidates, filter)
+        sparse = _search_executor.submit(contextvars.copy_context().run, self.bm25.search,
+                                         query, self.candidates, filter)
+        dense_hits = dense.result()
+        sparse_docs = [doc for doc, _ in sparse.result()]
+        fused = reciprocal_rank_fusion([[doc for doc, _ in dense_hits], sparse_docs], self.k)
+        return fused, max((score for _, score in dense_hits), default=0.0)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+                                **kwargs) -> list:
+        return self.scored_search(query, kwargs.get("filter"))[0]
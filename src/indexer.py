@@ -0,0 +1,351 @@
+"""
+Incremental indexer for CloudWalk Helper.
+Keeps the vector store in sync with the data directory by embedding only
+new or changed chunks and deleting stale ones, tracked through a manifest
+of per-file and per-chunk content hashes.
+
+Ingestion streams: changed files are loaded and split across a process
+pool, and their chunks are embedded in fixed-size batches on a few threads
+and upserted batch by batch, so memory stays bounded by the batches in
+flight rather than growing with the corpus.
+
+Run with: python -m src.indexer [--full] [--batch-size 64] [--workers 4] [--embed-threads 2]
+"""
+
+import os
+import json
+import hashlib
+import logging
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+
+from .embeddings import (
+    DATA_DIR,
+    CHROMA_DB_DIR,
+    embedding_id,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    split_documents,
+)
+
+logger = logging.getLogger("CloudWalkHelper.Indexer")
+
+# Configuration
+MANIFEST_NAME = "index_manifest.json"
+MANIFEST_VERSION = 3  # 2: chunks carry 'language' metadata, 3: and 'start_index'
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))  # Processes splitting files
+INGEST_PROCESS_MIN_FILES = int(os.getenv("INGEST_PROCESS_MIN_FILES", "8"))  # Fewer changed files are split inline
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))  # Chunks per embedding/upsert batch
+INGEST_EMBED_THREADS = int(os.getenv("INGEST_EMBED_THREADS", "2"))  # Batches embedded concurrently
+
+
+@dataclass
+class IndexReport:
+    """What a sync changed in the vector store."""
+    files_added: list = field(default_factory=list)
+    files_changed: list = field(default_factory=list)
+    files_removed: list = field(default_factory=list)
+    files_unchanged: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    chunks_unchanged: int = 0
+    chunks_moved: int = 0  # Unchanged chunks whose offset in the file changed
+    full_rebuild: bool = False
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.chunks_added or self.chunks_removed or self.chunks_moved)
+
+    @property
+    def docs_per_sec(self) -> float:
+        """Added or changed files ingested per second."""
+        return (len(self.files_added) + len(self.files_changed)) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        """Chunks embedded and upserted per second."""
+        return self.chunks_added / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        text = (
+            f"{len(self.files_added)} files added, {len(self.files_changed)} changed, "
+            f"{len(self.files_removed)} removed, {self.files_unchanged} unchanged; "
+            f"chunks +{self.chunks_added} -{self.chunks_removed} ={self.chunks_unchanged} "
+            + (f"({self.chunks_moved} moved) " if self.chunks_moved else "")
+            + f"in {self.elapsed:.3f}s" + (" (full rebuild)" if self.full_rebuild else "")
+        )
+        if self.chunks_added:
+            text += (f"; {self.docs_per_sec:.1f} docs/s, {self.chunks_per_sec:.1f} chunks/s "
+                     f"in {self.batches} batches")
+        return text
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _index_config() -> dict:
+    """Settings that change every chunk or vector; a mismatch forces a full rebuild."""
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding_model": embedding_id(),
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+    }
+
+
+def load_manifest(manifest_path: Path):
+    """Read the index manifest, or None if it is missing or unreadable."""
+    try:
+        return json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(manifest_path: Path, manifest: dict):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(manifest_path)
+
+
+def chunk_file(path: Path, rel_path: str):
+    """
+    Load and split one file, assigning content-derived chunk IDs.
+
+    Returns:
+        List of (chunk_id, chunk_hash, document) tuples
+    """
+    from langchain_community.document_loaders import TextLoader
+
+    documents = TextLoader(str(path), encoding="utf-8").load()
+    chunks = split_documents(documents)
+
+    result = []
+    seen = {}
+    for chunk in chunks:
+        chunk_hash = _hash(chunk.page_content.encode("utf-8"))
+        # Identical text can repeat within a file; keep each occurrence distinct
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        chunk_id = f"{rel_path}::{chunk_hash[:16]}" + (f"#{occurrence}" if occurrence else "")
+        chunk.metadata["chunk_id"] = chunk_id
+        result.append((chunk_id, chunk_hash, chunk))
+    return result
+
+
+def _bounded_map(executor, func, items, window: int):
+    """executor.map() that keeps at most `window` tasks in flight and yields results in order."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, *item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_chunked_files(files, workers: int = INGEST_WORKERS):
+    """
+    Load and split (path, rel_path) files, yielding (rel_path, chunks) in order.
+
+    With at least INGEST_PROCESS_MIN_FILES files and more than one worker
+    the splitting runs on a process pool, a few files ahead of the consumer.
+    Workers are spawned, not forked: reindexing also runs on a background
+    thread of the app, and forking a threaded process can copy held locks.
+    """
+    files = list(files)
+    if workers <= 1 or len(files) < INGEST_PROCESS_MIN_FILES:
+        for path, rel_path in files:
+            yield rel_path, chunk_file(path, rel_path)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        chunked = _bounded_map(executor, chunk_file, files, window=2 * workers)
+        yield from zip((rel_path for _, rel_path in files), chunked)
+
+
+def iter_batches(items, size: int):
+    """Split an iterable into lists of `size` items (the last may be shorter)."""
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def upsert_vectors(vector_store, ids, docs, vectors):
+    """Insert or replace chunks whose vectors are already computed."""
+    texts = [doc.page_content for doc in docs]
+    metadatas = [doc.metadata for doc in docs]
+    if hasattr(vector_store, "add_vectors"):
+        vector_store.add_vectors(vectors, texts, metadatas, ids=ids)
+    elif hasattr(vector_store, "_collection"):
+        # Chroma: what add_texts() does after embedding
+        vector_store._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+    else:
+        vector_store.add_documents(docs, ids=ids)
+
+
+def update_metadata(vector_store, ids, docs):
+    """Rewrite the metadata of chunks already in the store without re-embedding them."""
+    metadatas = [doc.metadata for doc in docs]
+    if hasattr(vector_store, "update_metadata"):
+        vector_store.update_metadata(ids, metadatas)
+    elif hasattr(vector_store, "_collection"):
+        vector_store._collection.update(ids=ids, metadatas=metadatas)
+    else:
+        vector_store.add_documents(docs, ids=ids)
+
+
+def embed_and_upsert(vector_store, batches, threads: int = INGEST_EMBED_THREADS) -> int:
+    """
+    Embed batches of (chunk_id, document) on `threads` threads and upsert each as soon as it is ready.
+
+    Returns:
+        Number of batches written
+    """
+    embeddings = vector_store.embeddings
+
+    def embed(batch):
+        return batch, embeddings.embed_documents([doc.page_content for _, doc in batch])
+
+    count = 0
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="ingest") as executor:
+        for batch, vectors in _bounded_map(executor, embed, ((batch,) for batch in batches), window=2 * threads):
+            upsert_vectors(vector_store, [chunk_id for chunk_id, _ in batch], [doc for _, doc in batch], vectors)
+            count += 1
+    return count
+
+
+def sync_vector_store(vector_store, manifest_path: Path = None, data_dir: Path = None,
+                      full: bool = False, batch_size: int = INGEST_BATCH_SIZE, workers: int = INGEST_WORKERS,
+                      embed_threads: int = INGEST_EMBED_THREADS) -> IndexReport:
+    """
+    Bring the vector store in line with the markdown files in the data directory.
+
+    Unchanged files are skipped by file hash; changed files are re-split and
+    only chunks whose content hash is new get embedded and upserted, while
+    chunk IDs that disappeared are deleted. Chunks whose text is unchanged
+    but whose `start_index` moved (text was edited above them) get their
+    metadata rewritten, so passage merging never works from stale offsets.
+
+    Changed files are split on `workers` processes and new chunks are
+    embedded in batches of `batch_size` on `embed_threads` threads; each
+    batch is upserted as soon as it is embedded.
+
+    Args:
+        vector_store: Store supporting add_documents(ids=...), delete(ids=...)
+            and reset_collection()
+        manifest_path: Where the manifest lives (defaults to chroma_db/)
+        data_dir: Directory with the markdown knowledge base
+        full: Discard the current index and re-embed everything
+        batch_size: Chunks per embedding/upsert batch
+        workers: Processes loading and splitting files
+        embed_threads: Batches embedded concurrently
+
+    Returns:
+        IndexReport describing the changes
+    """
+    start_time = time.time()
+    manifest_path = manifest_path or CHROMA_DB_DIR / MANIFEST_NAME
+    data_dir = data_dir or DATA_DIR
+    report = IndexReport()
+
+    manifest = load_manifest(manifest_path)
+    config = _index_config()
+    if full or manifest is None or manifest.get("config") != config:
+        # Unknown contents (e.g. a store built before manifests existed) can't be diffed
+        logger.info("Re-indexing all documents (full rebuild, or manifest missing/outdated)")
+        # Invalidate the manifest first: if the rebuild dies part-way, the next sync starts over
+        manifest_path.unlink(missing_ok=True)
+        vector_store.reset_collection()
+        manifest = {"config": config, "files": {}}
+        report.full_rebuild = True
+
+    old_files = manifest["files"]
+    new_files = {}
+    to_chunk, to_delete, moved = [], [], []
+
+    for path in sorted(data_dir.glob("**/*.md")):
+        rel_path = path.relative_to(data_dir).as_posix()
+        file_hash = _hash(path.read_bytes())
+        previous = old_files.get(rel_path)
+        if previous is not None and previous["hash"] == file_hash:
+            new_files[rel_path] = previous
+            report.files_unchanged += 1
+            report.chunks_unchanged += len(previous["chunks"])
+            continue
+        to_chunk.append((path, rel_path, file_hash))
+
+    def new_chunks():
+        """(chunk_id, document) for every chunk not yet in the store, file by file."""
+        hashes = {rel_path: file_hash for _, rel_path, file_hash in to_chunk}
+        for rel_path, chunks in iter_chunked_files([(path, rel_path) for path, rel_path, _ in to_chunk], workers):
+            previous = old_files.get(rel_path)
+            old_chunks = previous["chunks"] if previous else {}
+            old_offsets = previous.get("offsets", {}) if previous else {}
+            for chunk_id, _, doc in chunks:
+                if chunk_id in old_chunks:
+                    report.chunks_unchanged += 1
+                    if old_offsets.get(chunk_id) != doc.metadata.get("start_index"):
+                        moved.append((chunk_id, doc))
+                else:
+                    report.chunks_added += 1
+                    yield chunk_id, doc
+            chunk_hashes = {chunk_id: chunk_hash for chunk_id, chunk_hash, _ in chunks}
+            to_delete.extend(chunk_id for chunk_id in old_chunks if chunk_id not in chunk_hashes)
+            offsets = {chunk_id: doc.metadata.get("start_index") for chunk_id, _, doc in chunks}
+            new_files[rel_path] = {"hash": hashes[rel_path], "chunks": chunk_hashes, "offsets": offsets}
+            (report.files_changed if previous else report.files_added).append(rel_path)
+
+    changed = {rel_path for _, rel_path, _ in to_chunk}
+    for rel_path, previous in old_files.items():
+        if rel_path not in new_files and rel_path not in changed:
+            to_delete.extend(previous["chunks"])
+            report.files_removed.append(rel_path)
+
+    # One write at the end instead of one per batch for stores that rewrite their files on change
+    deferred = getattr(vector_store, "deferred_persist", nullcontext)
+    with deferred():
+        report.batches = embed_and_upsert(vector_store, iter_batches(new_chunks(), batch_size), embed_threads)
+        if moved:
+            update_metadata(vector_store, [chunk_id for chunk_id, _ in moved], [doc for _, doc in moved])
+        if to_delete:
+            vector_store.delete(ids=to_delete)
+    report.chunks_removed = len(to_delete)
+    report.chunks_moved = len(moved)
+
+    if report.full_rebuild or new_files != old_files:
+        manifest["files"] = new_files
+        save_manifest(manifest_path, manifest)
+
+    report.elapsed = time.time() - start_time
+    logger.info(f"Index sync: {report.summary()}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from .embeddings import get_embeddings, open_vector_store
+
+    parser = argparse.ArgumentParser(description="Sync the vector store with data/")
+    parser.add_argument("--full", action="store_true", help="Re-embed every chunk")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding batch")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Processes splitting files")
+    parser.add_argument("--embed-threads", type=int, default=INGEST_EMBED_THREADS, help="Concurrent embedding batches")
+    args = parser.parse_args()
+
+    report = sync_vector_store(open_vector_store(get_embeddings()), full=args.full, batch_size=args.batch_size,
+                               workers=args.workers, embed_threads=args.embed_threads)
+    print(report.summary())
+    for label, files in (("added", report.files_added), ("changed", report.files_changed),
+                         ("removed", report.files_removed)):
+        for rel_path in files:
+            print(f"  {label}: {rel_path}")
@@ -0,0 +1,156 @@
+"""
+Language handling for CloudWalk Helper.
+Detects the language of questions and documents, tags chunks with it at
+ingestion time, and routes retrieval to the partition of the knowledge base
+written in the question's language.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger("CloudWalkHelper.Language")
+
+# Configuration
+LANGUAGE_ROUTING = os.getenv("LANGUAGE_ROUTING", "true").lower() == "true"
+LANGUAGE_ROUTING_MIN_SCORE = float(os.getenv("LANGUAGE_ROUTING_MIN_SCORE", "0.35"))  # Cosine similarity
+CROSS_LANGUAGE = "cross-language"  # Partition name for unfiltered searches
+
+# Filename suffixes that declare a document's language, e.g. cloudwalk_knowledge_pt.md
+_FILENAME_LANGUAGES = {"pt": "Portuguese", "en": "English"}
+_FILENAME_SUFFIX = re.compile(r"[_.-]([a-z]{2})$")
+
+
+def detect_language(text: str) -> str:
+    """Simple language detection based on common words."""
+    portuguese_words = ['o', 'a', 'que', 'de', 'do', 'da', 'é', 'em', 'para', 'com', 'não', 'uma', 'um', 'os', 'as', 'por', 'mais', 'qual', 'quais', 'como', 'isso', 'esse', 'essa', 'são', 'sobre', 'pode', 'fazer', 'seu', 'sua']
+    english_words = ['the', 'is', 'what', 'how', 'can', 'do', 'does', 'are', 'have', 'has', 'will', 'would', 'could', 'should', 'about', 'this', 'that', 'which', 'where', 'when', 'why', 'who', 'tell', 'me', 'explain', 'describe']
+
+    text_lower = text.lower()
+    words = text_lower.split()
+
+    pt_count = sum(1 for word in words if word in portuguese_words)
+    en_count = sum(1 for word in words if word in english_words)
+
+    result = "Portuguese" if pt_count > en_count else "English"
+    logger.debug(f"Language detected: {result} (PT words: {pt_count}, EN words: {en_count})")
+    return result
+
+
+def document_language(document) -> str:
+    """Language of a loaded document: from its filename suffix when it has one, else from its text."""
+    stem = os.path.splitext(os.path.basename(document.metadata.get("source", "")))[0].lower()
+    match = _FILENAME_SUFFIX.search(stem)
+    if match and match.group(1) in _FILENAME_LANGUAGES:
+        return _FILENAME_LANGUAGES[match.group(1)]
+    return detect_language(document.page_content)
+
+
+def tag_language(documents):
+    """Set metadata['language'] on documents that don't have it yet (chunks inherit it when split)."""
+    for document in documents:
+        if "language" not in document.metadata:
+            document.metadata["language"] = document_language(document)
+    return documents
+
+
+class PartitionStats:
+    """Per-partition counters: how often each is searched, context size and LLM latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {
+            "queries": 0, "fallbacks": 0, "chunks": 0, "context_chars": 0,
+            "retrieval_time": 0.0, "llm_calls": 0, "llm_time": 0.0,
+        })
+
+    def record_retrieval(self, partition: str, docs, elapsed: float, fallback: bool = False):
+        with self._lock:
+            stats = self._stats[partition]
+            stats["queries"] += 1
+            stats["fallbacks"] += int(fallback)
+            stats["chunks"] += len(docs)
+            stats["context_chars"] += sum(len(doc.page_content) for doc in docs)
+            stats["retrieval_time"] += elapsed
+
+    def record_llm(self, partition: str, elapsed: float):
+        with self._lock:
+            stats = self._stats[partition]
+            stats["llm_calls"] += 1
+            stats["llm_time"] += elapsed
+
+    def snapshot(self) -> dict:
+        """Totals and per-query averages for every partition seen so far."""
+        with self._lock:
+            result = {}
+            for partition, stats in self._stats.items():
+                queries = stats["queries"] or 1
+                llm_calls = stats["llm_calls"] or 1
+                result[partition] = dict(
+                    stats,
+                    avg_context_chars=stats["context_chars"] / queries,
+                    avg_retrieval_time=stats["retrieval_time"] / queries,
+                    avg_llm_time=stats["llm_time"] / llm_calls,
+                )
+            return result
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+partition_stats = PartitionStats()
+
+
+class LanguageRoutedRetriever(BaseRetriever):
+    """
+    Searches only the chunks written in the question's language.
+
+    When even the best of the top chunks in that partition is a weak match
+    (cosine similarity below `min_score`), the question is answered from a
+    cross-language search instead, e.g. for facts only documented in the
+    other language.
+    The inner retriever must provide scored_search(query, filter) returning
+    its documents and the best dense similarity (see src/hybrid.py), so the
+    decision reuses the search's own scores.
+    """
+
+    retriever: Any
+    min_score: float = LANGUAGE_ROUTING_MIN_SCORE
+    stats: Any = None
+
+    def route(self, query: str) -> tuple:
+        """
+        Returns:
+            (documents, partition searched: a language or CROSS_LANGUAGE)
+        """
+        stats = self.stats or partition_stats
+        start_time = time.time()
+        language = detect_language(query)
+        docs, score = self.retriever.scored_search(query, filter={"language": language})
+        if score >= self.min_score:
+            stats.record_retrieval(language, docs, time.time() - start_time)
+            return docs, language
+
+        logger.info(f"Best {language} chunk scored {score:.2f} < {self.min_score:.2f}, "
+                    f"searching every language")
+        docs, _ = self.retriever.scored_search(query)
+        stats.record_retrieval(CROSS_LANGUAGE, docs, time.time() - start_time, fallback=True)
+        return docs, CROSS_LANGUAGE
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun,
+                                **kwargs) -> list:
+        docs, _ = self.route(query)
+        return docs
+
+
+def get_partition_stats() -> dict:
+    """Retrieval and LLM statistics per language partition (see PartitionStats.snapshot)."""
+    return partition_stats.snapshot()
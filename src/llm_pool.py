@@ -0,0 +1,538 @@
+"""
+LLM provider pool for CloudWalk Helper.
+Keeps one long-lived chat client per configured provider (OpenRouter,
+Ollama) with HTTP keep-alive and explicit timeouts, tracks rolling time to
+first token and error rate per provider, and sends each request to the
+fastest healthy one. A provider that fails before its first token is failed
+over to the next one. With LLM_HEDGE_AFTER set, a second provider is started
+when the first has not produced a token by then, and whichever answers first
+wins.
+
+Providers are listed in LLM_PROVIDERS, e.g. "openrouter,ollama"; by default
+the pool holds just LLM_PROVIDER. Every call is admitted by the pool's
+scheduler first, which enforces per-provider rate limits (see
+src/llm_scheduler.py).
+"""
+
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel, agenerate_from_stream, generate_from_stream
+from langchain_core.outputs import ChatGenerationChunk
+
+from .llm_scheduler import build_scheduler
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.LLMPool")
+
+# Configuration
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter")
+LLM_PROVIDERS = [p.strip() for p in os.getenv("LLM_PROVIDERS", LLM_PROVIDER).split(",") if p.strip()]
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+OPENROUTER_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # Seconds per request
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))  # Seconds
+LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_KEEPALIVE_CONNECTIONS", "20"))  # Idle connections kept per provider
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))  # Seconds without a token before hedging, 0 = off
+LLM_HEALTH_WINDOW = int(os.getenv("LLM_HEALTH_WINDOW", "20"))  # Recent requests per provider for latency/error rate
+LLM_MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))  # Above this, a failing provider cools down
+LLM_COOLDOWN = float(os.getenv("LLM_COOLDOWN", "30"))  # Seconds an unhealthy provider is skipped
+
+
+def rate_limit_delay(error):
+    """
+    Seconds to wait if `error` is a provider rate-limit (HTTP 429) response,
+    honoring its Retry-After header; None for any other error.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    if retry_after is None:
+        return 0.0
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+
+
+def build_chat_model(name: str, max_retries: int = 2, base_url: str = None):
+    """
+    Long-lived chat client for one provider, with keep-alive connection
+    pools and connect/read timeouts.
+
+    Raises:
+        ValueError: Unknown provider, or OpenRouter without an API key
+    """
+    import httpx
+
+    timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+    limits = httpx.Limits(max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS)
+    if name == "openrouter":
+        from langchain_openai import ChatOpenAI
+
+        if not OPENROUTER_API_KEY or OPENROUTER_API_KEY == "your_api_key_here":
+            raise ValueError(
+                "OpenRouter API key not configured. "
+                "Please set OPENROUTER_API_KEY in your .env file. "
+                "Get a free key at https://openrouter.ai"
+            )
+
+        logger.info(f"Using OpenRouter with model: {OPENROUTER_MODEL}")
+        return ChatOpenAI(
+            model=OPENROUTER_MODEL,
+            openai_api_key=OPENROUTER_API_KEY,
+            openai_api_base=base_url or OPENROUTER_BASE_URL,
+            temperature=0.7,
+            max_retries=max_retries,
+            http_client=httpx.Client(timeout=timeout, limits=limits),
+            http_async_client=httpx.AsyncClient(timeout=timeout, limits=limits),
+            default_headers={
+                "HTTP-Referer": "https://github.com/cloudwalk-helper",
+                "X-Title": "CloudWalk Helper"
+            }
+        )
+    if name == "ollama":
+        from langchain_ollama import ChatOllama
+
+        logger.info(f"Using Ollama with model: {OLLAMA_MODEL}")
+        return ChatOllama(
+            model=OLLAMA_MODEL,
+            base_url=base_url or OLLAMA_BASE_URL,
+            temperature=0.7,
+            client_kwargs={"timeout": timeout, "limits": limits},
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+class ProviderStats:
+    """Rolling time to first token and error rate of one provider, plus its cooldown."""
+
+    def __init__(self, window: int = LLM_HEALTH_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = failed
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.hedges_won = 0
+
+    @property
+    def latency(self):
+        """Median time to first token over the window, None before the first success."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def record_success(self, time_to_first_token: float):
+        self.requests += 1
+        self.latencies.append(time_to_first_token)
+        self.outcomes.append(False)
+
+    def record_failure(self, cooldown: float = None) -> float:
+        """Count a failure; returns the cooldown started (0 if the provider stays in rotation)."""
+        self.requests += 1
+        self.errors += 1
+        self.outcomes.append(True)
+        if cooldown is None and self.error_rate > LLM_MAX_ERROR_RATE:
+            cooldown = LLM_COOLDOWN
+        if cooldown:
+            self.cooldown_until = max(self.cooldown_until, time.time() + cooldown)
+        return cooldown or 0.0
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "p50_time_to_first_token": self.latency,
+            "healthy": self.healthy(now),
+            "cooldown_remaining": max(0.0, self.cooldown_until - now),
+            "hedges_won": self.hedges_won,
+        }
+
+
+class Provider:
+    """A named chat model and its health statistics."""
+
+    def __init__(self, name: str, model, window: int = LLM_HEALTH_WINDOW):
+        self.name = name
+        self.model = model
+        self.stats = ProviderStats(window)
+
+
+class ProviderPool(BaseChatModel):
+    """
+    Chat model that routes every call to the fastest healthy provider.
+
+    Providers without a latency sample yet are tried first, so each one gets
+    measured. Failures before the first token fail over to the next provider;
+    once tokens have been streamed, errors are raised to the caller. With a
+    scheduler, a call waits for rate-limit capacity first and starts on the
+    fastest provider that has some; failover and hedge calls are only made
+    to providers with capacity left.
+    """
+
+    providers: list
+    hedge_after: float = LLM_HEDGE_AFTER
+    scheduler: Any = None
+    lock: Any = None
+    hedges: int = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider-pool"
+
+    def ranked(self) -> list:
+        """Healthy providers by median time to first token (unmeasured first), then unhealthy ones."""
+        now = time.time()
+        with self.lock:
+            return sorted(self.providers, key=lambda p: (
+                not p.stats.healthy(now),
+                p.stats.latency or 0.0,
+                self.providers.index(p),
+            ))
+
+    def snapshot(self) -> dict:
+        """Per-provider requests, errors, latency and health, how often requests were hedged, and the queue."""
+        now = time.time()
+        with self.lock:
+            snapshot = {
+                "providers": {p.name: p.stats.snapshot(now) for p in self.providers},
+                "hedges": self.hedges,
+            }
+        snapshot["scheduler"] = self.scheduler.stats() if self.scheduler is not None else None
+        return snapshot
+
+    def _admit(self, candidates: list) -> list:
+        """Wait for the scheduler to admit this call; the admitted provider goes first."""
+        if self.scheduler is None:
+            return candidates
+        name = self.scheduler.admit([p.name for p in candidates])
+        return sorted(candidates, key=lambda p: p.name != name)
+
+    async def _aadmit(self, candidates: list) -> list:
+        if self.scheduler is None:
+            return candidates
+        name = await self.scheduler.aadmit([p.name for p in candidates])
+        return sorted(candidates, key=lambda p: p.name != name)
+
+    def _has_capacity(self, provider) -> bool:
+        """Take a rate-limit token for a failover or hedge call to `provider`."""
+        return self.scheduler is None or self.scheduler.try_take(provider.name)
+
+    def _record_success(self, provider, start: float, hedged: bool = False):
+        with self.lock:
+            provider.stats.record_success(time.perf_counter() - start)
+            if hedged:
+                provider.stats.hedges_won += 1
+
+    def _record_failure(self, provider, error):
+        delay = rate_limit_delay(error)
+        if delay is not None:
+            delay = delay or LLM_COOLDOWN  # Rate-limited without a Retry-After hint
+        with self.lock:
+            cooldown = provider.stats.record_failure(delay)
+        if delay is not None and self.scheduler is not None:
+            self.scheduler.penalize(provider.name, delay)
+        logger.warning(f"LLM provider {provider.name} failed: {error}"
+                       + (f" (skipped for {cooldown:.0f}s)" if cooldown else ""))
+
+    def _generation_chunk(self, provider, chunk, first: bool):
+        # The provider name rides on the first chunk so it survives chunk merging once
+        return ChatGenerationChunk(message=chunk, generation_info={"provider": provider.name} if first else None)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        candidates = self._admit(self.ranked())
+        if self.hedge_after > 0 and len(candidates) > 1:
+            yield from self._hedged_stream(candidates, messages, stop, **kwargs)
+            return
+        last_error = None
+        for provider in candidates:
+            if last_error is not None and not self._has_capacity(provider):
+                continue
+            start = time.perf_counter()
+            iterator = iter(provider.model.stream(messages, stop=stop, **kwargs))
+            try:
+                first = next(iterator, None)
+            except Exception as e:
+                self._record_failure(provider, e)
+                last_error = e
+                continue
+            self._record_success(provider, start)
+            if first is None:
+                return
+            yield self._generation_chunk(provider, first, True)
+            try:
+                for chunk in iterator:
+                    yield self._generation_chunk(provider, chunk, False)
+            except Exception as e:
+                self._record_failure(provider, e)
+                raise
+            return
+        raise last_error
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        candidates = await self._aadmit(self.ranked())
+        if self.hedge_after > 0 and len(candidates) > 1:
+            async for chunk in self._ahedged_stream(candidates, messages, stop, **kwargs):
+                yield chunk
+            return
+        last_error = None
+        for provider in candidates:
+            if last_error is not None and not self._has_capacity(provider):
+                continue
+            start = time.perf_counter()
+            iterator = provider.model.astream(messages, stop=stop, **kwargs).__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self._record_success(provider, start)
+                return
+            except Exception as e:
+                self._record_failure(provider, e)
+                last_error = e
+                continue
+            self._record_success(provider, start)
+            yield self._generation_chunk(provider, first, True)
+            try:
+                async for chunk in iterator:
+                    yield self._generation_chunk(provider, chunk, False)
+            except Exception as e:
+                self._record_failure(provider, e)
+                raise
+            return
+        raise last_error
+
+    def _hedged_stream(self, candidates, messages, stop, **kwargs):
+        """
+        Race providers: each streams on its own thread into a shared queue.
+        The next candidate starts when the hedge deadline passes without a
+        token or when every running provider has failed.
+        """
+        events = queue.Queue()
+        cancelled = {}
+        starts = {}
+        remaining = list(candidates)
+        running = set()
+
+        def produce(provider):
+            try:
+                for chunk in provider.model.stream(messages, stop=stop, **kwargs):
+                    if cancelled[provider.name].is_set():
+                        return
+                    events.put((provider, "chunk", chunk))
+                events.put((provider, "done", None))
+            except Exception as e:
+                events.put((provider, "error", e))
+
+        def launch(admitted=False):
+            """Start the next candidate with rate-limit capacity; returns it, or None if there is none."""
+            while remaining:
+                provider = remaining.pop(0)
+                if admitted or self._has_capacity(provider):
+                    break
+            else:
+                return None
+            cancelled[provider.name] = threading.Event()
+            starts[provider.name] = time.perf_counter()
+            running.add(provider.name)
+            threading.Thread(target=produce, args=(provider,), name=f"llm-{provider.name}", daemon=True).start()
+            return provider
+
+        launch(admitted=True)
+        deadline = time.perf_counter() + self.hedge_after
+        winner, hedge, last_error = None, None, None
+        while winner is None:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                provider, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                deadline = None
+                hedge = launch()
+                if hedge is not None:
+                    self._note_hedge(hedge)
+                continue
+            if kind == "error":
+                running.discard(provider.name)
+                self._record_failure(provider, payload)
+                last_error = payload
+                if not running and launch() is None:
+                    raise last_error
+                continue
+            winner = provider
+            self._record_success(provider, starts[provider.name], hedged=provider is hedge)
+            for name, event in cancelled.items():
+                if name != provider.name:
+                    event.set()
+            if kind == "done":
+                return
+            yield self._generation_chunk(provider, payload, True)
+
+        while True:
+            provider, kind, payload = events.get()
+            if provider is not winner:
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                self._record_failure(provider, payload)
+                raise payload
+            yield self._generation_chunk(provider, payload, False)
+
+    async def _ahedged_stream(self, candidates, messages, stop, **kwargs):
+        """Async version of _hedged_stream(): providers race as tasks, losers are cancelled."""
+        events = asyncio.Queue()
+        tasks = {}
+        starts = {}
+        remaining = list(candidates)
+
+        async def produce(provider):
+            try:
+                async for chunk in provider.model.astream(messages, stop=stop, **kwargs):
+                    await events.put((provider, "chunk", chunk))
+                await events.put((provider, "done", None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await events.put((provider, "error", e))
+
+        def launch(admitted=False):
+            """Start the next candidate with rate-limit capacity; returns it, or None if there is none."""
+            while remaining:
+                provider = remaining.pop(0)
+                if admitted or self._has_capacity(provider):
+                    break
+            else:
+                return None
+            starts[provider.name] = time.perf_counter()
+            tasks[provider.name] = asyncio.create_task(produce(provider))
+            return provider
+
+        launch(admitted=True)
+        deadline = time.perf_counter() + self.hedge_after
+        winner, hedge = None, None
+        try:
+            while winner is None:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                try:
+                    provider, kind, payload = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    deadline = None
+                    hedge = launch()
+                    if hedge is not None:
+                        self._note_hedge(hedge)
+                    continue
+                if kind == "error":
+                    tasks.pop(provider.name)
+                    self._record_failure(provider, payload)
+                    if not tasks and launch() is None:
+                        raise payload
+                    continue
+                winner = provider
+                self._record_success(provider, starts[provider.name], hedged=provider is hedge)
+                for name, task in tasks.items():
+                    if name != provider.name:
+                        task.cancel()
+                if kind == "done":
+                    return
+                yield self._generation_chunk(provider, payload, True)
+
+            while True:
+                provider, kind, payload = await events.get()
+                if provider is not winner:
+                    continue
+                if kind == "done":
+                    return
+                if kind == "error":
+                    self._record_failure(provider, payload)
+                    raise payload
+                yield self._generation_chunk(provider, payload, False)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def _note_hedge(self, provider):
+        with self.lock:
+            self.hedges += 1
+        logger.info(f"No token after {self.hedge_after:.2f}s, hedging with {provider.name}")
+
+
+def build_pool(names=None, hedge_after: float = None, base_urls: dict = None) -> ProviderPool:
+    """
+    Build a pool over the named providers (LLM_PROVIDERS by default).
+
+    Providers that cannot be configured (e.g. OpenRouter without an API key)
+    are left out with a warning as long as another one remains.
+
+    Args:
+        names: Provider names in order of preference
+        hedge_after: Seconds without a token before hedging, LLM_HEDGE_AFTER by default
+        base_urls: Optional {provider: base URL} overrides, e.g. for local stub servers
+
+    Raises:
+        ValueError: No provider could be configured
+    """
+    names = names or LLM_PROVIDERS
+    base_urls = base_urls or {}
+    # With another provider to fail over to, the pool retries instead of the client
+    max_retries = 0 if len(names) > 1 else 2
+    providers, errors = [], []
+    for name in names:
+        try:
+            providers.append(Provider(name, build_chat_model(name, max_retries, base_urls.get(name))))
+        except ValueError as e:
+            logger.warning(f"LLM provider {name} unavailable: {e}")
+            errors.append(e)
+    if not providers:
+        raise errors[0] if errors else ValueError("No LLM providers configured")
+    return ProviderPool(providers=providers, hedge_after=LLM_HEDGE_AFTER if hedge_after is None else hedge_after,
+                        scheduler=build_scheduler([p.name for p in providers]))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> ProviderPool:
+    """Get the process-wide provider pool, building its clients on first use (thread-safe)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = build_pool()
+        return _pool
@@ -0,0 +1,379 @@
+"""
+Admission control for LLM calls in CloudWalk Helper.
+Every call the provider pool makes first waits here for capacity. Each
+provider has a token bucket sized to its rate limit (OpenRouter's free
+models allow 20 requests a minute), and callers wait in a bounded priority
+queue - interactive questions ahead of batch jobs - instead of bursting
+into the provider and failing with 429s.
+
+A request whose estimated wait is longer than its deadline is dropped up
+front (or as soon as the estimate passes it) with a TimeoutError, and its
+queue position and ETA are published on the caller's QueueStatus, so the
+UI can say how long the wait is instead of showing an error.
+
+Rate limits are set per provider in LLM_RATE_LIMITS as requests/seconds,
+e.g. "openrouter=20/60,ollama=0" (0 = unlimited).
+"""
+
+import os
+import heapq
+import asyncio
+import itertools
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Scheduler")
+
+# Configuration
+LLM_SCHEDULER = os.getenv("LLM_SCHEDULER", "true").lower() == "true"
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "openrouter=20/60")  # provider=requests/seconds, comma-separated
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "0"))  # Bucket size, 0 = a whole period's requests
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "64"))  # Calls waiting for capacity
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))  # Max seconds an interactive call waits
+LLM_BATCH_QUEUE_TIMEOUT = float(os.getenv("LLM_BATCH_QUEUE_TIMEOUT", "600"))  # Max seconds a batch call waits
+
+PRIORITIES = {"interactive": 0, "batch": 1}  # Lower is served first
+QUEUE_TIMEOUTS = {"interactive": LLM_QUEUE_TIMEOUT, "batch": LLM_BATCH_QUEUE_TIMEOUT}
+
+
+def parse_rate_limits(spec: str) -> dict:
+    """
+    Parse "openrouter=20/60,ollama=0" into {provider: (requests, seconds)}.
+
+    Raises:
+        ValueError: Malformed entry
+    """
+    limits = {}
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        name, _, rate = entry.partition("=")
+        try:
+            requests, _, seconds = rate.partition("/")
+            limits[name.strip()] = (int(requests), float(seconds or 1))
+        except ValueError:
+            raise ValueError(f"Invalid LLM_RATE_LIMITS entry {entry!r}, expected provider=requests/seconds")
+    return limits
+
+
+class TokenBucket:
+    """`capacity` requests at once, refilled at `rate` requests per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if now < self.blocked_until:
+            self.updated = now
+            return
+        start = max(self.updated, self.blocked_until)
+        self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self, now: float, requests: int = 1) -> float:
+        """Seconds until `requests` more calls fit, with nobody else taking tokens meanwhile."""
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        return blocked + max(0.0, requests - self.tokens) / self.rate
+
+    def block(self, seconds: float, now: float):
+        """The provider rate-limited us: no calls for `seconds`, then refill from empty."""
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+@dataclass
+class QueueStatus:
+    """Where a caller's LLM call is in the queue; updated by the scheduler while it waits."""
+    position: Optional[int] = None  # 1 = next in line; None when not queued
+    eta: Optional[float] = None  # Estimated seconds until the call starts
+    waited: float = 0.0  # Seconds spent queued so far
+    rejected: bool = False
+
+
+@dataclass
+class _Options:
+    priority: str
+    timeout: float
+    status: Optional[QueueStatus]
+
+
+_options = contextvars.ContextVar("llm_admission", default=None)
+
+
+@contextmanager
+def llm_admission(priority: str = "interactive", timeout: float = None, status: QueueStatus = None):
+    """
+    Set the priority, maximum queue wait and QueueStatus of the LLM calls made inside the block.
+
+    Threads and tasks started with the current context (the retrieval pool,
+    coalesced answers) inherit them, like tracing spans.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority {priority!r}, expected one of {sorted(PRIORITIES)}")
+    token = _options.set(_Options(priority, timeout if timeout is not None else QUEUE_TIMEOUTS[priority], status))
+    try:
+        yield status
+    finally:
+        _options.reset(token)
+
+
+class _Ticket:
+    """One LLM call waiting for admission."""
+
+    def __init__(self, candidates: list, options: _Options, seq: int, now: float):
+        self.candidates = candidates
+        self.priority = PRIORITIES[options.priority]
+        self.timeout = options.timeout
+        self.status = options.status
+        self.seq = seq
+        self.enqueued = now
+        self.deadline = now + options.timeout
+        self.provider = None
+        self.error = None
+        self.event = threading.Event()
+        self.loop = None
+        self.async_event = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def publish(self, position: Optional[int], eta: Optional[float], now: float):
+        if self.status is not None:
+            self.status.position = position
+            self.status.eta = eta
+            self.status.waited = now - self.enqueued
+
+    def resolve(self, now: float, provider: str = None, error: Exception = None):
+        self.provider = provider
+        self.error = error
+        if self.status is not None:
+            self.status.waited = now - self.enqueued
+            self.status.rejected = error is not None
+            if error is None:
+                self.status.position = self.status.eta = None
+        self.event.set()
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.async_event.set)
+            except RuntimeError:
+                pass  # The waiter's event loop has closed
+
+
+class LLMScheduler:
+    """
+    Token-bucket rate limits per provider in front of a bounded priority queue.
+
+    Calls are admitted in priority order (then first come, first served) as
+    soon as any of their candidate providers has a token. Providers without
+    a configured limit are always available.
+    """
+
+    def __init__(self, limits: dict = None, queue_size: int = LLM_QUEUE_SIZE, burst: int = LLM_RATE_BURST):
+        limits = parse_rate_limits(LLM_RATE_LIMITS) if limits is None else limits
+        self.buckets = {name: TokenBucket(requests / seconds, burst or requests)
+                        for name, (requests, seconds) in limits.items() if requests > 0}
+        self.queue_size = queue_size
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.total_wait = 0.0
+
+    def admit(self, candidates: list) -> str:
+        """
+        Wait until one of the `candidates` (provider names) may be called, and take its token.
+
+        Returns:
+            The provider to call
+        Raises:
+            TimeoutError: Queue full, or the call could not start before its deadline
+        """
+        ticket = self._enqueue(candidates)
+        if not ticket.event.wait(ticket.timeout + 5.0):  # The dispatcher resolves it by the deadline
+            self._abandon(ticket)
+            raise TimeoutError(f"LLM call not admitted within {ticket.timeout:.0f}s")
+        return self._result(ticket)
+
+    async def aadmit(self, candidates: list) -> str:
+        """Async version of admit() that waits without blocking the event loop."""
+        ticket = self._enqueue(candidates, asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(ticket.async_event.wait(), ticket.timeout + 5.0)
+        except asyncio.TimeoutError:
+            self._abandon(ticket)
+            if not ticket.event.is_set():
+                raise TimeoutError(f"LLM call not admitted within {ticket.timeout:.0f}s")
+        except asyncio.CancelledError:
+            self._abandon(ticket)  # The client went away
+            raise
+        return self._result(ticket)
+
+    def try_take(self, name: str) -> bool:
+        """Take a token for a failover or hedge call to `name` without queueing; False if it has none."""
+        with self._cond:
+            bucket = self.buckets.get(name)
+            return bucket is None or bucket.take(time.monotonic())
+
+    def penalize(self, name: str, seconds: float):
+        """Stop admitting calls to `name` for `seconds` after it answered 429."""
+        with self._cond:
+            bucket = self.buckets.get(name)
+            if bucket is not None:
+                bucket.block(seconds, time.monotonic())
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            waiting = {name: sum(1 for t in self._queue if t.priority == level) for name, level in PRIORITIES.items()}
+            return {
+                "providers": {
+                    name: {
+                        "rate_per_min": round(bucket.rate * 60, 2),
+                        "tokens": round(bucket.available(now), 2),
+                        "blocked_for": round(max(0.0, bucket.blocked_until - now), 1),
+                    }
+                    for name, bucket in self.buckets.items()
+                },
+                "waiting": waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "evicted": self.evicted,
+                "avg_queue_wait": round(self.total_wait / self.queued, 3) if self.queued else 0.0,
+            }
+
+    def _enqueue(self, candidates: list, loop=None) -> _Ticket:
+        options = _options.get() or _Options("interactive", LLM_QUEUE_TIMEOUT, None)
+        now = time.monotonic()
+        with self._cond:
+            ticket = _Ticket(list(candidates), options, next(self._seq), now)
+            if loop is not None:
+                ticket.loop, ticket.async_event = loop, asyncio.Event()
+            if not any(t < ticket for t in self._queue):
+                provider = self._take_any(ticket.candidates, now)
+                if provider is not None:
+                    self.admitted += 1
+                    ticket.resolve(now, provider)
+                    return ticket
+
+            if len(self._queue) >= self.queue_size:
+                lowest = max(self._queue)
+                if ticket < lowest:  # Interactive calls push out the newest batch call
+                    self._queue.remove(lowest)
+                    heapq.heapify(self._queue)
+                    self.evicted += 1
+                    lowest.resolve(now, error=TimeoutError("LLM queue is full, pushed out by an interactive call"))
+                else:
+                    self.rejected += 1
+                    ticket.publish(len(self._queue) + 1, None, now)
+                    ticket.resolve(now, error=TimeoutError(f"LLM queue is full ({self.queue_size} calls waiting)"))
+                    return ticket
+
+            position = sum(1 for t in self._queue if t < ticket)
+            eta = self._eta(ticket.candidates, position, now)
+            ticket.publish(position + 1, eta, now)
+            if eta > ticket.timeout:
+                self.dropped += 1
+                ticket.resolve(now, error=TimeoutError(
+                    f"LLM queue wait of about {eta:.0f}s (position {position + 1}) exceeds {ticket.timeout:.0f}s"))
+                return ticket
+            heapq.heappush(self._queue, ticket)
+            self.queued += 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="llm-scheduler", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify_all()
+        return ticket
+
+    def _result(self, ticket: _Ticket) -> str:
+        if ticket.error is not None:
+            raise ticket.error
+        return ticket.provider
+
+    def _abandon(self, ticket: _Ticket):
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+
+    def _take_any(self, candidates: list, now: float) -> Optional[str]:
+        for name in candidates:
+            bucket = self.buckets.get(name)
+            if bucket is None or bucket.take(now):
+                return name
+        return None
+
+    def _eta(self, candidates: list, ahead: int, now: float) -> float:
+        """Seconds until a call with `ahead` calls in front of it gets a token from its fastest candidate."""
+        return min((self.buckets[name].wait_time(now, ahead + 1) if name in self.buckets else 0.0)
+                   for name in candidates)
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                waiting = []
+                for ticket in sorted(self._queue):
+                    provider = self._take_any(ticket.candidates, now)
+                    if provider is not None:
+                        self.admitted += 1
+                        self.total_wait += now - ticket.enqueued
+                        ticket.resolve(now, provider)
+                        continue
+                    eta = self._eta(ticket.candidates, len(waiting), now)
+                    if now + eta > ticket.deadline:
+                        self.dropped += 1
+                        ticket.resolve(now, error=TimeoutError(
+                            f"LLM call dropped after {now - ticket.enqueued:.1f}s in the queue: it could not "
+                            f"start within {ticket.timeout:.0f}s"))
+                        continue
+                    ticket.publish(len(waiting) + 1, eta, now)
+                    waiting.append(ticket)
+                self._queue = waiting
+                heapq.heapify(self._queue)
+                if not waiting:
+                    self._cond.wait()
+                    continue
+                # Wake for the next token, or at least twice a second to refresh waiting callers' status
+                next_token = min(self._eta(t.candidates, 0, now) for t in waiting)
+                self._cond.wait(min(max(next_token, 0.01), 0.5))
+
+
+def build_scheduler(names: list) -> Optional[LLMScheduler]:
+    """Scheduler with the LLM_RATE_LIMITS of the named providers, or None when LLM_SCHEDULER is off."""
+    if not LLM_SCHEDULER:
+        return None
+    limits = parse_rate_limits(LLM_RATE_LIMITS)
+    return LLMScheduler({name: limit for name, limit in limits.items() if name in names})
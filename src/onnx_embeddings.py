@@ -0,0 +1,158 @@
+"""
+ONNX embedding backend for CloudWalk Helper.
+Runs the int8-quantized ONNX export of the sentence-transformers model on
+onnxruntime instead of PyTorch: a fraction of the load time and memory,
+and faster CPU encoding, with vectors that match the PyTorch ones to
+within quantization error (see parity_check).
+
+Selected with EMBEDDING_BACKEND=onnx (see src/embeddings.py).
+Run the parity check with: python -m src.onnx_embeddings
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("CloudWalkHelper.OnnxEmbeddings")
+
+# Configuration
+# Quantized exports published alongside the model; use onnx/model.onnx for the fp32 graph
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # Intra-op threads, 0 = one per core
+EMBEDDING_MAX_LENGTH = 256  # Tokens; matches the sentence-transformers max_seq_length
+EMBEDDING_BATCH_SIZE = 32
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over real (non-padding) tokens, as sentence-transformers does."""
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def _resolve(model_name: str, filename: str) -> str:
+    """Path to a model file: from a local model directory, or downloaded from the Hugging Face Hub."""
+    local = Path(model_name) / filename
+    if local.exists():
+        return str(local)
+    from huggingface_hub import hf_hub_download
+    return hf_hub_download(repo_id=model_name, filename=filename)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an ONNX export of a sentence-transformers model.
+
+    Tokenization uses the model's fast tokenizer (tokenizers), inference
+    runs on onnxruntime's CPU provider with `threads` intra-op threads, and
+    token embeddings are mean-pooled and L2-normalized.
+    """
+
+    def __init__(self, model_name: str, file_name: str = EMBEDDING_ONNX_FILE,
+                 threads: int = EMBEDDING_THREADS, max_length: int = EMBEDDING_MAX_LENGTH,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, normalize: bool = True):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        start_time = time.time()
+        self.model_name = model_name
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        self.tokenizer = Tokenizer.from_file(_resolve(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            _resolve(model_name, file_name), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embeddings {model_name} ({file_name}, "
+                    f"{threads or 'auto'} threads) in {time.time() - start_time:.2f}s")
+
+    def _encode(self, texts) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            hidden = self.session.run(None, feeds)[0]
+            batches.append(mean_pool(hidden, attention_mask))
+        vectors = np.concatenate(batches).astype(np.float32)
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+
+def parity_check(reference, candidate, texts, min_cosine: float = 0.99) -> dict:
+    """
+    Compare two embedding backends on the same texts.
+
+    Returns:
+        Report with the minimum and mean per-text cosine similarity,
+        top-1 agreement for each text as a query against the others,
+        and whether the minimum cosine reaches `min_cosine`
+    """
+    expected = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    actual = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = (expected * actual).sum(axis=1)
+
+    # Nearest neighbour of each text among the others should not change
+    expected_scores = expected @ expected.T
+    actual_scores = actual @ actual.T
+    np.fill_diagonal(expected_scores, -np.inf)
+    np.fill_diagonal(actual_scores, -np.inf)
+    agreement = float(np.mean(expected_scores.argmax(axis=1) == actual_scores.argmax(axis=1)))
+
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "top1_agreement": agreement,
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from .embeddings import EMBEDDING_MODEL, load_documents, split_documents
+
+    parser = argparse.ArgumentParser(description="Check ONNX embeddings against the PyTorch model")
+    parser.add_argument("--file", default=EMBEDDING_ONNX_FILE, help="ONNX file in the model repository")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    texts = [chunk.page_content for chunk in split_documents(load_documents())]
+    texts += ["What is CloudWalk?", "Quais são as taxas da InfinitePay?", "What is JIM?"]
+    torch_embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    report = parity_check(torch_embeddings, OnnxEmbeddings(EMBEDDING_MODEL, args.file), texts, args.min_cosine)
+    print(json.dumps(report, indent=2))
+    raise SystemExit(0 if report["passed"] else 1)
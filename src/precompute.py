@@ -0,0 +1,202 @@
+"""
+Precomputed answers for CloudWalk Helper.
+Answers a fixed set of canned questions (the app's quick actions in English
+and Portuguese by default) once per knowledge-base version and stores them
+with the knowledge-base hash. Matching questions are then served instantly
+with a simulated stream; the answers are regenerated in the background only
+after data/ changed and the index was synced.
+
+Run with: python -m src.precompute [--force]
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from .embeddings import knowledge_base_hash
+from .quick_actions import QUICK_QUESTIONS, QUICK_QUESTIONS_PT
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Precompute")
+
+# Configuration
+PRECOMPUTED_ANSWERS = os.getenv("PRECOMPUTED_ANSWERS", "true").lower() == "true"
+PRECOMPUTED_ANSWERS_PATH = Path(os.getenv("PRECOMPUTED_ANSWERS_PATH",
+                                          str(Path(__file__).parent.parent / "precomputed_answers.json")))
+PRECOMPUTED_QUESTIONS_FILE = os.getenv("PRECOMPUTED_QUESTIONS_FILE")  # One question per line; default: quick actions
+PRECOMPUTED_STREAM_DELAY = float(os.getenv("PRECOMPUTED_STREAM_DELAY", "0.01"))  # Seconds between simulated chunks
+STREAM_CHUNK_WORDS = 3
+
+
+def normalize_question(question: str) -> str:
+    """Case, whitespace and trailing punctuation do not make a different question."""
+    return " ".join(question.casefold().split()).rstrip("?!. ")
+
+
+def canned_questions() -> list:
+    """The questions to precompute: PRECOMPUTED_QUESTIONS_FILE, or the quick actions in both languages."""
+    if PRECOMPUTED_QUESTIONS_FILE:
+        lines = Path(PRECOMPUTED_QUESTIONS_FILE).read_text(encoding="utf-8").splitlines()
+        return [line.strip() for line in lines if line.strip()]
+    return QUICK_QUESTIONS + QUICK_QUESTIONS_PT
+
+
+def simulated_stream(answer: str, delay: float = PRECOMPUTED_STREAM_DELAY):
+    """Yield a stored answer a few words at a time, so it renders like a streamed one."""
+    words = answer.split(" ")
+    for i in range(0, len(words), STREAM_CHUNK_WORDS):
+        if i and delay > 0:
+            time.sleep(delay)
+        yield " ".join(words[i:i + STREAM_CHUNK_WORDS]) + (" " if i + STREAM_CHUNK_WORDS < len(words) else "")
+
+
+async def asimulated_stream(answer: str, delay: float = PRECOMPUTED_STREAM_DELAY):
+    """Async version of simulated_stream()."""
+    for i, chunk in enumerate(simulated_stream(answer, delay=0)):
+        if i and delay > 0:
+            await asyncio.sleep(delay)
+        yield chunk
+
+
+def generate_answer(pipeline, question: str) -> str:
+    """Answer a question with the full pipeline, bypassing every cache, behind interactive questions."""
+    from .llm_scheduler import llm_admission
+    from .rag_chain import prepare_inputs
+
+    inputs = prepare_inputs(question, pipeline.retriever, pipeline.reranker)
+    with llm_admission("batch"):
+        return pipeline.generation_chain.invoke(inputs)
+
+
+class PrecomputedAnswers:
+    """
+    Stored answers to the canned questions for one knowledge-base hash.
+
+    Answers are only served while that hash is current; a refresh writes a
+    new file (atomically) and swaps the answers in when every question is done.
+    """
+
+    def __init__(self, path: Path = PRECOMPUTED_ANSWERS_PATH, questions: list = None):
+        self.path = Path(path)
+        self.questions = questions if questions is not None else canned_questions()
+        self.kb_hash = None
+        self.generated_at = None
+        self._answers = {}  # Normalized question -> answer
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self.served = 0
+        self.refreshes = 0
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.kb_hash = data.get("kb_hash")
+        self.generated_at = data.get("generated_at")
+        self._answers = {normalize_question(q): a for q, a in data.get("answers", {}).items()}
+        logger.info(f"Loaded {len(self._answers)} precomputed answers from {self.path}")
+
+    def lookup(self, question: str) -> Optional[str]:
+        """The stored answer to `question`, if it is canned and the knowledge base has not changed since."""
+        answer = self._answers.get(normalize_question(question))
+        if answer is None or self.kb_hash != knowledge_base_hash():
+            return None
+        self.served += 1
+        return answer
+
+    def is_stale(self) -> bool:
+        """True when the knowledge base changed or a canned question has no stored answer."""
+        if self.kb_hash != knowledge_base_hash():
+            return True
+        return any(normalize_question(q) not in self._answers for q in self.questions)
+
+    def refresh(self, pipeline, force: bool = False) -> int:
+        """
+        Generate and store answers to every canned question (if stale, or `force`).
+
+        Returns:
+            Number of answers generated
+        """
+        with self._lock:
+            if not force and not self.is_stale():
+                return 0
+            start_time = time.time()
+            kb_hash = knowledge_base_hash()
+            answers = {}
+            for question in self.questions:
+                try:
+                    answers[question] = generate_answer(pipeline, question)
+                except Exception as e:
+                    logger.warning(f"Could not precompute an answer to '{question}': {e}")
+            if not answers:
+                return 0
+            data = {"kb_hash": kb_hash, "generated_at": time.time(), "answers": answers}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.path)
+            self._answers = {normalize_question(q): a for q, a in answers.items()}
+            self.kb_hash, self.generated_at = kb_hash, data["generated_at"]
+            self.refreshes += 1
+            logger.info(f"Precomputed {len(answers)}/{len(self.questions)} answers "
+                        f"in {time.time() - start_time:.1f}s")
+            return len(answers)
+
+    def refresh_in_background(self, pipeline) -> bool:
+        """Start a refresh on a background thread if the answers are stale and none is running."""
+        if not self.is_stale() or (self._refresh_thread is not None and self._refresh_thread.is_alive()):
+            return False
+        self._refresh_thread = threading.Thread(target=self.refresh, args=(pipeline,),
+                                                name="precompute", daemon=True)
+        self._refresh_thread.start()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "questions": len(self.questions),
+            "answers": len(self._answers),
+            "current": self.kb_hash == knowledge_base_hash(),
+            "generated_at": self.generated_at,
+            "served": self.served,
+            "refreshes": self.refreshes,
+        }
+
+
+_precomputed = None
+_precomputed_lock = threading.Lock()
+
+
+def get_precomputed_answers() -> Optional[PrecomputedAnswers]:
+    """Get the process-wide precomputed answers, or None when disabled."""
+    global _precomputed
+    if not PRECOMPUTED_ANSWERS:
+        return None
+    with _precomputed_lock:
+        if _precomputed is None:
+            _precomputed = PrecomputedAnswers()
+        return _precomputed
+
+
+if __name__ == "__main__":
+    import argparse
+    from .rag_chain import build_pipeline
+
+    parser = argparse.ArgumentParser(description="Precompute answers to the canned questions")
+    parser.add_argument("--force", action="store_true", help="Regenerate even if the knowledge base is unchanged")
+    args = parser.parse_args()
+
+    precomputed = PrecomputedAnswers()
+    count = precomputed.refresh(build_pipeline(), force=args.force)
+    print(f"Precomputed {count} answers" if count else "Precomputed answers are up to date")
+    print(json.dumps(precomputed.stats(), indent=2))
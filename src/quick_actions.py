@@ -0,0 +1,23 @@
+"""
+Quick-action questions for CloudWalk Helper.
+The common questions offered as buttons in the app, kept here (without any
+heavy imports) so tools such as the load test can use the same mix.
+"""
+
+# (button label, question asked)
+QUICK_ACTIONS = [
+    ("🏢 What is CloudWalk?", "What is CloudWalk?"),
+    ("💳 InfinitePay rates", "What are the fees and rates for InfinitePay debit and credit card transactions?"),
+    ("🤖 What is JIM?", "What is JIM?"),
+    ("⛓️ About Stratus", "What is Stratus blockchain?"),
+]
+
+QUICK_QUESTIONS = [question for _, question in QUICK_ACTIONS]
+
+# The same questions in Portuguese, precomputed too (see src/precompute.py)
+QUICK_QUESTIONS_PT = [
+    "O que é a CloudWalk?",
+    "Quais são as taxas da InfinitePay para transações no débito e no crédito?",
+    "O que é o JIM?",
+    "O que é a blockchain Stratus?",
+]
@@ -5,14 +5,29 @@ Supports OpenRouter (cloud) or Ollama (local) LLM providers.
 """
 
 import os
+import asyncio
+import contextvars
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 
-from .embeddings import get_vector_store, get_embeddings
+from .embeddings import get_vector_store, get_embeddings, knowledge_base_hash
+from .answer_cache import get_answer_cache
+from .precompute import asimulated_stream, get_precomputed_answers, normalize_question, simulated_stream
+from .context_packer import CONTEXT_PACKING, estimate_tokens, pack_context
+from .conversation import ConversationMemory, condense_question, get_summary_cache
+from .reranker import RERANK_CANDIDATES, get_reranker
+from .singleflight import get_single_flight
+from .startup import profile_step
+from .tracing import llm_config, span
+from .language import LANGUAGE_ROUTING, LanguageRoutedRetriever, detect_language, partition_stats
 
 # Load environment variables
 load_dotenv()
@@ -26,55 +41,61 @@ logging.basicConfig(
 logger = logging.getLogger("CloudWalkHelper.RAG")
 
 # Configuration
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter")
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
-OPENROUTER_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
-RETRIEVAL_K = 8  # Number of documents to retrieve
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "8"))  # Number of documents to retrieve
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # 'hybrid' (BM25 + dense) or 'dense'
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "16"))  # Per-retriever candidates before fusion
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))  # Threads for embedding/search in async calls
 
 
 def get_llm():
-    """Get LLM instance based on LLM_PROVIDER environment variable."""
-    if LLM_PROVIDER == "openrouter":
-        from langchain_openai import ChatOpenAI
-        
-        if not OPENROUTER_API_KEY or OPENROUTER_API_KEY == "your_api_key_here":
-            raise ValueError(
-                "OpenRouter API key not configured. "
-                "Please set OPENROUTER_API_KEY in your .env file. "
-                "Get a free key at https://openrouter.ai"
-            )
-        
-        logger.info(f"Using OpenRouter with model: {OPENROUTER_MODEL}")
-        return ChatOpenAI(
-            model=OPENROUTER_MODEL,
-            openai_api_key=OPENROUTER_API_KEY,
-            openai_api_base="https://openrouter.ai/api/v1",
-            temperature=0.7,
-            default_headers={
-                "HTTP-Referer": "https://github.com/cloudwalk-helper",
-                "X-Title": "CloudWalk Helper"
-            }
-        )
-    else:
-        from langchain_ollama import ChatOllama
-        logger.info(f"Using Ollama with model: {OLLAMA_MODEL}")
-        return ChatOllama(
-            model=OLLAMA_MODEL,
-            temperature=0.7,
-        )
+    """
+    Get the LLM: the process-wide pool over the providers in LLM_PROVIDERS
+    (default: LLM_PROVIDER), see src/llm_pool.py.
+    """
+    from .llm_pool import get_llm_pool
+    return get_llm_pool()
 
 
-def get_retriever():
-    """Get the document retriever from vector store."""
+def get_retriever(vector_store=None, k=None):
+    """
+    Get the document retriever from vector store.
+    
+    In 'hybrid' mode (default) dense results are fused with a BM25 index over
+    the same chunks, so exact product and fee terms are found too. Unless
+    LANGUAGE_ROUTING=false, searches are limited to chunks in the question's
+    language (see src/language.py).
+    
+    Args:
+        vector_store: Store to search, opened and synced when None
+        k: Documents to retrieve, RETRIEVAL_K by default (more when reranking)
+    """
     logger.debug("Setting up document retriever...")
-    embeddings = get_embeddings()
-    vector_store = get_vector_store(embeddings)
-    logger.debug(f"Retriever configured with k={RETRIEVAL_K}")
-    return vector_store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": RETRIEVAL_K}
-    )
+    if vector_store is None:
+        embeddings = get_embeddings()
+        vector_store = get_vector_store(embeddings)
+    k = k or RETRIEVAL_K
+    logger.debug(f"Retriever configured with k={k} ({RETRIEVAL_MODE})")
+    if RETRIEVAL_MODE == "hybrid":
+        from .embeddings import vector_store_dir
+        from .hybrid import HybridRetriever, load_or_build_bm25_index
+        from .indexer import MANIFEST_NAME
+        
+        # A snapshot store comes with the manifest and BM25 index it was built with
+        index_dir = getattr(vector_store, "snapshot_dir", None) or vector_store_dir()
+        bm25 = load_or_build_bm25_index(index_dir / MANIFEST_NAME)
+        retriever = HybridRetriever(
+            vector_store=vector_store,
+            bm25=bm25,
+            k=k,
+            candidates=max(HYBRID_CANDIDATES, k)
+        )
+    else:
+        from .hybrid import DenseRetriever
+        
+        retriever = DenseRetriever(vector_store=vector_store, k=k)
+    if LANGUAGE_ROUTING:
+        return LanguageRoutedRetriever(retriever=retriever)
+    return retriever
 
 
 def format_docs(docs):
@@ -84,22 +105,6 @@ def format_docs(docs):
     return formatted
 
 
-def detect_language(text: str) -> str:
-    """Simple language detection based on common words."""
-    portuguese_words = ['o', 'a', 'que', 'de', 'do', 'da', 'é', 'em', 'para', 'com', 'não', 'uma', 'um', 'os', 'as', 'por', 'mais', 'qual', 'quais', 'como', 'isso', 'esse', 'essa', 'são', 'sobre', 'pode', 'fazer', 'seu', 'sua']
-    english_words = ['the', 'is', 'what', 'how', 'can', 'do', 'does', 'are', 'have', 'has', 'will', 'would', 'could', 'should', 'about', 'this', 'that', 'which', 'where', 'when', 'why', 'who', 'tell', 'me', 'explain', 'describe']
-    
-    text_lower = text.lower()
-    words = text_lower.split()
-    
-    pt_count = sum(1 for word in words if word in portuguese_words)
-    en_count = sum(1 for word in words if word in english_words)
-    
-    result = "Portuguese" if pt_count > en_count else "English"
-    logger.debug(f"Language detected: {result} (PT words: {pt_count}, EN words: {en_count})")
-    return result
-
-
 # System prompt for the CloudWalk Helper chatbot
 SYSTEM_PROMPT = """You are CloudWalk Helper, a helpful assistant that answers questions about CloudWalk, InfinitePay, JIM, and Stratus.
 
@@ -139,59 +144,469 @@ def get_prompt():
     ])
 
 
-def create_rag_chain():
-    """Create the full RAG chain using LCEL pattern."""
-    llm = get_llm()
-    retriever = get_retriever()
+def build_inputs(question: str, docs, language: str = None) -> dict:
+    """
+    Build the prompt inputs for a question from its retrieved documents.
     
-    # Create prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", SYSTEM_PROMPT),
-        ("human", "{input}")
-    ])
+    Unless CONTEXT_PACKING=false, the documents are packed into a
+    deduplicated, token-budgeted context (see src/context_packer.py).
+    The question's language is detected unless given.
+    """
+    with span("prompt_build", chunks=len(docs)) as build_span:
+        if CONTEXT_PACKING:
+            context, _ = pack_context(docs)
+        else:
+            context = format_docs(docs)
+        build_span.set(context_chars=len(context), context_tokens=estimate_tokens(context))
+    if language is None:
+        language = _detect_language(question)
+    return {
+        "context": context,
+        "input": question,
+        "language": language
+    }
+
+
+def _detect_language(question: str) -> str:
+    with span("language_detection") as detect_span:
+        language = detect_language(question)
+        detect_span.set(language=language)
+    return language
+
+
+def prepare_inputs(question: str, retriever, reranker=None) -> dict:
+    """
+    Detect the question language and retrieve its context (the retrieval half of the chain).
+    
+    With a reranker, the retrieved candidates are narrowed down to its top-n
+    before the context is built.
+    """
+    retrieval_start = time.time()
+    language = _detect_language(question)
+    logger.info(f"Processing question: '{question[:50]}...' (Language: {language})")
+    
+    with span("retrieval") as retrieval_span:
+        if isinstance(retriever, LanguageRoutedRetriever):
+            docs, partition = retriever.route(question)
+        else:
+            docs, partition = retriever.invoke(question), None
+        retrieval_span.set(chunks=len(docs), partition=partition)
+    retrieval_time = time.time() - retrieval_start
+    logger.info(f"Retrieved {len(docs)} documents in {retrieval_time:.2f}s"
+                + (f" from the {partition} partition" if partition else ""))
+    
+    reranked = False
+    if reranker is not None:
+        with span("rerank", candidates=len(docs)) as rerank_span:
+            docs, reranked = reranker.rerank(question, docs, fallback_k=RETRIEVAL_K)
+            rerank_span.set(chunks=len(docs), reranked=reranked)
+    
+    inputs = build_inputs(question, docs, language)
+    inputs["partition"] = partition
+    inputs["reranked"] = reranked
+    return inputs
+
+
+def create_generation_chain(llm, prompt):
+    """Create the generation half of the chain: prompt inputs in, answer text out."""
+    return prompt | llm | StrOutputParser()
+
+
+def create_rag_chain(llm=None, retriever=None, prompt=None, reranker=None):
+    """Create the full RAG chain using LCEL pattern.
+
+    Components that are not passed in are built from scratch, so prefer
+    get_pipeline() when the chain will answer more than one question.
+    """
+    if llm is None:
+        llm = get_llm()
+    if retriever is None:
+        retriever = get_retriever()
+    if prompt is None:
+        prompt = get_prompt()
     
     # Create the RAG chain using LCEL with language detection
     def process_input(question: str):
-        retrieval_start = time.time()
-        language = detect_language(question)
-        logger.info(f"Processing question: '{question[:50]}...' (Language: {language})")
-        
-        docs = retriever.invoke(question)
-        retrieval_time = time.time() - retrieval_start
-        logger.info(f"Retrieved {len(docs)} documents in {retrieval_time:.2f}s")
-        
-        context = format_docs(docs)
-        return {
-            "context": context,
-            "input": question,
-            "language": language
-        }
+        return prepare_inputs(question, retriever, reranker=reranker)
     
     rag_chain = (
         process_input
-        | prompt
-        | llm
-        | StrOutputParser()
+        | create_generation_chain(llm, prompt)
     )
     
     return rag_chain
 
 
+@dataclass
+class RAGPipeline:
+    """Long-lived components of the RAG chain, shared by every question."""
+    embeddings: Any
+    vector_store: Any
+    retriever: Any
+    prompt: ChatPromptTemplate
+    llm: Any
+    chain: Any
+    generation_chain: Any
+    reranker: Any = None
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def build_pipeline(embeddings=None) -> RAGPipeline:
+    """Build every pipeline component once (embeddings, store, retriever, reranker, prompt, LLM)."""
+    start_time = time.time()
+    if embeddings is None:
+        with profile_step("embeddings"):
+            embeddings = get_embeddings()
+    with profile_step("vector store"):
+        vector_store = get_vector_store(embeddings)
+    with profile_step("reranker"):
+        reranker = get_reranker()
+    with profile_step("retriever"):
+        retriever = get_retriever(vector_store, k=max(RERANK_CANDIDATES, RETRIEVAL_K) if reranker else None)
+    with profile_step("llm"):
+        prompt = get_prompt()
+        llm = get_llm()
+        chain = create_rag_chain(llm=llm, retriever=retriever, prompt=prompt, reranker=reranker)
+        generation_chain = create_generation_chain(llm, prompt)
+    logger.info(f"RAG pipeline built in {time.time() - start_time:.2f}s")
+    return RAGPipeline(
+        embeddings=embeddings,
+        vector_store=vector_store,
+        retriever=retriever,
+        prompt=prompt,
+        llm=llm,
+        chain=chain,
+        generation_chain=generation_chain,
+        reranker=reranker
+    )
+
+
+def get_pipeline() -> RAGPipeline:
+    """Get the process-wide RAG pipeline, building it on first use (thread-safe)."""
+    global _pipeline
+    pipeline = _pipeline
+    if pipeline is not None:
+        return pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = build_pipeline()
+            _refresh_precomputed_answers(_pipeline)
+        return _pipeline
+
+
+def _refresh_precomputed_answers(pipeline):
+    """The index was just synced: regenerate the canned answers in the background if data/ changed."""
+    precomputed = get_precomputed_answers()
+    if precomputed is not None and precomputed.refresh_in_background(pipeline):
+        logger.info("Knowledge base changed, regenerating precomputed answers in the background")
+
+
+def warmup() -> RAGPipeline:
+    """
+    Eagerly build the pipeline and run one embedding pass so the first
+    question does not pay for model loading.
+    """
+    start_time = time.time()
+    pipeline = get_pipeline()
+    pipeline.embeddings.embed_query("warmup")
+    logger.info(f"Warmup finished in {time.time() - start_time:.2f}s")
+    return pipeline
+
+
+def reload_pipeline(rebuild_index: bool = False) -> RAGPipeline:
+    """
+    Rebuild the pipeline, e.g. after the knowledge base in data/ changed.
+
+    Building the pipeline already syncs changed files into the vector store
+    incrementally. The embeddings model is reused; questions in flight keep
+    using the old pipeline until the new one is swapped in.
+    
+    Args:
+        rebuild_index: Discard the index and re-embed every document
+        
+    Returns:
+        The new pipeline
+    """
+    global _pipeline
+    with _pipeline_lock:
+        embeddings = _pipeline.embeddings if _pipeline is not None else None
+        if rebuild_index:
+            from .embeddings import rebuild_vector_store
+            rebuild_vector_store(embeddings)
+        _pipeline = build_pipeline(embeddings)
+        logger.info("RAG pipeline reloaded")
+        _refresh_precomputed_answers(_pipeline)
+        return _pipeline
+
+
+def _lookup_precomputed_answer(question: str):
+    precomputed = get_precomputed_answers()
+    return precomputed.lookup(question) if precomputed is not None else None
+
+
+def _lookup_cached_answer(pipeline, question: str):
+    """
+    Check the answer cache for a close paraphrase of the question.
+    
+    Returns:
+        (answer or None, store callback to cache a freshly generated answer)
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return None, lambda answer: None
+    
+    language = detect_language(question)
+    vector = pipeline.embeddings.embed_query(question)
+    kb_hash = knowledge_base_hash()
+    
+    def store(answer: str):
+        cache.store(question, vector, language, answer, kb_hash)
+    
+    return cache.lookup(vector, language, kb_hash), store
+
+
+def _with_history(inputs: dict, question: str, memory) -> dict:
+    """Answer the user's own wording, with the bounded conversation history alongside the context."""
+    inputs["input"] = question
+    if memory is not None:
+        inputs["chat_history"] = memory.messages()
+    return inputs
+
+
+def _flight_key(question: str, memory) -> tuple:
+    """
+    Coalescing key: normalized question and language, or None when the
+    answer also depends on the conversation so far.
+    """
+    if memory is not None and len(memory):
+        return None
+    return normalize_question(question), detect_language(question)
+
+
+def _join_metrics(metrics: dict, flight, question: str, start_time: float):
+    """Timings of a request that joined another request's answer, flags as the answer was produced."""
+    metrics["coalesced"] = True
+    metrics["query"] = question
+    for key in ("cached", "precomputed"):
+        metrics[key] = flight.metrics.get(key, False)
+    metrics["total_time"] = time.time() - start_time
+
+
+def stream_ask(question: str, metrics: dict = None, memory: ConversationMemory = None):
+    """
+    Answer a question, yielding text chunks as the LLM produces them.
+    
+    Canned questions with a precomputed answer are served with a simulated
+    stream; close paraphrases of earlier questions are served from the
+    answer cache as a single chunk. Identical questions asked while one is
+    being answered share that answer's stream (see src/singleflight.py).
+    
+    Args:
+        question: The user's question
+        metrics: Optional dict filled in with 'retrieval_time',
+            'time_to_first_token', 'total_time' (seconds), 'cached',
+            'precomputed', 'coalesced' and 'query' (the question as used
+            for retrieval)
+        memory: Optional ConversationMemory of the turns so far; follow-ups
+            are condensed into a standalone query for the cache and
+            retrieval. The caller records the new turn with memory.add_turn()
+        
+    Yields:
+        Answer text chunks
+    """
+    metrics = metrics if metrics is not None else {}
+    metrics["coalesced"] = False
+    single_flight = get_single_flight()
+    key = _flight_key(question, memory) if single_flight is not None else None
+    if key is None:
+        yield from _stream_answer(question, metrics, memory)
+        return
+    
+    start_time = time.time()
+    flight, started = single_flight.run(key, lambda flight_metrics: _stream_answer(question, flight_metrics))
+    for chunk in flight.iter_chunks():
+        if "time_to_first_token" not in metrics:
+            metrics["time_to_first_token"] = time.time() - start_time
+        yield chunk
+    if started:
+        metrics.update(flight.metrics)
+    else:
+        _join_metrics(metrics, flight, question, start_time)
+
+
+def _stream_answer(question: str, metrics: dict, memory: ConversationMemory = None):
+    """Answer one question (see stream_ask())."""
+    start_time = time.time()
+    metrics["cached"] = False
+    pipeline = get_pipeline()
+    # Finished explicitly: a span cannot stay active across the yields below
+    request_span = span("request")
+    
+    try:
+        with request_span.activate():
+            query = metrics["query"] = condense_question(question, memory, pipeline.llm)
+            answer = _lookup_precomputed_answer(query)
+            precomputed = answer is not None
+            if not precomputed:
+                answer, store_answer = _lookup_cached_answer(pipeline, query)
+        if answer is not None:
+            metrics["cached"] = True
+            metrics["precomputed"] = precomputed
+            metrics["time_to_first_token"] = time.time() - start_time
+            request_span.set(cached=True, precomputed=precomputed)
+            yield from simulated_stream(answer) if precomputed else [answer]
+            metrics["total_time"] = time.time() - start_time
+            return
+        
+        with request_span.activate():
+            inputs = prepare_inputs(query, pipeline.retriever, pipeline.reranker)
+        _with_history(inputs, question, memory)
+        metrics["retrieval_time"] = time.time() - start_time
+        
+        chunks = []
+        for chunk in pipeline.generation_chain.stream(inputs, config=llm_config(request_span)):
+            if not chunks:
+                metrics["time_to_first_token"] = time.time() - start_time
+                logger.info(f"Time to first token: {metrics['time_to_first_token']:.2f}s")
+            chunks.append(chunk)
+            yield chunk
+        
+        metrics["total_time"] = time.time() - start_time
+        request_span.set(cached=False, language=inputs["language"], answer_chars=sum(map(len, chunks)))
+    finally:
+        request_span.finish()
+    llm_time = metrics["total_time"] - metrics["retrieval_time"]
+    if inputs["partition"]:
+        partition_stats.record_llm(inputs["partition"], llm_time)
+    if pipeline.reranker is not None:
+        pipeline.reranker.stats.record_llm(inputs["reranked"], llm_time)
+    store_answer("".join(chunks))
+
+
+def answer_question(question: str) -> str:
+    """Answer a question, serving close paraphrases from the answer cache."""
+    return "".join(stream_ask(question))
+
+
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+
+async def run_blocking(func, *args):
+    """Run a CPU/IO-bound call (embedding, vector search) on the bounded retrieval pool."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (the active tracing span) over to the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_retrieval_executor, context.run, func, *args)
+
+
+async def astream_ask(question: str, metrics: dict = None, memory: ConversationMemory = None):
+    """
+    Async version of stream_ask() for event-loop servers.
+    
+    Embedding and vector search run on the bounded retrieval thread pool so
+    they never block the event loop; generation uses the chain's astream().
+    """
+    metrics = metrics if metrics is not None else {}
+    metrics["coalesced"] = False
+    single_flight = get_single_flight()
+    key = _flight_key(question, memory) if single_flight is not None else None
+    if key is None:
+        async for chunk in _astream_answer(question, metrics, memory):
+            yield chunk
+        return
+    
+    start_time = time.time()
+    flight, started = await single_flight.arun(key, lambda flight_metrics: _astream_answer(question, flight_metrics))
+    async for chunk in flight.aiter_chunks():
+        if "time_to_first_token" not in metrics:
+            metrics["time_to_first_token"] = time.time() - start_time
+        yield chunk
+    if started:
+        metrics.update(flight.metrics)
+    else:
+        _join_metrics(metrics, flight, question, start_time)
+
+
+async def _astream_answer(question: str, metrics: dict, memory: ConversationMemory = None):
+    """Answer one question (see astream_ask())."""
+    start_time = time.time()
+    metrics["cached"] = False
+    pipeline = await run_blocking(get_pipeline)
+    request_span = span("request")
+    
+    try:
+        with request_span.activate():
+            query = metrics["query"] = await run_blocking(condense_question, question, memory, pipeline.llm)
+            answer = _lookup_precomputed_answer(query)
+            precomputed = answer is not None
+            if not precomputed:
+                answer, store_answer = await run_blocking(_lookup_cached_answer, pipeline, query)
+        if answer is not None:
+            metrics["cached"] = True
+            metrics["precomputed"] = precomputed
+            metrics["time_to_first_token"] = time.time() - start_time
+            request_span.set(cached=True, precomputed=precomputed)
+            if precomputed:
+                async for chunk in asimulated_stream(answer):
+                    yield chunk
+            else:
+                yield answer
+            metrics["total_time"] = time.time() - start_time
+            return
+        
+        with request_span.activate():
+            inputs = await run_blocking(prepare_inputs, query, pipeline.retriever, pipeline.reranker)
+        _with_history(inputs, question, memory)
+        metrics["retrieval_time"] = time.time() - start_time
+        
+        chunks = []
+        async for chunk in pipeline.generation_chain.astream(inputs, config=llm_config(request_span)):
+            if not chunks:
+                metrics["time_to_first_token"] = time.time() - start_time
+                logger.info(f"Time to first token: {metrics['time_to_first_token']:.2f}s")
+            chunks.append(chunk)
+            yield chunk
+        
+        metrics["total_time"] = time.time() - start_time
+        request_span.set(cached=False, language=inputs["language"], answer_chars=sum(map(len, chunks)))
+    finally:
+        request_span.finish()
+    llm_time = metrics["total_time"] - metrics["retrieval_time"]
+    if inputs["partition"]:
+        partition_stats.record_llm(inputs["partition"], llm_time)
+    if pipeline.reranker is not None:
+        pipeline.reranker.stats.record_llm(inputs["reranked"], llm_time)
+    store_answer("".join(chunks))
+
+
+async def aask(question: str, metrics: dict = None, memory: ConversationMemory = None) -> str:
+    """Async version of simple_ask()."""
+    chunks = [chunk async for chunk in astream_ask(question, metrics, memory)]
+    return "".join(chunks)
+
+
 def ask(question: str, chat_history: list = None) -> dict:
     """
     Ask a question to the CloudWalk Helper.
     
     Args:
         question: The user's question
-        chat_history: Optional list of previous messages
+        chat_history: Optional list of previous messages (LangChain messages
+            or {'role', 'content'} dicts); older turns are summarized so the
+            prompt stays bounded, reusing the summary from the previous
+            call with the same history so only new turns cost an LLM call
         
     Returns:
         Dictionary with 'answer' key
     """
-    chain = create_rag_chain()
-    
-    # LCEL chain takes the question directly
-    result = chain.invoke(question)
+    memory = None
+    if chat_history:
+        memory = ConversationMemory.from_messages(chat_history, get_pipeline().llm,
+                                                  summary_cache=get_summary_cache())
+    result = "".join(stream_ask(question, memory=memory))
     
     return {
         "answer": result if isinstance(result, str) else str(result),
@@ -212,8 +627,7 @@ def simple_ask(question: str) -> str:
     start_time = time.time()
     logger.info(f"=== New Question ===")
     
-    chain = create_rag_chain()
-    result = chain.invoke(question)
+    result = answer_question(question)
     
     total_time = time.time() - start_time
     logger.info(f"Total response time: {total_time:.2f}s")
@@ -0,0 +1,187 @@
+"""
+Cross-encoder reranking for CloudWalk Helper.
+Over-fetched retrieval candidates are scored against the question by a
+small local cross-encoder on CPU, and only the best few are sent to the
+LLM, which shrinks the prompt without losing the relevant chunks.
+
+Enabled with RERANK_ENABLED=true.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from .hybrid import document_key
+
+logger = logging.getLogger("CloudWalkHelper.Reranker")
+
+# Configuration
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "16"))  # Chunks retrieved for scoring
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "3"))  # Chunks kept for the LLM
+RERANK_TIME_BUDGET = float(os.getenv("RERANK_TIME_BUDGET", "0.25"))  # Seconds per question
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))  # (question, chunk) scores kept
+
+
+def query_hash(query: str) -> str:
+    """Cache key for a question: whitespace- and case-insensitive."""
+    return hashlib.sha1(" ".join(query.lower().split()).encode("utf-8")).hexdigest()
+
+
+class RerankStats:
+    """What reranking costs (its own latency) against what it saves (LLM time on shorter prompts)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.reranked = 0
+        self.skipped = 0
+        self.pairs_scored = 0
+        self.cache_hits = 0
+        self.rerank_time = 0.0
+        self.chars_removed = 0
+        # LLM time, split by whether the question's context was reranked
+        self.llm = {True: [0, 0.0], False: [0, 0.0]}
+
+    def record_rerank(self, elapsed: float, scored: int, hits: int, chars_removed: int):
+        with self._lock:
+            self.reranked += 1
+            self.pairs_scored += scored
+            self.cache_hits += hits
+            self.rerank_time += elapsed
+            self.chars_removed += chars_removed
+
+    def record_skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def record_llm(self, reranked: bool, elapsed: float):
+        with self._lock:
+            self.llm[reranked][0] += 1
+            self.llm[reranked][1] += elapsed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg_llm = {flag: (total / count if count else None) for flag, (count, total) in self.llm.items()}
+            saved = None
+            if avg_llm[True] is not None and avg_llm[False] is not None:
+                saved = avg_llm[False] - avg_llm[True]
+            return {
+                "reranked": self.reranked,
+                "skipped": self.skipped,
+                "pairs_scored": self.pairs_scored,
+                "cache_hits": self.cache_hits,
+                "avg_rerank_time": self.rerank_time / self.reranked if self.reranked else 0.0,
+                "avg_chars_removed": self.chars_removed / self.reranked if self.reranked else 0.0,
+                "avg_llm_time_reranked": avg_llm[True],
+                "avg_llm_time_not_reranked": avg_llm[False],
+                "llm_time_saved": saved,
+            }
+
+
+class Reranker:
+    """
+    Scores (question, chunk) pairs with a cross-encoder and keeps the top-n.
+
+    Scores are cached per (question hash, chunk id) in an LRU, so repeated
+    questions only score chunks they have not seen. If scoring the uncached
+    pairs is predicted to exceed `time_budget` (from the measured per-pair
+    cost), reranking is skipped and retrieval order is kept.
+    """
+
+    def __init__(self, model=None, model_name: str = RERANK_MODEL, top_n: int = RERANK_TOP_N,
+                 time_budget: float = RERANK_TIME_BUDGET, cache_size: int = RERANK_CACHE_SIZE):
+        self.model_name = model_name
+        self.top_n = top_n
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self.stats = RerankStats()
+        self._model = model
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._seconds_per_pair = None  # Moving average, learned from real batches
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first use."""
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            start_time = time.time()
+            self._model = CrossEncoder(self.model_name, device="cpu")
+            logger.info(f"Loaded reranker {self.model_name} in {time.time() - start_time:.2f}s")
+        return self._model
+
+    def rerank(self, query: str, docs, fallback_k: int = None) -> tuple:
+        """
+        Order docs by cross-encoder score and keep the top-n.
+
+        Args:
+            query: The user's question
+            docs: Over-fetched candidates in retrieval order
+            fallback_k: How many docs to keep, in retrieval order, when reranking is skipped
+
+        Returns:
+            (documents, whether they were reranked)
+        """
+        docs = list(docs)
+        if len(docs) <= self.top_n:
+            return docs, False
+
+        start_time = time.time()
+        qhash = query_hash(query)
+        keys = [(qhash, document_key(doc)) for doc in docs]
+        with self._lock:
+            scores = [self._cache.get(key) for key in keys]
+            for key, score in zip(keys, scores):
+                if score is not None:
+                    self._cache.move_to_end(key)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing and self._seconds_per_pair is not None \
+                and len(missing) * self._seconds_per_pair > self.time_budget:
+            logger.info(f"Skipping rerank: ~{len(missing) * self._seconds_per_pair * 1000:.0f}ms "
+                        f"for {len(missing)} pairs exceeds the {self.time_budget * 1000:.0f}ms budget")
+            self.stats.record_skip()
+            # Let the estimate decay so one slow batch doesn't disable reranking for good
+            self._seconds_per_pair *= 0.9
+            return docs[:fallback_k] if fallback_k else docs, False
+
+        if missing:
+            batch_start = time.time()
+            predicted = self.model.predict([(query, docs[i].page_content) for i in missing],
+                                           batch_size=len(missing), show_progress_bar=False)
+            per_pair = (time.time() - batch_start) / len(missing)
+            self._seconds_per_pair = per_pair if self._seconds_per_pair is None \
+                else 0.8 * self._seconds_per_pair + 0.2 * per_pair
+            with self._lock:
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)[:self.top_n]
+        kept = [docs[i] for i in order]
+        elapsed = time.time() - start_time
+        removed = sum(len(doc.page_content) for doc in docs) - sum(len(doc.page_content) for doc in kept)
+        self.stats.record_rerank(elapsed, len(missing), len(docs) - len(missing), removed)
+        logger.info(f"Reranked {len(docs)} chunks to {len(kept)} in {elapsed * 1000:.0f}ms "
+                    f"({len(docs) - len(missing)} cached scores, {removed} chars removed)")
+        return kept, True
+
+
+def get_reranker():
+    """A warmed-up reranker, or None unless RERANK_ENABLED=true."""
+    if not RERANK_ENABLED:
+        return None
+    reranker = Reranker()
+    # The first CPU inference is much slower than the rest; keep it out of the per-pair estimate
+    reranker.model.predict([("warmup", "warmup")], show_progress_bar=False)
+    return reranker
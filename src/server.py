@@ -0,0 +1,204 @@
+"""
+HTTP API for CloudWalk Helper.
+Serves the same RAG pipeline as the Streamlit UI over ASGI so other
+services can call it and several instances can sit behind a load balancer.
+
+Run with: python -m src.server
+"""
+
+import os
+import json
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from .language import get_partition_stats
+from .llm_scheduler import QueueStatus, llm_admission
+from .precompute import get_precomputed_answers
+from .rag_chain import aask, astream_ask, detect_language, get_pipeline, run_blocking
+from .singleflight import get_single_flight
+from .tracing import metrics as span_metrics, render_metrics
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Server")
+
+# Configuration
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))  # Worker processes
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "32"))  # Questions in flight per process
+SERVER_SIDECAR = os.getenv("SERVER_SIDECAR", "false").lower() == "true"  # One shared model/index for all workers
+
+_concurrency = asyncio.Semaphore(SERVER_MAX_CONCURRENCY)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Build the pipeline before accepting traffic so no request pays for it."""
+    try:
+        await run_blocking(get_pipeline)
+    except Exception as e:
+        logger.warning(f"Pipeline warmup failed: {e}")
+    yield
+
+
+async def _read_question(request: Request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        return None
+    question = payload.get("question") if isinstance(payload, dict) else None
+    if not isinstance(question, str) or not question.strip():
+        return None
+    return question.strip()
+
+
+def _busy(error: Exception, status: QueueStatus) -> dict:
+    """Body for a question the LLM queue could not take in time."""
+    return {"error": str(error), "queue_position": status.position, "eta": status.eta}
+
+
+async def _with_queue_events(stream, status: QueueStatus):
+    """
+    Server-sent token events, preceded by 'queued' events with the queue
+    position and ETA while the question waits for LLM capacity.
+    """
+    iterator = stream.__aiter__()
+    first = asyncio.ensure_future(iterator.__anext__())
+    last = None
+    while not (await asyncio.wait({first}, timeout=0.5))[0]:
+        if status.position is not None and (status.position, round(status.eta or 0)) != last:
+            last = (status.position, round(status.eta or 0))
+            yield f"event: queued\ndata: {json.dumps({'position': status.position, 'eta': status.eta})}\n\n"
+    try:
+        chunk = first.result()
+    except StopAsyncIteration:
+        return
+    yield f"data: {json.dumps({'token': chunk})}\n\n"
+    async for chunk in iterator:
+        yield f"data: {json.dumps({'token': chunk})}\n\n"
+
+
+async def ask_endpoint(request: Request):
+    """POST /ask {"question": ...} -> {"answer", "language", "metrics"}"""
+    question = await _read_question(request)
+    if question is None:
+        return JSONResponse({"error": "Body must be JSON with a non-empty 'question'"}, status_code=400)
+
+    metrics = {}
+    status = QueueStatus()
+    async with _concurrency:
+        try:
+            with llm_admission("interactive", status=status):
+                answer = await aask(question, metrics)
+        except TimeoutError as e:
+            logger.warning(f"Question turned away by the LLM queue: {e}")
+            return JSONResponse(_busy(e, status), status_code=503,
+                                headers={"Retry-After": str(int(status.eta or 0) + 1)})
+        except Exception as e:
+            logger.error(f"Error answering question: {e}")
+            return JSONResponse({"error": str(e)}, status_code=500)
+    return JSONResponse({
+        "answer": answer,
+        "language": detect_language(question),
+        "metrics": metrics
+    })
+
+
+async def ask_stream_endpoint(request: Request):
+    """POST /ask/stream {"question": ...} -> server-sent events with answer tokens."""
+    question = await _read_question(request)
+    if question is None:
+        return JSONResponse({"error": "Body must be JSON with a non-empty 'question'"}, status_code=400)
+
+    async def events():
+        metrics = {}
+        status = QueueStatus()
+        async with _concurrency:
+            try:
+                with llm_admission("interactive", status=status):
+                    async for event in _with_queue_events(astream_ask(question, metrics), status):
+                        yield event
+            except TimeoutError as e:
+                logger.warning(f"Question turned away by the LLM queue: {e}")
+                yield f"event: busy\ndata: {json.dumps(_busy(e, status))}\n\n"
+                return
+            except Exception as e:
+                logger.error(f"Error streaming answer: {e}")
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+        yield f"event: done\ndata: {json.dumps({'metrics': metrics})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def health_endpoint(request: Request):
+    """GET /health"""
+    return JSONResponse({"status": "ok", "time": time.time()})
+
+
+async def stats_endpoint(request: Request):
+    """GET /stats -> statistics per language partition, reranking cost/savings, LLM provider health, precomputed answers, coalesced questions, embedding sidecar and span timings"""
+    from . import sidecar
+
+    pipeline = await run_blocking(get_pipeline)
+    precomputed = get_precomputed_answers()
+    single_flight = get_single_flight()
+    sidecar_stats = None
+    if sidecar.EMBEDDING_SIDECAR_SOCKET:
+        sidecar_stats = await run_blocking(sidecar.get_sidecar_client().call, {"op": "stats"})
+    return JSONResponse({
+        "partitions": get_partition_stats(),
+        "rerank": pipeline.reranker.stats.snapshot() if pipeline.reranker is not None else None,
+        "llm": pipeline.llm.snapshot() if hasattr(pipeline.llm, "snapshot") else None,
+        "precomputed": precomputed.stats() if precomputed is not None else None,
+        "coalescing": single_flight.stats() if single_flight is not None else None,
+        "sidecar": sidecar_stats,
+        "spans": span_metrics.snapshot()
+    })
+
+
+async def metrics_endpoint(request: Request):
+    """GET /metrics -> per-stage span histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(
+    routes=[
+        Route("/ask", ask_endpoint, methods=["POST"]),
+        Route("/ask/stream", ask_stream_endpoint, methods=["POST"]),
+        Route("/health", health_endpoint, methods=["GET"]),
+        Route("/stats", stats_endpoint, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logger.info(f"Starting API on {SERVER_HOST}:{SERVER_PORT} "
+                f"({SERVER_WORKERS} workers, {SERVER_MAX_CONCURRENCY} concurrent questions each)")
+    sidecar_process = None
+    if SERVER_SIDECAR:
+        from .sidecar import DEFAULT_SOCKET, EMBEDDING_SIDECAR_SOCKET, start_sidecar
+        socket_path = EMBEDDING_SIDECAR_SOCKET or DEFAULT_SOCKET
+        sidecar_process = start_sidecar(socket_path)
+        os.environ["EMBEDDING_SIDECAR_SOCKET"] = socket_path  # Inherited by the workers
+        logger.info(f"Workers share the embedding sidecar on {socket_path}")
+    try:
+        uvicorn.run("src.server:app", host=SERVER_HOST, port=SERVER_PORT, workers=SERVER_WORKERS)
+    finally:
+        if sidecar_process is not None:
+            sidecar_process.terminate()
+            sidecar_process.wait(timeout=10)
@@ -0,0 +1,407 @@
+"""
+Embedding/search sidecar for CloudWalk Helper.
+In multi-worker mode one sidecar process owns the embedding model and the
+vector index and serves every worker process over a local Unix socket, so
+the model and the vectors are loaded once per node instead of once per
+worker. Concurrent embedding requests from all workers are coalesced into
+batches of up to SIDECAR_MAX_BATCH texts within SIDECAR_BATCH_WINDOW.
+
+Workers opt in with EMBEDDING_SIDECAR_SOCKET: get_embeddings() and
+get_vector_store() then return thin clients (SidecarEmbeddings and
+SidecarVectorStore) that never import the model. `python -m src.server`
+starts the sidecar itself with SERVER_SIDECAR=true.
+
+Run with: python -m src.sidecar [--socket /tmp/cloudwalk_helper_sidecar.sock]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import base64
+import socket
+import struct
+import logging
+import tempfile
+import threading
+import socketserver
+import subprocess
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .hybrid import dense_search_by_vector
+from .tracing import span
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Sidecar")
+
+# Configuration
+EMBEDDING_SIDECAR_SOCKET = os.getenv("EMBEDDING_SIDECAR_SOCKET")  # Set in workers to use the sidecar
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "cloudwalk_helper_sidecar.sock")
+SIDECAR_BATCH_WINDOW = float(os.getenv("SIDECAR_BATCH_WINDOW", "0.002"))  # Seconds to wait for more texts
+SIDECAR_MAX_BATCH = int(os.getenv("SIDECAR_MAX_BATCH", "64"))  # Texts per model call
+SIDECAR_TIMEOUT = float(os.getenv("SIDECAR_TIMEOUT", "30"))  # Seconds per request
+SIDECAR_START_TIMEOUT = float(os.getenv("SIDECAR_START_TIMEOUT", "300"))  # Model download and index sync
+
+_HEADER = struct.Struct(">I")
+
+
+def _send(sock, message: dict):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Sidecar connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def _recv(sock) -> dict:
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def encode_vectors(vectors) -> dict:
+    """float32 matrix as base64, about a quarter of the size of a JSON list of floats."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    return {"shape": list(matrix.shape), "data": base64.b64encode(matrix.tobytes()).decode("ascii")}
+
+
+def decode_vectors(payload: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+
+def _rss_mb() -> float:
+    """Resident set size of the sidecar in MB (Linux), falling back to peak RSS."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _encode_hits(hits) -> list:
+    return [{"id": doc.id, "text": doc.page_content, "metadata": doc.metadata, "score": float(score)} for doc, score in hits]
+
+
+def _decode_hits(hits) -> list:
+    return [(Document(id=hit["id"], page_content=hit["text"], metadata=hit["metadata"]), hit["score"])
+            for hit in hits]
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from many connections into batched model calls.
+
+    The first request opens a batch; requests arriving within `window`
+    seconds join it, up to `max_batch` texts. Queries are embedded like
+    documents, which gives the same vectors for the MiniLM models used here.
+    """
+
+    def __init__(self, embeddings, window: float = SIDECAR_BATCH_WINDOW, max_batch: int = SIDECAR_MAX_BATCH):
+        self.embeddings = embeddings
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="sidecar-batcher", daemon=True).start()
+
+    def embed(self, texts: list) -> np.ndarray:
+        future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.window
+            while size < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32) if texts else []
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+class _SidecarHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = _recv(self.connection)
+            except (ConnectionError, OSError):
+                return
+            try:
+                response = self.server.dispatch(request)
+            except Exception as e:
+                logger.warning(f"Sidecar request {request.get('op')} failed: {e}")
+                response = {"error": f"{type(e).__name__}: {e}"}
+            _send(self.connection, response)
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves embedding and search requests for one embeddings model and vector store."""
+
+    daemon_threads = True
+    request_queue_size = 128  # Every worker thread connects at once after a restart; the default 5 refuses some
+
+    def __init__(self, socket_path: str, embeddings, vector_store):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Left over from a sidecar that did not shut down cleanly
+        super().__init__(socket_path, _SidecarHandler)
+        self.socket_path = socket_path
+        self.vector_store = vector_store
+        self.batcher = EmbeddingBatcher(embeddings)
+        self.requests = 0
+
+    def dispatch(self, request: dict) -> dict:
+        self.requests += 1
+        op = request["op"]
+        if op == "embed":
+            return {"vectors": encode_vectors(self.batcher.embed(request["texts"]))}
+        if op == "search":
+            vector = decode_vectors(request["vector"]) if "vector" in request else \
+                self.batcher.embed([request["query"]])[0]
+            hits = dense_search_by_vector(self.vector_store, vector, request.get("k", 4), request.get("filter"))
+            return {"hits": _encode_hits(hits)}
+        if op == "search_batch":
+            vectors = decode_vectors(request["vectors"])
+            k = request.get("k", 4)
+            if hasattr(self.vector_store, "search_batch"):
+                results = self.vector_store.search_batch(vectors, k)
+            else:
+                results = [dense_search_by_vector(self.vector_store, vector, k) for vector in vectors]
+            return {"results": [_encode_hits(hits) for hits in results]}
+        if op == "info":
+            snapshot_dir = getattr(self.vector_store, "snapshot_dir", None)
+            return {"pid": os.getpid(), "snapshot_dir": str(snapshot_dir) if snapshot_dir else None}
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"Unknown operation {op!r}")
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batcher.batches,
+            "texts": self.batcher.texts,
+            "avg_batch": round(self.batcher.texts / self.batcher.batches, 2) if self.batcher.batches else 0.0,
+            "largest_batch": self.batcher.largest_batch,
+            "rss_mb": round(_rss_mb(), 1),
+        }
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class SidecarClient:
+    """Worker-side connection to the sidecar: one socket per thread, reconnecting once if it drops."""
+
+    def __init__(self, socket_path: str, timeout: float = SIDECAR_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def call(self, request: dict) -> dict:
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    sock.settimeout(self.timeout)
+                    sock.connect(self.socket_path)
+                    self._local.sock = sock
+                _send(sock, request)
+                response = _recv(sock)
+                break
+            except OSError:
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Sidecar {request['op']} failed: {response['error']}")
+        return response
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_sidecar_client() -> SidecarClient:
+    """Get the process-wide client for EMBEDDING_SIDECAR_SOCKET."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SidecarClient(EMBEDDING_SIDECAR_SOCKET)
+        return _client
+
+
+class SidecarEmbeddings(Embeddings):
+    """Embeddings computed by the sidecar's model."""
+
+    def __init__(self, client: SidecarClient):
+        self.client = client
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        with span("embedding", texts=len(texts)):
+            response = self.client.call({"op": "embed", "texts": list(texts)})
+        return decode_vectors(response["vectors"]).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class SidecarVectorStore(VectorStore):
+    """
+    Read-only view of the sidecar's vector index.
+
+    Text searches are embedded and searched in one round trip. The index is
+    synced by the sidecar when it starts; workers cannot add or delete.
+    """
+
+    def __init__(self, client: SidecarClient):
+        self.client = client
+        self._embedding = SidecarEmbeddings(client)
+        info = client.call({"op": "info"})
+        # A snapshot's manifest and BM25 index are read from disk by the workers' retrievers
+        self.snapshot_dir = Path(info["snapshot_dir"]) if info["snapshot_dir"] else None
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        with span("vector_search", k=k, filtered=bool(filter)):
+            response = self.client.call({"op": "search", "query": query, "k": k, "filter": filter})
+        return _decode_hits(response["hits"])
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        with span("vector_search", k=k, filtered=bool(filter)):
+            response = self.client.call({"op": "search", "vector": encode_vectors(embedding), "k": k,
+                                         "filter": filter})
+        return _decode_hits(response["hits"])
+
+    def search_batch(self, embeddings, k=4):
+        """Top-k for many query vectors in one round trip (see NumpyVectorStore.search_batch)."""
+        response = self.client.call({"op": "search_batch", "vectors": encode_vectors(embeddings), "k": k})
+        return [_decode_hits(hits) for hits in response["results"]]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score  # The sidecar converts every backend's scores to cosine similarity
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("The sidecar's index is read-only for workers; it syncs data/ when it starts")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Start a sidecar with `python -m src.sidecar` instead")
+
+    def stats(self) -> dict:
+        return self.client.call({"op": "stats"})
+
+
+def start_sidecar(socket_path: str = DEFAULT_SOCKET, timeout: float = SIDECAR_START_TIMEOUT):
+    """
+    Start `python -m src.sidecar` as a subprocess and wait until it accepts connections.
+
+    Returns:
+        The subprocess.Popen handle (terminate it on shutdown)
+    """
+    env = {key: value for key, value in os.environ.items() if key != "EMBEDDING_SIDECAR_SOCKET"}
+    process = subprocess.Popen([sys.executable, "-m", "src.sidecar", "--socket", socket_path],
+                               cwd=str(Path(__file__).parent.parent), env=env)
+    client = SidecarClient(socket_path, timeout=1.0)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            client.call({"op": "info"})
+            return process
+        except OSError:
+            if process.poll() is not None or time.time() > deadline:
+                process.kill()
+                raise RuntimeError(f"Embedding sidecar did not start on {socket_path}")
+            time.sleep(0.2)
+
+
+def serve(socket_path: str = DEFAULT_SOCKET, embeddings=None, vector_store=None):
+    """Load the model and index (unless given) and serve them on `socket_path` until interrupted."""
+    from . import sidecar
+    from .embeddings import get_embeddings, get_vector_store
+
+    sidecar.EMBEDDING_SIDECAR_SOCKET = None  # This process owns the model, it must not call itself
+    start_time = time.time()
+    if embeddings is None:
+        embeddings = get_embeddings()
+    if vector_store is None:
+        vector_store = get_vector_store(embeddings)
+    embeddings.embed_query("warmup")
+    server = SidecarServer(socket_path, embeddings, vector_store)
+    logger.info(f"Embedding sidecar ready on {socket_path} in {time.time() - start_time:.1f}s "
+                f"(pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Serve the embedding model and vector index to worker processes")
+    parser.add_argument("--socket", default=EMBEDDING_SIDECAR_SOCKET or DEFAULT_SOCKET)
+    args = parser.parse_args()
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+    serve(args.socket)
@@ -0,0 +1,213 @@
+"""
+Request coalescing for CloudWalk Helper.
+When many sessions submit the same question at the same moment (e.g. a
+popular quick-action button), only one retrieval and LLM generation runs:
+every concurrent duplicate attaches to that in-flight answer and receives
+the same token stream, or the same error.
+
+The answer is produced by a background producer (a thread for stream_ask(),
+a task on the event loop for astream_ask()), so a session that goes away
+mid-stream doesn't cut the answer off for the others still reading it.
+"""
+
+import os
+import asyncio
+import contextvars
+import logging
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.SingleFlight")
+
+# Configuration
+COALESCE_QUESTIONS = os.getenv("COALESCE_QUESTIONS", "true").lower() == "true"
+
+
+class Flight:
+    """
+    One answer being generated, readable by any number of requests.
+
+    Chunks are kept for the flight's lifetime so a request that joins late
+    still gets the whole answer from the first token.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.metrics = {}  # Filled in by the producer, like stream_ask()'s metrics
+        self._cond = threading.Condition()
+        self._async_waiters = []
+
+    def publish(self, chunk: str):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._wake()
+
+    def finish(self, error: BaseException = None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._wake()
+
+    def _wake(self):
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # The waiter's event loop has closed
+        self._async_waiters = []
+
+    def _read(self, index: int, waiter=None):
+        """Chunks from `index` on and whether the flight is over; registers `waiter` if there is nothing new."""
+        with self._cond:
+            chunks = self.chunks[index:]
+            if waiter is not None and not chunks and not self.done:
+                self._async_waiters.append(waiter)
+            return chunks, self.done, self.error
+
+    def iter_chunks(self):
+        """Yield the answer's chunks as they are produced; raises the producer's error."""
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self.chunks) > index or self.done)
+            chunks, done, error = self._read(index)
+            yield from chunks
+            index += len(chunks)
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+    async def aiter_chunks(self):
+        """Async version of iter_chunks() that waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        index = 0
+        while True:
+            event = asyncio.Event()
+            chunks, done, error = self._read(index, (loop, event))
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if chunks:
+                continue
+            if done:
+                if error is not None:
+                    raise error
+                return
+            await event.wait()
+
+
+class SingleFlight:
+    """
+    Registry of in-flight answers by key.
+
+    A flight is removed when its answer is complete; questions that arrive
+    after that start a new one (and are typically served by the answer cache).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._tasks = set()  # Keeps async producers alive until they finish
+        self.flights = 0
+        self.coalesced = 0
+        self.llm_calls_saved = 0
+        self.errors = 0
+
+    def _join(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight(key)
+            self.flights += 1
+            return flight, True
+
+    def run(self, key, produce):
+        """
+        Join the flight for `key`, starting it with `produce(metrics)` (a chunk iterator) if there is none.
+
+        Returns:
+            (flight, True if this call started it)
+        """
+        flight, started = self._join(key)
+        if started:
+            context = contextvars.copy_context()  # The caller's tracing span
+            threading.Thread(target=context.run, args=(self._produce, flight, produce),
+                             name="singleflight", daemon=True).start()
+        return flight, started
+
+    async def arun(self, key, produce):
+        """Async version of run(); `produce(metrics)` is an async chunk iterator run as a task."""
+        flight, started = self._join(key)
+        if started:
+            task = asyncio.get_running_loop().create_task(self._aproduce(flight, produce))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return flight, started
+
+    def _produce(self, flight: Flight, produce):
+        try:
+            for chunk in produce(flight.metrics):
+                flight.publish(chunk)
+        except Exception as e:
+            self._finish(flight, e)
+        else:
+            self._finish(flight)
+
+    async def _aproduce(self, flight: Flight, produce):
+        try:
+            async for chunk in produce(flight.metrics):
+                flight.publish(chunk)
+        except Exception as e:
+            self._finish(flight, e)
+        else:
+            self._finish(flight)
+
+    def _finish(self, flight: Flight, error: BaseException = None):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            if error is not None:
+                self.errors += 1
+                logger.warning(f"Answer failed for {flight.followers + 1} coalesced requests: {error}")
+            elif not flight.metrics.get("cached"):
+                self.llm_calls_saved += flight.followers
+        flight.finish(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flights": self.flights,
+                "coalesced": self.coalesced,
+                "llm_calls_saved": self.llm_calls_saved,
+                "errors": self.errors,
+                "in_flight": len(self._flights),
+            }
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Get the process-wide registry, or None when COALESCE_QUESTIONS is off."""
+    global _single_flight
+    if not COALESCE_QUESTIONS:
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
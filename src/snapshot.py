@@ -0,0 +1,215 @@
+"""
+Prebuilt index snapshots for CloudWalk Helper.
+Exports the whole index - normalized vectors, chunk texts and metadata, the
+indexer manifest and the BM25 index - as a versioned, checksummed directory
+at build time (e.g. in the Docker image), so a fresh container opens it
+memory-mapped and read-only instead of embedding the corpus on first start.
+
+A snapshot built with a different embedding model or chunking config is
+refused; one built from a different data/ is ignored and the index is
+synced as usual.
+
+Startup only checks the snapshot's format and file sizes, so the vectors are
+not read until they are searched; `verify` checksums every file (e.g. in CI).
+
+Run with: python -m src.snapshot export [--out index_snapshot]
+          python -m src.snapshot load [index_snapshot]
+          python -m src.snapshot verify [index_snapshot]
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from .embeddings import embedding_id, knowledge_base_hash
+from .hybrid import BM25_FILE
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("CloudWalkHelper.Snapshot")
+
+# Configuration
+VECTOR_SNAPSHOT_DIR = Path(os.getenv("VECTOR_SNAPSHOT_DIR", str(Path(__file__).parent.parent / "index_snapshot")))
+VECTOR_SNAPSHOT_VERIFY = os.getenv("VECTOR_SNAPSHOT_VERIFY", "false").lower() == "true"  # Checksum files at startup
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FILE = "snapshot.json"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(out_dir: Path = None, embeddings=None, data_dir: Path = None) -> dict:
+    """
+    Index data/ from scratch and write the snapshot to `out_dir`.
+
+    The snapshot is assembled in a temporary directory next to `out_dir`
+    and swapped in at the end, so a failed export leaves the old one intact.
+
+    Returns:
+        The snapshot description written to snapshot.json
+    """
+    from .embeddings import DATA_DIR, get_embeddings
+    from .hybrid import load_or_build_bm25_index
+    from .indexer import MANIFEST_NAME, _index_config, sync_vector_store
+    from .vector_index import METADATA_FILE, VECTORS_FILE, NumpyVectorStore
+
+    out_dir = Path(out_dir or VECTOR_SNAPSHOT_DIR)
+    data_dir = data_dir or DATA_DIR
+    if embeddings is None:
+        embeddings = get_embeddings()
+
+    start_time = time.time()
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix=".snapshot_", dir=out_dir.parent))
+    try:
+        store = NumpyVectorStore(embeddings, persist_directory=build_dir)
+        report = sync_vector_store(store, manifest_path=build_dir / MANIFEST_NAME, data_dir=data_dir, full=True)
+        load_or_build_bm25_index(build_dir / MANIFEST_NAME, data_dir=data_dir)
+
+        files = [VECTORS_FILE, METADATA_FILE, MANIFEST_NAME, BM25_FILE]
+        info = {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": time.time(),
+            "embedding_model": embedding_id(),
+            "index_config": _index_config(),
+            "kb_hash": knowledge_base_hash(),
+            "rows": len(store),
+            "dim": int(store.matrix.shape[1]) if len(store) else 0,
+            "sizes": {name: (build_dir / name).stat().st_size for name in files},
+            "checksums": {name: _sha256(build_dir / name) for name in files},
+        }
+        (build_dir / SNAPSHOT_FILE).write_text(json.dumps(info, indent=1), encoding="utf-8")
+
+        if out_dir.exists():
+            old_dir = out_dir.with_name(out_dir.name + ".old")
+            shutil.rmtree(old_dir, ignore_errors=True)
+            out_dir.rename(old_dir)
+            build_dir.rename(out_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            build_dir.rename(out_dir)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    logger.info(f"Exported snapshot of {info['rows']} chunks ({report.chunks_added} embedded) "
+                f"to {out_dir} in {time.time() - start_time:.1f}s")
+    return info
+
+
+def read_snapshot_info(snapshot_dir: Path, verify: bool = VECTOR_SNAPSHOT_VERIFY) -> dict:
+    """
+    Read and validate snapshot.json.
+
+    Raises:
+        ValueError: Unknown format, different embedding model or chunking
+            config, a missing or truncated file, or (with `verify`) a file
+            whose checksum does not match
+    """
+    from .indexer import _index_config
+
+    try:
+        info = json.loads((snapshot_dir / SNAPSHOT_FILE).read_text(encoding="utf-8"))
+    except OSError as e:
+        raise ValueError(f"No readable snapshot at {snapshot_dir}: {e}")
+    if info.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Snapshot format {info.get('format')} is not supported (expected {SNAPSHOT_FORMAT})")
+    if info.get("embedding_model") != embedding_id():
+        raise ValueError(f"Snapshot was built with embedding model {info.get('embedding_model')}, "
+                         f"this process uses {embedding_id()}")
+    if info.get("index_config") != _index_config():
+        raise ValueError(f"Snapshot chunking config {info.get('index_config')} differs from {_index_config()}")
+    for name, size in info.get("sizes", {}).items():
+        try:
+            actual = (snapshot_dir / name).stat().st_size
+        except OSError:
+            raise ValueError(f"Snapshot file {name} is missing")
+        if actual != size:
+            raise ValueError(f"Snapshot file {name} is {actual} bytes, expected {size}")
+    if verify:
+        for name, checksum in info["checksums"].items():
+            if _sha256(snapshot_dir / name) != checksum:
+                raise ValueError(f"Snapshot file {name} does not match its checksum")
+    return info
+
+
+def load_snapshot(snapshot_dir: Path = None, embeddings=None, verify: bool = VECTOR_SNAPSHOT_VERIFY):
+    """
+    Open a snapshot as a memory-mapped, read-only NumpyVectorStore.
+
+    The store's `snapshot_dir` points at the manifest and BM25 index that
+    come with it. Raises ValueError if the snapshot is incompatible (see
+    read_snapshot_info()).
+    """
+    from .embeddings import get_embeddings
+    from .vector_index import NumpyVectorStore
+
+    snapshot_dir = Path(snapshot_dir or VECTOR_SNAPSHOT_DIR)
+    start_time = time.time()
+    info = read_snapshot_info(snapshot_dir, verify)
+    if embeddings is None:
+        embeddings = get_embeddings()
+    store = NumpyVectorStore.load_readonly(embeddings, snapshot_dir)
+    store.snapshot_dir = snapshot_dir
+    store.snapshot_info = info
+    logger.info(f"Loaded snapshot of {len(store)} chunks from {snapshot_dir} in {time.time() - start_time:.2f}s"
+                + ("" if verify else " (checksums not verified)"))
+    return store
+
+
+def open_current_snapshot(embeddings=None):
+    """
+    The configured snapshot, if it exists, is compatible and was built from the current data/.
+
+    Returns:
+        The snapshot store, or None when the index has to be opened and synced as usual
+    """
+    if not (VECTOR_SNAPSHOT_DIR / SNAPSHOT_FILE).exists():
+        return None
+    try:
+        info = read_snapshot_info(VECTOR_SNAPSHOT_DIR, verify=False)
+        if info.get("kb_hash") != knowledge_base_hash():
+            logger.info("Index snapshot was built from a different data/, syncing the index instead")
+            return None
+        return load_snapshot(VECTOR_SNAPSHOT_DIR, embeddings)
+    except ValueError as e:
+        logger.warning(f"Refusing index snapshot at {VECTOR_SNAPSHOT_DIR}: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or load a prebuilt index snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Index data/ and write a snapshot")
+    export_parser.add_argument("--out", type=Path, default=VECTOR_SNAPSHOT_DIR)
+    load_parser = subparsers.add_parser("load", help="Open a snapshot as at startup (format and sizes only)")
+    load_parser.add_argument("snapshot_dir", type=Path, nargs="?", default=VECTOR_SNAPSHOT_DIR)
+    verify_parser = subparsers.add_parser("verify", help="Open a snapshot and checksum every file")
+    verify_parser.add_argument("snapshot_dir", type=Path, nargs="?", default=VECTOR_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        info = export_snapshot(args.out)
+        print(f"Snapshot written to {args.out}: {info['rows']} chunks, {info['dim']} dims, "
+              f"model {info['embedding_model']}")
+    else:
+        store = load_snapshot(args.snapshot_dir, verify=args.command == "verify")
+        info = store.snapshot_info
+        current = info["kb_hash"] == knowledge_base_hash()
+        print(f"Snapshot OK: {len(store)} chunks, model {info['embedding_model']}, "
+              f"built {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['created_at']))}, "
+              + ("matches data/" if current else "data/ has changed since"))
@@ -0,0 +1,128 @@
+"""
+Startup management for CloudWalk Helper.
+Loads the RAG pipeline (LangChain, embedding model, vector store) on a
+background thread so the UI renders immediately, and records how long each
+import and component takes. With STARTUP_PROFILE=true the breakdown is
+logged and shown in the app sidebar.
+
+This module only uses the standard library so it is cheap to import.
+
+Profile a cold startup with: python -m src.startup
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("CloudWalkHelper.Startup")
+
+# Configuration
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+
+class StartupProfile:
+    """Wall time and number of newly imported modules for each startup step."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {
+                "step": name,
+                "seconds": time.perf_counter() - start,
+                "modules_imported": len(sys.modules) - modules_before,
+            }
+            with self._lock:
+                self.steps.append(entry)
+            if STARTUP_PROFILE:
+                logger.info(f"Startup step {name}: {entry['seconds']:.3f}s "
+                            f"({entry['modules_imported']} modules imported)")
+
+    def report(self) -> list:
+        with self._lock:
+            return list(self.steps)
+
+    def format(self) -> str:
+        """The profile as a fixed-width table."""
+        lines = [f"{'step':<28} {'seconds':>8} {'modules':>8}"]
+        for entry in self.report():
+            lines.append(f"{entry['step']:<28} {entry['seconds']:>8.3f} {entry['modules_imported']:>8}")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
+
+
+def profile_step(name: str):
+    """Context manager timing one startup step into the process-wide profile."""
+    return startup_profile.step(name)
+
+
+_preload_lock = threading.Lock()
+_preload_done = threading.Event()
+_preload_state = {"thread": None}
+
+
+def _preload():
+    try:
+        with profile_step("import src.rag_chain"):
+            from . import rag_chain
+        with profile_step("warmup"):
+            rag_chain.warmup()
+    except Exception as e:
+        logger.warning(f"Background preload failed: {e}")
+    finally:
+        _preload_done.set()
+        if STARTUP_PROFILE:
+            logger.info("Startup profile:\n" + startup_profile.format())
+
+
+def start_preload():
+    """Start building the RAG pipeline on a background thread (once per process)."""
+    with _preload_lock:
+        if _preload_state["thread"] is None:
+            _preload_state["thread"] = threading.Thread(target=_preload, name="preload", daemon=True)
+            _preload_state["thread"].start()
+
+
+def preload_ready() -> bool:
+    """True once the background preload finished (successfully or not)."""
+    return _preload_done.is_set()
+
+
+def wait_for_pipeline(timeout: float = None):
+    """
+    Block until the preloaded pipeline is ready, starting the preload if needed.
+
+    If the preload failed, building is retried here so the caller gets the
+    current error (or a pipeline, if the problem was fixed meanwhile).
+
+    Raises:
+        TimeoutError: The preload did not finish within `timeout` seconds
+    """
+    start_preload()
+    if not _preload_done.wait(timeout):
+        raise TimeoutError("The knowledge base is still loading")
+    from .rag_chain import get_pipeline
+    return get_pipeline()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(name)s | %(levelname)s | %(message)s')
+    total_start = time.perf_counter()
+    try:
+        wait_for_pipeline()
+    except Exception as e:
+        print(f"Startup failed: {e}")
+    print(startup_profile.format())
+    print(f"{'total':<28} {time.perf_counter() - total_start:>8.3f}")
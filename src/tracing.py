@@ -0,0 +1,371 @@
+"""
+Request tracing for CloudWalk Helper.
+Times each stage of answering a question (language detection, embedding,
+vector search, prompt build, LLM time to first token and generation, output
+parsing) as spans carrying attributes such as k, chunk count, context chars
+and tokens. Span durations and numeric attributes are aggregated into
+histograms served in the Prometheus text format (GET /metrics on the API);
+with TRACE_FILE set, every finished span is also appended to that file as a
+JSON line.
+
+With TRACING_ENABLED=false, span() returns a shared no-op object, so the
+instrumented code paths cost one function call per stage.
+
+Summarize a trace file with: python -m src.tracing traces.jsonl
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger("CloudWalkHelper.Tracing")
+
+# Configuration
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # JSON lines, one per finished span; empty = metrics only
+METRICS_PREFIX = "cloudwalk_helper"
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(2 ** i) for i in range(17))  # 1 .. 65536 (chunks, chars, tokens)
+
+_current_span = ContextVar("cloudwalk_current_span", default=None)
+
+
+def _new_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with fixed upper bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound label, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else f"{bound:g}"), total
+
+
+class MetricsRegistry:
+    """Span duration histograms per span name, and histograms of their numeric attributes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._attributes = {}
+
+    def observe(self, span):
+        with self._lock:
+            histogram = self._durations.get(span.name)
+            if histogram is None:
+                histogram = self._durations[span.name] = Histogram(DURATION_BUCKETS)
+            histogram.observe(span.duration)
+            for attribute, value in span.attributes.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                key = (span.name, attribute)
+                histogram = self._attributes.get(key)
+                if histogram is None:
+                    histogram = self._attributes[key] = Histogram(SIZE_BUCKETS)
+                histogram.observe(value)
+
+    def render(self) -> str:
+        """All histograms in the Prometheus text exposition format."""
+        duration_name = f"{METRICS_PREFIX}_span_duration_seconds"
+        attribute_name = f"{METRICS_PREFIX}_span_attribute"
+        lines = [
+            f"# HELP {duration_name} Duration of each RAG pipeline stage.",
+            f"# TYPE {duration_name} histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._durations.items()):
+                lines.extend(_histogram_lines(duration_name, f'span="{name}"', histogram))
+            lines.append(f"# HELP {attribute_name} Numeric span attributes (k, chunks, context chars and tokens).")
+            lines.append(f"# TYPE {attribute_name} histogram")
+            for (name, attribute), histogram in sorted(self._attributes.items()):
+                lines.extend(_histogram_lines(attribute_name, f'span="{name}",attribute="{attribute}"', histogram))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Count, total and average duration per span name."""
+        with self._lock:
+            return {
+                name: {"count": h.count, "total_time": h.sum, "avg_time": h.sum / (h.count or 1)}
+                for name, h in self._durations.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._attributes.clear()
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram):
+    for bound, count in histogram.cumulative():
+        yield f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+    yield f"{metric}_sum{{{labels}}} {histogram.sum:.6f}"
+    yield f"{metric}_count{{{labels}}} {histogram.count}"
+
+
+class TraceWriter:
+    """Appends finished spans to a JSON lines file (thread-safe, opened on first write)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, span):
+        line = json.dumps({
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": span.start_time,
+            "duration_ms": round(span.duration * 1000, 3),
+            "attributes": span.attributes,
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+                self._file.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write trace to {self.path}: {e}")
+
+
+metrics = MetricsRegistry()
+_trace_writer = TraceWriter(TRACE_FILE) if TRACE_FILE else None
+_span_listeners = []
+
+
+class Span:
+    """
+    One timed stage of a request.
+
+    Use as a context manager (`with span("vector_search", k=8):`), which also
+    makes it the parent of spans opened inside the block, or call finish()
+    for spans that outlive a block, e.g. across the yields of a stream.
+    """
+
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id",
+                 "start_time", "duration", "_start", "_finished", "_token")
+
+    def __init__(self, name: str, parent=None, **attributes):
+        parent = parent if parent is not None else _current_span.get()
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time()
+        self.duration = 0.0
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, duration: float = None):
+        """Record the span (once); `duration` overrides the time since it started."""
+        if self._finished:
+            return
+        self._finished = True
+        if duration is None:
+            self.duration = time.perf_counter() - self._start
+        else:
+            self.duration = duration
+            self.start_time = time.time() - duration
+        metrics.observe(self)
+        if _trace_writer is not None:
+            _trace_writer.write(self)
+        for listener in _span_listeners:
+            listener(self)
+
+    @contextmanager
+    def activate(self):
+        """Make this span the parent of spans started in the block, without finishing it."""
+        token = _current_span.set(self)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.finish()
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned when tracing is disabled; every method does nothing."""
+
+    name = ""
+    attributes = {}
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def finish(self, duration: float = None):
+        pass
+
+    @contextmanager
+    def activate(self):
+        yield self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, parent=None, **attributes):
+    """Start a span under `parent` (default: the active span); a no-op when tracing is disabled."""
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    return Span(name, parent, **attributes)
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler that turns one generation chain run into spans:
+    prompt_format, llm_first_token, llm_generation and output_parsing (the time
+    the parser adds after the model finished).
+    """
+
+    run_inline = True  # Keep timings exact in async runs
+
+    def __init__(self, parent):
+        self.parent = parent
+        self._chains = {}
+        self._llm_run = None  # Outermost model run; a pooled model's inner provider runs are ignored
+        self._llm_start = None
+        self._llm_end = None
+        self._tokens = 0
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or ""
+        if name.endswith("PromptTemplate") or name.endswith("OutputParser"):
+            self._chains[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        name, start = self._chains.pop(run_id, (None, None))
+        if name is None:
+            return
+        if name.endswith("PromptTemplate"):
+            messages = outputs.to_messages() if hasattr(outputs, "to_messages") else []
+            span("prompt_format", self.parent, messages=len(messages)).finish(time.perf_counter() - start)
+        else:
+            tail_start = self._llm_end if self._llm_end is not None else start
+            span("output_parsing", self.parent).finish(max(time.perf_counter() - tail_start, 0.0))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._model_started(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._model_started(run_id)
+
+    def _model_started(self, run_id):
+        if self._llm_run is None:
+            self._llm_run = run_id
+            self._llm_start = time.perf_counter()
+
+    def on_llm_new_token(self, token, *, run_id=None, **kwargs):
+        if run_id != self._llm_run:
+            return
+        self._tokens += 1
+        if self._tokens == 1 and self._llm_start is not None:
+            span("llm_first_token", self.parent).finish(time.perf_counter() - self._llm_start)
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        if run_id != self._llm_run:
+            return
+        self._llm_end = time.perf_counter()
+        generations = [g for batch in response.generations for g in batch]
+        text = "".join(g.text for g in generations)
+        attributes = {"tokens": self._tokens, "output_chars": len(text)}
+        provider = next((g.generation_info.get("provider") for g in generations if g.generation_info), None)
+        if provider:
+            attributes["provider"] = provider  # Set by the provider pool (src/llm_pool.py)
+        span("llm_generation", self.parent, **attributes).finish(self._llm_end - self._llm_start)
+
+
+def llm_config(parent) -> dict:
+    """Runnable config attaching an LLMTracingHandler under `parent`, or None when tracing is disabled."""
+    if not TRACING_ENABLED or parent is NOOP_SPAN:
+        return None
+    return {"callbacks": [LLMTracingHandler(parent)]}
+
+
+def add_span_listener(listener):
+    """Call `listener(span)` for every finished span, e.g. to collect raw durations in a load test."""
+    _span_listeners.append(listener)
+
+
+def remove_span_listener(listener):
+    _span_listeners.remove(listener)
+
+
+def render_metrics() -> str:
+    """Span histograms in the Prometheus text format."""
+    return metrics.render()
+
+
+def summarize_trace_file(path: str) -> dict:
+    """Count, p50 and p95 duration (ms) per span name from a JSON lines trace file."""
+    durations = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                durations.setdefault(entry["name"], []).append(entry["duration_ms"])
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize span durations from a JSON lines trace file")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE or "traces.jsonl")
+    args = parser.parse_args()
+
+    print(f"{'span':<20} {'count':>7} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, stats in summarize_trace_file(args.path).items():
+        print(f"{name:<20} {stats['count']:>7} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f}")
@@ -0,0 +1,292 @@
+"""
+In-process NumPy vector index for CloudWalk Helper.
+Exact cosine search over a contiguous float32 matrix of normalized chunk
+vectors: one matrix-vector product plus argpartition per query, which for
+a knowledge base of a few thousand chunks beats a client/persistence layer.
+
+Selected with VECTOR_BACKEND=numpy (see src/embeddings.py).
+"""
+
+import json
+import uuid
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from .tracing import span
+
+logger = logging.getLogger("CloudWalkHelper.VectorIndex")
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact-search vector store backed by a NumPy matrix.
+
+    Scores are cosine similarities (higher is better). Rows are kept
+    contiguous with spare capacity, so incremental adds are amortized O(1)
+    per vector. With a persist directory, every change is written to
+    `vectors.npy` + `metadata.json`.
+    """
+
+    def __init__(self, embedding, persist_directory=None):
+        self._embedding = embedding
+        self.persist_directory = Path(persist_directory) if persist_directory else None
+        self._buffer = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._positions = {}
+        self._masks = {}  # Metadata filter -> row mask, cleared whenever rows change
+        self._persist_deferred = 0
+        self.snapshot_dir = None  # Set when opened from an index snapshot (see src/snapshot.py)
+        self.snapshot_info = None
+        if self.persist_directory and (self.persist_directory / VECTORS_FILE).exists():
+            self._load()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The (n, dim) matrix of normalized vectors, without spare capacity."""
+        return self._buffer[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        vectors = self._embedding.embed_documents(texts) if texts else []
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def add_vectors(self, vectors, texts, metadatas=None, ids=None):
+        """Insert or replace rows with precomputed vectors."""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = [str(i) if i else str(uuid.uuid4()) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if not self._buffer.flags.writeable:
+            self._buffer = np.array(self._buffer)  # Copy a read-only memory map before changing rows
+
+        new_rows = []
+        for row, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            position = self._positions.get(id_)
+            if position is None:
+                new_rows.append(row)
+            else:
+                self._buffer[position] = matrix[row]
+                self._texts[position] = text
+                self._metadatas[position] = dict(metadata or {})
+
+        self._reserve(self._size + len(new_rows), matrix.shape[1])
+        for row in new_rows:
+            self._buffer[self._size] = matrix[row]
+            self._positions[ids[row]] = self._size
+            self._ids.append(ids[row])
+            self._texts.append(texts[row])
+            self._metadatas.append(dict(metadatas[row] or {}))
+            self._size += 1
+        self._masks.clear()
+        self.persist()
+        return ids
+
+    def update_metadata(self, ids, metadatas):
+        """Replace the metadata of existing rows, keeping their vectors and text."""
+        for id_, metadata in zip(ids, metadatas):
+            position = self._positions.get(id_)
+            if position is not None:
+                self._metadatas[position] = dict(metadata or {})
+        self._masks.clear()
+        self.persist()
+
+    def delete(self, ids=None, **kwargs):
+        if not ids:
+            return None
+        drop = {self._positions[id_] for id_ in ids if id_ in self._positions}
+        if not drop:
+            return True
+        keep = [i for i in range(self._size) if i not in drop]
+        self._buffer = np.ascontiguousarray(self._buffer[keep])
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._size = len(keep)
+        self._positions = {id_: i for i, id_ in enumerate(self._ids)}
+        self._masks.clear()
+        self.persist()
+        return True
+
+    def reset_collection(self):
+        """Remove every vector."""
+        self._buffer = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids, self._texts, self._metadatas, self._positions = [], [], [], {}
+        self._masks.clear()
+        self.persist()
+
+    def get_by_ids(self, ids):
+        return [self._document(self._positions[id_]) for id_ in ids if id_ in self._positions]
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        vector = self._embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(vector, k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        """Top-k documents by cosine similarity, optionally restricted to matching metadata."""
+        if self._size == 0:
+            return []
+        with span("vector_search", k=k, rows=self._size, filtered=bool(filter)):
+            query = np.asarray(embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            scores = self.matrix @ query
+            if filter:
+                scores = np.where(self._filter_mask(filter), scores, -np.inf)
+            indices = top_k(scores, k)
+            return [(self._document(i), float(scores[i])) for i in indices if np.isfinite(scores[i])]
+
+    def search_batch(self, embeddings, k=4):
+        """
+        Top-k for many queries at once with a single matrix-matrix product.
+
+        Returns:
+            One list of (Document, score) per query
+        """
+        if self._size == 0:
+            return [[] for _ in embeddings]
+        queries = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ self.matrix.T
+        indices = top_k(scores, k)
+        return [
+            [(self._document(i), float(row_scores[i])) for i in row_indices]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def _select_relevance_score_fn(self):
+        # Scores already are cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, persist_directory=None, **kwargs):
+        store = cls(embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    @contextmanager
+    def deferred_persist(self):
+        """Write the files once on exit instead of after every change made inside the block."""
+        self._persist_deferred += 1
+        try:
+            yield self
+        finally:
+            self._persist_deferred -= 1
+            self.persist()
+
+    def persist(self):
+        """Write vectors and metadata to the persist directory."""
+        if self.persist_directory is None or self._persist_deferred:
+            return
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        vectors_tmp = self.persist_directory / (VECTORS_FILE + ".tmp")
+        metadata_tmp = self.persist_directory / (METADATA_FILE + ".tmp")
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, self.matrix)
+        metadata_tmp.write_text(
+            json.dumps({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+        vectors_tmp.replace(self.persist_directory / VECTORS_FILE)
+        metadata_tmp.replace(self.persist_directory / METADATA_FILE)
+
+    @classmethod
+    def load_readonly(cls, embedding, directory):
+        """
+        Open saved files with the vectors memory-mapped read-only (e.g. an
+        index snapshot). Pages are shared between processes and loaded on
+        demand; changes are made on an in-memory copy and never written back.
+        """
+        store = cls(embedding)
+        store._load(Path(directory), mmap_mode="r")
+        return store
+
+    def _load(self, directory=None, mmap_mode=None):
+        directory = directory or self.persist_directory
+        matrix = np.load(directory / VECTORS_FILE, mmap_mode=mmap_mode)
+        metadata = json.loads((directory / METADATA_FILE).read_text(encoding="utf-8"))
+        if mmap_mode is None:
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        elif matrix.dtype != np.float32 or not matrix.flags.c_contiguous:
+            raise ValueError(f"{directory / VECTORS_FILE} is not a contiguous float32 matrix")
+        self._buffer = matrix
+        self._size = len(matrix)
+        self._ids = metadata["ids"]
+        self._texts = metadata["texts"]
+        self._metadatas = metadata["metadatas"]
+        self._positions = {id_: i for i, id_ in enumerate(self._ids)}
+        logger.info(f"Loaded NumPy index with {self._size} vectors from {directory}"
+                    + (" (memory-mapped)" if mmap_mode else ""))
+
+    def _reserve(self, rows: int, dim: int):
+        if self._buffer.shape[1:] != (dim,):
+            if self._size:
+                raise ValueError(f"Index holds {self._buffer.shape[1]}-dim vectors, got {dim}")
+            self._buffer = np.empty((0, dim), dtype=np.float32)
+        if rows > len(self._buffer):
+            grown = np.empty((max(rows, 2 * len(self._buffer), 64), dim), dtype=np.float32)
+            grown[:self._size] = self.matrix
+            self._buffer = grown
+
+    def _filter_mask(self, filter: dict) -> np.ndarray:
+        # Filters repeat (e.g. one per language), so masks are built once per index state
+        try:
+            cache_key = tuple(sorted(filter.items()))
+            mask = self._masks.get(cache_key)
+        except TypeError:  # Unhashable filter values
+            cache_key, mask = None, None
+        if mask is None:
+            mask = np.fromiter(
+                (all(meta.get(key) == value for key, value in filter.items()) for meta in self._metadatas),
+                dtype=bool, count=self._size
+            )
+            if cache_key is not None:
+                self._masks[cache_key] = mask
+        return mask
+
+    def _document(self, position: int) -> Document:
+        return Document(id=self._ids[position], page_content=self._texts[position],
+                        metadata=dict(self._metadatas[position]))
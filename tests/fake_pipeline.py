@@ -0,0 +1,54 @@
+"""
+Offline stand-ins for the RAG pipeline used by the tests:
+deterministic fake embeddings, an in-memory NumPy vector store over the
+real knowledge base, and a scripted chat model instead of OpenRouter/Ollama.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+FAKE_ANSWER = "CloudWalk is a fintech company. See https://www.cloudwalk.io/"
+FAKE_INDEX_DIR = Path(tempfile.mkdtemp(prefix="cloudwalk_helper_tests_"))
+
+
+def make_fake_pipeline(answer: str = FAKE_ANSWER):
+    """Build a RAGPipeline that needs no model download and no network."""
+    from src import embeddings as embeddings_module, precompute, rag_chain
+    from src.embeddings import load_documents, split_documents
+    from src.vector_index import NumpyVectorStore
+
+    # Manifest and BM25 index lookups go to an empty directory, never a real index in the working tree
+    embeddings_module.CHROMA_DB_DIR = embeddings_module.NUMPY_INDEX_DIR = FAKE_INDEX_DIR
+    # Every question reaches the fake LLM; a precomputed_answers.json in the working tree is never served
+    precompute.PRECOMPUTED_ANSWERS, precompute._precomputed = False, None
+
+    embeddings = DeterministicFakeEmbedding(size=64)
+    vector_store = NumpyVectorStore(embeddings)
+    vector_store.add_documents(split_documents(load_documents()))
+    retriever = rag_chain.get_retriever(vector_store)
+    prompt = rag_chain.get_prompt()
+    llm = FakeListChatModel(responses=[answer])
+    return rag_chain.RAGPipeline(
+        embeddings=embeddings,
+        vector_store=vector_store,
+        retriever=retriever,
+        prompt=prompt,
+        llm=llm,
+        chain=rag_chain.create_rag_chain(llm=llm, retriever=retriever, prompt=prompt),
+        generation_chain=rag_chain.create_generation_chain(llm, prompt)
+    )
+
+
+def install_fake_pipeline(answer: str = FAKE_ANSWER):
+    """Make get_pipeline() return a fake pipeline for the rest of the process."""
+    from src import rag_chain
+
+    rag_chain._pipeline = make_fake_pipeline(answer)
+    return rag_chain._pipeline
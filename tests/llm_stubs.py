@@ -0,0 +1,130 @@
+"""
+Local stand-ins for the LLM providers used by the tests: an
+OpenAI-compatible server (/v1/chat/completions, server-sent events) and an
+Ollama-compatible server (/api/chat, NDJSON), both streaming a scripted
+answer token by token over keep-alive HTTP/1.1 connections.
+"""
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """
+    Streams `answer` word by word after `delay` seconds.
+
+    `status` other than 200 is returned instead (429 comes with a
+    Retry-After header). `connections` and `requests` count what the server
+    has seen, so tests can check connection reuse and which provider answered.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, kind: str, answer: str = "Stub answer from the local server.",
+                 delay: float = 0.0, status: int = 200, token_delay: float = 0.0):
+        handler = _OpenAIHandler if kind == "openai" else _OllamaHandler
+        super().__init__(("127.0.0.1", 0), handler)
+        self.kind = kind
+        self.answer = answer
+        self.delay = delay
+        self.status = status
+        self.token_delay = token_delay
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}" + ("/v1" if self.kind == "openai" else "")
+
+    def tokens(self):
+        words = self.answer.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with self.server._lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        if self.server.status != 200:
+            body = json.dumps({"error": {"message": f"stub error {self.server.status}"}}).encode("utf-8")
+            self.send_response(self.server.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if self.server.status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", self.content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in self.server.tokens():
+                self._chunk(self.event(token, done=False))
+                time.sleep(self.server.token_delay)
+            # The last event and the terminating chunk go out together, so a client that stops
+            # reading at the last event still leaves the connection reusable
+            data = self.event("", done=True)
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client gave up, e.g. a hedged request that lost
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _OpenAIHandler(_StubHandler):
+    content_type = "text/event-stream"
+
+    def event(self, token: str, done: bool) -> bytes:
+        chunk = {
+            "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "delta": {} if done else {"role": "assistant", "content": token},
+                         "finish_reason": "stop" if done else None}],
+        }
+        data = f"data: {json.dumps(chunk)}\n\n"
+        if done:
+            data += "data: [DONE]\n\n"
+        return data.encode("utf-8")
+
+
+class _OllamaHandler(_StubHandler):
+    content_type = "application/x-ndjson"
+
+    def event(self, token: str, done: bool) -> bytes:
+        chunk = {
+            "model": "stub", "created_at": "2025-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": token}, "done": done,
+        }
+        if done:
+            chunk.update(done_reason="stop", total_duration=1, load_duration=1, prompt_eval_count=1,
+                         prompt_eval_duration=1, eval_count=1, eval_duration=1)
+        return (json.dumps(chunk) + "\n").encode("utf-8")
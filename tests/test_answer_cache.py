@@ -0,0 +1,103 @@
+"""
+Test script for the CloudWalk Helper semantic answer cache.
+Run with: python tests/test_answer_cache.py
+"""
+
+import sys
+import io
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _unit(values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_similarity_and_language():
+    """Paraphrases hit, unrelated questions and other languages miss."""
+    print("=" * 60)
+    print("Testing Answer Cache Lookups")
+    print("=" * 60)
+
+    from src.answer_cache import SemanticAnswerCache
+
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60, max_entries=10, max_bytes=10**6)
+    cache.store("What is CloudWalk?", _unit([1, 0, 0]), "English", "A fintech.", "kb1")
+
+    assert cache.lookup(_unit([0.98, 0.1, 0]), "English", "kb1") == "A fintech."
+    print("   ✅ Paraphrase served from cache")
+
+    assert cache.lookup(_unit([0, 1, 0]), "English", "kb1") is None
+    print("   ✅ Unrelated question missed")
+
+    assert cache.lookup(_unit([1, 0, 0]), "Portuguese", "kb1") is None
+    print("   ✅ Other language missed")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2, stats
+    print(f"   ✅ Counters: {stats['hits']} hits / {stats['misses']} misses")
+    return True
+
+
+def test_eviction_ttl_and_invalidation():
+    """LRU eviction, TTL expiry and knowledge-base invalidation."""
+    print("\n" + "=" * 60)
+    print("Testing Answer Cache Eviction")
+    print("=" * 60)
+
+    from src.answer_cache import SemanticAnswerCache
+
+    cache = SemanticAnswerCache(threshold=0.99, ttl=60, max_entries=2, max_bytes=10**6)
+    cache.store("a", _unit([1, 0, 0]), "English", "A", "kb1")
+    cache.store("b", _unit([0, 1, 0]), "English", "B", "kb1")
+    cache.lookup(_unit([1, 0, 0]), "English", "kb1")  # "a" becomes most recent
+    cache.store("c", _unit([0, 0, 1]), "English", "C", "kb1")
+    assert cache.lookup(_unit([0, 1, 0]), "English", "kb1") is None
+    assert cache.lookup(_unit([1, 0, 0]), "English", "kb1") == "A"
+    print("   ✅ Least recently used entry evicted")
+
+    cache.store("big", _unit([1, 1, 0]), "English", "x" * 10**6, "kb1")
+    assert cache.stats()["entries"] == 2
+    print("   ✅ Oversized answer not cached")
+
+    cache.ttl = 0.01
+    time.sleep(0.02)
+    assert cache.lookup(_unit([1, 0, 0]), "English", "kb1") is None
+    print("   ✅ Expired entries dropped")
+
+    cache.ttl = 60
+    cache.store("a", _unit([1, 0, 0]), "English", "A", "kb1")
+    assert cache.lookup(_unit([1, 0, 0]), "English", "kb2") is None
+    assert cache.stats()["invalidations"] == 1
+    print("   ✅ Knowledge base change invalidates the cache")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Answer Cache Tests")
+
+    success = True
+    for test in (test_similarity_and_language, test_eviction_ttl_and_invalidation):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
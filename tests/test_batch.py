@@ -0,0 +1,141 @@
+"""
+Test script for CloudWalk Helper batch question answering.
+Runs offline against a fake pipeline.
+Run with: python tests/test_batch.py
+"""
+
+import sys
+import io
+import json
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from tests.fake_pipeline import install_fake_pipeline, FAKE_ANSWER
+
+
+class RateLimitError(Exception):
+    """Looks like a provider 429 with a Retry-After header."""
+    status_code = 429
+
+    class response:
+        status_code = 429
+        headers = {"retry-after": "0.01"}
+
+
+class FlakyChain:
+    """Generation chain that is rate-limited on its first calls."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+        self.inputs = {}
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        self.inputs[inputs["input"]] = inputs
+        if self.calls <= self.failures:
+            raise RateLimitError("429 Too Many Requests")
+        return f"Answer to: {inputs['input']}"
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """The fake pipeline's embeddings, counting model calls."""
+
+    batches: int = 0
+    queries: int = 0
+
+    def embed_documents(self, texts):
+        self.batches += 1
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def test_batch_resume_and_backoff():
+    """Rate-limited calls are retried and a rerun skips answered questions."""
+    print("=" * 60)
+    print("Testing Batch Question Answering")
+    print("=" * 60)
+
+    from src import batch
+    from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        questions_path = workdir / "questions.csv"
+        questions_path.write_text("id,question\n1,What is CloudWalk?\n2,O que é a InfinitePay?\n3,What is JIM?\n",
+                                  encoding="utf-8")
+        output_path = workdir / "answers.jsonl"
+        questions = batch.load_questions(questions_path)
+        assert [q["id"] for q in questions] == ["1", "2", "3"]
+
+        pipeline = install_fake_pipeline()
+        model = CountingEmbedding(size=64)
+        pipeline.embeddings = pipeline.vector_store._embedding = \
+            CachedEmbeddings(model, EmbeddingCache("fake-model", True, workdir / "cache"))
+        pipeline.generation_chain = FlakyChain(failures=2)
+        batch.BATCH_BACKOFF_BASE = 0.01
+
+        summary = asyncio.run(batch.run_batch(questions[:2], output_path, concurrency=2))
+        assert summary["answered"] == 2 and summary["failed"] == 0, summary
+        records = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+        assert sum(r["attempts"] for r in records) == 4
+        assert all({"retrieval", "llm", "total"} <= r["timings"].keys() for r in records)
+        print("   ✅ Rate-limited calls retried with backoff")
+
+        assert model.batches == 1 and model.queries == 0, (model.batches, model.queries)
+        assert all(r["timings"]["embedding"] > 0 for r in records)
+        print("   ✅ Questions embedded in one model call, retrieval served from the cache")
+
+        from src.rag_chain import prepare_inputs
+        for question in questions[:2]:
+            interactive = prepare_inputs(question["question"], pipeline.retriever, pipeline.reranker)
+            batched = pipeline.generation_chain.inputs[question["question"]]
+            assert batched["context"] == interactive["context"] and batched["partition"] == interactive["partition"]
+        assert all(r["partition"] for r in records)  # Went through the language-routed retriever
+        print("   ✅ Same routed, fused context as interactive questions")
+
+        pipeline.generation_chain = FlakyChain(failures=0)
+        summary = asyncio.run(batch.run_batch(questions, output_path, concurrency=2))
+        assert summary["skipped"] == 2 and summary["answered"] == 1
+        assert pipeline.generation_chain.calls == 1
+        print("   ✅ Rerun resumed from the checkpoint")
+
+        assert batch.rate_limit_delay(ValueError("boom")) is None
+        print("   ✅ Other errors are not retried")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        install_fake_pipeline(FAKE_ANSWER)
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Batch Tests")
+
+    success = True
+    try:
+        if not test_batch_resume_and_backoff():
+            success = False
+    except Exception as e:
+        print(f"\n❌ Batch test failed: {e}")
+        success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
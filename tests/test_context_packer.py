@@ -0,0 +1,109 @@
+"""
+Test script for CloudWalk Helper context packing.
+Runs offline; no embedding model is needed.
+Run with: python tests/test_context_packer.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+SOURCE = "Stratus is a blockchain. JIM is an assistant. InfinitePay sells card machines. Pix is instant."
+
+
+def _chunk(start: int, end: int, source: str = "kb.md") -> Document:
+    return Document(page_content=SOURCE[start:end], metadata={"source": source, "start_index": start})
+
+
+def test_merge_passages():
+    """Overlapping and adjacent chunks of one source become a single passage."""
+    print("=" * 60)
+    print("Testing Passage Merging")
+    print("=" * 60)
+
+    from src.context_packer import merge_passages
+
+    passages = merge_passages([_chunk(25, 60), _chunk(0, 35), _chunk(61, 80), _chunk(0, 10, "other.md")])
+    assert passages == [(0, SOURCE[0:60] + "\n" + SOURCE[61:80]), (3, SOURCE[0:10])], passages
+    print("   ✅ Overlap removed, adjacent chunk joined, best rank kept")
+
+    passages = merge_passages([_chunk(0, 20), _chunk(5, 15)])
+    assert passages == [(0, SOURCE[0:20])]
+    print("   ✅ Contained chunk absorbed")
+    return True
+
+
+def test_pack_context():
+    """Duplicates are dropped and the token budget is respected in relevance order."""
+    print("\n" + "=" * 60)
+    print("Testing Context Packing")
+    print("=" * 60)
+
+    from src.context_packer import SEPARATOR, estimate_tokens, pack_context
+
+    docs = [
+        Document(page_content="A" * 400, metadata={"source": "a.md", "start_index": 0}),
+        Document(page_content="A" * 400, metadata={"source": "b.md", "start_index": 0}),
+        Document(page_content="B" * 2000, metadata={"source": "c.md", "start_index": 0}),
+        Document(page_content="C" * 200, metadata={"source": "d.md", "start_index": 0}),
+    ]
+    context, stats = pack_context(docs, budget=200)
+    assert stats["duplicates"] == 1
+    assert context.split(SEPARATOR) == ["A" * 400, "C" * 200], stats
+    assert estimate_tokens(context) <= 200 and stats["tokens_saved"] > 0
+    print(f"   ✅ {stats['chunks']} chunks -> {stats['passages_used']} passages, ~{stats['tokens_saved']} tokens saved")
+
+    context, _ = pack_context(docs[2:3], budget=100)
+    assert context == "B" * 400
+    print("   ✅ Most relevant passage truncated rather than dropped")
+    return True
+
+
+def test_near_duplicates():
+    """Chunks that differ by a word or two are dropped without encoding anything."""
+    print("\n" + "=" * 60)
+    print("Testing Near-Duplicate Detection")
+    print("=" * 60)
+
+    from src.context_packer import drop_near_duplicates
+
+    text = " ".join(f"word{i}" for i in range(60))
+    docs = [
+        Document(page_content=text, metadata={"source": "a.md"}),
+        Document(page_content=text.replace("word59", "WORD59.").upper(), metadata={"source": "b.md"}),
+        Document(page_content=text.replace("word30", "changed"), metadata={"source": "c.md"}),
+        Document(page_content=SOURCE, metadata={"source": "d.md"}),
+    ]
+    assert drop_near_duplicates(docs) == [docs[0], docs[3]]
+    assert drop_near_duplicates(docs, threshold=1.0) == docs  # Only exact copies
+    print("   ✅ Reworded copies dropped, distinct chunk kept")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Context Packing Tests")
+
+    success = True
+    for test in (test_merge_passages, test_pack_context, test_near_duplicates):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
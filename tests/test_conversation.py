@@ -0,0 +1,171 @@
+"""
+Test script for CloudWalk Helper conversation memory.
+Runs offline with the fake pipeline and scripted chat models.
+Run with: python tests/test_conversation.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from tests.fake_pipeline import install_fake_pipeline
+
+
+class PromptRecorder(BaseCallbackHandler):
+    """Keeps the messages of every chat model call."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.prompts.append(messages[0])
+
+
+def test_bounded_memory():
+    """However many turns are added, the history stays under its token cap."""
+    print("=" * 60)
+    print("Testing Bounded Memory")
+    print("=" * 60)
+
+    from src.conversation import ConversationMemory
+
+    llm = FakeListChatModel(responses=["The user asked about InfinitePay fees and the JIM assistant. " * 50])
+    memory = ConversationMemory(max_turns=2, turn_tokens=50, summary_tokens=40)
+    sizes = []
+    for i in range(20):
+        memory.add_turn(f"Question {i} about the card machine?", f"Answer {i}: " + "details " * 100, llm)
+        sizes.append(memory.token_count())
+    limit = 40 + 2 * 2 * 50
+    assert len(memory) == 20 and len(memory.turns) == 2 and memory.summarized_turns == 18
+    assert max(sizes) <= limit + 20, sizes  # + message headers and the ellipses
+    assert memory.turns[-1][0] == "Question 19 about the card machine?"
+    print(f"   ✅ 20 turns, history peaked at {max(sizes)} tokens (cap {limit})")
+
+    messages = memory.messages()
+    assert messages[0].type == "system" and "InfinitePay" in messages[0].content
+    assert [m.type for m in messages[1:]] == ["human", "ai", "human", "ai"]
+    print("   ✅ Summary first, then the last turns verbatim")
+    return True
+
+
+def test_summary_fallback():
+    """Without an LLM the evicted turns are kept extractively and the newest text survives the cap."""
+    print("\n" + "=" * 60)
+    print("Testing Summary Fallback")
+    print("=" * 60)
+
+    from src.conversation import ConversationMemory
+
+    history = []
+    for product in ("Pix", "InfiniteTap", "JIM", "Stratus"):
+        history += [{"role": "user", "content": f"What is {product}?"},
+                    {"role": "assistant", "content": f"{product} is a CloudWalk product."}]
+    memory = ConversationMemory.from_messages(history, max_turns=1, summary_tokens=20)
+    assert memory.turns == [("What is Stratus?", "Stratus is a CloudWalk product.")]
+    assert "JIM" in memory.summary and "Pix" not in memory.summary, memory.summary
+    print(f"   ✅ Summary without an LLM: {memory.summary!r}")
+    return True
+
+
+def test_stateless_history():
+    """A caller resending its history gets the earlier summary back and pays for new turns only."""
+    print("\n" + "=" * 60)
+    print("Testing Summaries of Resent Histories")
+    print("=" * 60)
+
+    from src.conversation import ConversationMemory, SummaryCache
+
+    recorder = PromptRecorder()
+    llm = FakeListChatModel(responses=[f"Summary {i}" for i in range(10)], callbacks=[recorder])
+    cache = SummaryCache(max_entries=8)
+    history = []
+    for product in ("Pix", "InfiniteTap", "JIM", "Stratus", "InfinitePay"):
+        history += [{"role": "user", "content": f"What is {product}?"},
+                    {"role": "assistant", "content": f"{product} is a CloudWalk product."}]
+
+    memory = ConversationMemory.from_messages(history[:8], llm, summary_cache=cache, max_turns=2)
+    assert memory.summary == "Summary 0" and memory.summarized_turns == 2 and len(recorder.prompts) == 1
+    memory = ConversationMemory.from_messages(history[:8], llm, summary_cache=cache, max_turns=2)
+    assert memory.summary == "Summary 0" and memory.summarized_turns == 2 and len(recorder.prompts) == 1
+    print("   ✅ Same history again: summary reused, no LLM call")
+
+    memory = ConversationMemory.from_messages(history, llm, summary_cache=cache, max_turns=2)
+    assert memory.summary == "Summary 1" and memory.summarized_turns == 3 and len(recorder.prompts) == 2
+    folded = recorder.prompts[-1][-1].content
+    assert "Summary 0" in folded and "JIM" in folded and "Pix" not in folded, folded
+    assert memory.turns == [("What is Stratus?", "Stratus is a CloudWalk product."),
+                            ("What is InfinitePay?", "InfinitePay is a CloudWalk product.")]
+    print("   ✅ One more turn: only that turn folded into the cached summary")
+
+    memory = ConversationMemory.from_messages(history, llm, summary_cache=cache, max_turns=2, summary_tokens=100)
+    assert memory.summary == "Summary 2" and len(recorder.prompts) == 3
+    print("   ✅ A different summary cap does not reuse summaries")
+    return True
+
+
+def test_follow_up_question():
+    """A follow-up is condensed for retrieval, and the answer prompt carries the history."""
+    print("\n" + "=" * 60)
+    print("Testing Follow-up Questions")
+    print("=" * 60)
+
+    from src.conversation import ConversationMemory
+    from src.rag_chain import stream_ask
+
+    recorder = PromptRecorder()
+    pipeline = install_fake_pipeline()
+    llm = FakeListChatModel(responses=["InfiniteTap turns a phone into a card reader.",
+                                       "What are the fees of the InfiniteTap card reader?",
+                                       "InfiniteTap fees start at 1.38%."],
+                            callbacks=[recorder])
+    pipeline.llm = llm
+    pipeline.generation_chain = pipeline.prompt | llm | pipeline.generation_chain.last
+
+    memory = ConversationMemory()
+    metrics = {}
+    answer = "".join(stream_ask("Tell me about the InfiniteTap card reader", metrics, memory))
+    assert metrics["query"] == "Tell me about the InfiniteTap card reader" and len(recorder.prompts) == 1
+    print("   ✅ First question used as is, no condensing call")
+
+    memory.add_turn("Tell me about the InfiniteTap card reader", answer)
+    metrics = {}
+    answer = "".join(stream_ask("And its fees?", metrics, memory))
+    assert metrics["query"] == "What are the fees of the InfiniteTap card reader?", metrics
+    assert answer == "InfiniteTap fees start at 1.38%."
+    print(f"   ✅ Retrieval query: {metrics['query']!r}")
+
+    prompt = recorder.prompts[-1]
+    assert [m.type for m in prompt] == ["system", "human", "ai", "human"], [m.type for m in prompt]
+    assert prompt[-1].content == "And its fees?"
+    print("   ✅ Answer prompt has the previous turn and the user's own wording")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Conversation Memory Tests")
+
+    success = True
+    for test in (test_bounded_memory, test_summary_fallback, test_stateless_history, test_follow_up_question):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Test script for the CloudWalk Helper persistent embedding cache.
+Runs offline with deterministic fake embeddings.
+Run with: python tests/test_embedding_cache.py
+"""
+
+import sys
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that remember how many texts were encoded."""
+    encoded: int = 0
+
+    def embed_documents(self, texts):
+        self.encoded += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.encoded += 1
+        return super().embed_query(text)
+
+
+def test_cached_embeddings():
+    """Only misses are encoded, and vectors survive a reopen."""
+    print("=" * 60)
+    print("Testing Embedding Cache")
+    print("=" * 60)
+
+    from src.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+    cache_dir = Path(tempfile.mkdtemp())
+    try:
+        model = CountingEmbeddings(size=16)
+        embeddings = CachedEmbeddings(model, EmbeddingCache("fake-model", True, cache_dir))
+
+        first = embeddings.embed_documents(["alpha", "beta", "alpha"])
+        assert model.encoded == 2, model.encoded
+        print("   ✅ Duplicate texts encoded once")
+
+        second = embeddings.embed_documents(["beta", "gamma", "alpha"])
+        assert model.encoded == 3 and second[0] == first[1] and second[2] == first[0]
+        print("   ✅ Only the new text was encoded")
+
+        embeddings.embed_query("What is CloudWalk?")
+        embeddings.embed_query("What is CloudWalk?")
+        assert model.encoded == 4
+        print("   ✅ Queries cached")
+
+        reopened = CachedEmbeddings(model, EmbeddingCache("fake-model", True, cache_dir))
+        assert reopened.embed_documents(["gamma"]) == [second[1]] and model.encoded == 4
+        print("   ✅ Vectors persisted across reopen")
+
+        other = CachedEmbeddings(model, EmbeddingCache("fake-model", False, cache_dir))
+        other.embed_documents(["alpha"])
+        assert model.encoded == 5
+        print("   ✅ Normalization flag is part of the key")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return True
+
+
+def test_size_cap_and_compaction():
+    """Least recently used entries are evicted and compaction reclaims their rows."""
+    print("\n" + "=" * 60)
+    print("Testing Embedding Cache Compaction")
+    print("=" * 60)
+
+    from src.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+    cache_dir = Path(tempfile.mkdtemp())
+    try:
+        model = CountingEmbeddings(size=8)
+        cache = EmbeddingCache("fake-model", True, cache_dir, max_entries=10)
+        embeddings = CachedEmbeddings(model, cache)
+
+        texts = [f"chunk {i}" for i in range(10)]
+        expected = embeddings.embed_documents(texts)
+        embeddings.embed_documents(texts[:3])  # Keep the first three recently used
+        embeddings.embed_documents([f"new {i}" for i in range(5)])
+        stats = cache.stats()
+        assert stats["entries"] <= 10 and stats["rows"] == 15, stats
+        print(f"   ✅ Evicted down to {stats['entries']} entries")
+
+        result = cache.compact()
+        assert result["rows_after"] == cache.stats()["entries"]
+        assert len(list(cache.path.glob("vectors-*.f32"))) == 1
+        model.encoded = 0
+        assert embeddings.embed_documents(texts[:3]) == expected[:3] and model.encoded == 0
+        print(f"   ✅ Compacted {result['rows_before']} rows to {result['rows_after']}")
+
+        # Another process evicts and compacts between this reader's row lookup and its file read
+        texts = [f"shared {i}" for i in range(6)]
+        reader = EmbeddingCache("fake-model", True, cache_dir, max_entries=100)
+        writer = EmbeddingCache("fake-model", True, cache_dir, max_entries=100)
+        vectors = CachedEmbeddings(model, reader).embed_documents(texts)
+        keys = [EmbeddingCache.make_key(text) for text in texts]
+        lookup = reader._rows
+
+        def compact_during_lookup(batch):
+            rows = lookup(batch)
+            reader._rows = lookup
+            writer._db.execute(f"DELETE FROM entries WHERE key IN ({','.join('?' * 3)})", keys[:3])
+            writer.compact()
+            return rows
+
+        reader._rows = compact_during_lookup
+        assert [list(v) for v in reader.get_many(keys[3:])] == [list(v) for v in vectors[3:]]
+        assert [v if v is None else list(v) for v in reader.get_many(keys)] == \
+            [None] * 3 + [list(v) for v in vectors[3:]]
+        print("   ✅ Reads stay consistent with a compaction in another process")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Embedding Cache Tests")
+
+    success = True
+    for test in (test_cached_embeddings, test_size_cap_and_compaction):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Test script for CloudWalk Helper hybrid (BM25 + dense) retrieval.
+Run with: python tests/test_hybrid.py
+"""
+
+import sys
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+
+def _docs():
+    return [
+        Document(page_content="InfiniteTap rates: débito 1,37% e crédito 3,15%", metadata={"chunk_id": "pt-1"}),
+        Document(page_content="JIM is an AI assistant for entrepreneurs", metadata={"chunk_id": "en-1"}),
+        Document(page_content="Stratus is an open-source blockchain", metadata={"chunk_id": "en-2"}),
+    ]
+
+
+def test_bm25():
+    """Accent-folded exact terms rank the right chunk first."""
+    print("=" * 60)
+    print("Testing BM25 Index")
+    print("=" * 60)
+
+    from src.hybrid import BM25Index, tokenize
+
+    assert tokenize("Crédito à vista: 3,15%") == ["credito", "vista", "3,15"]
+    print("   ✅ Tokenizer folds accents and keeps decimal numbers")
+
+    index = BM25Index(_docs(), fingerprint="abc")
+    hits = index.search("taxas de credito do InfiniteTap", k=2)
+    assert hits[0][0].metadata["chunk_id"] == "pt-1" and len(hits) == 1
+    print("   ✅ 'credito' matched 'crédito'")
+
+    assert index.search("stratus", k=3, filter={"chunk_id": "en-1"}) == []
+    print("   ✅ Metadata filter applied")
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        index.save(workdir / "bm25.json")
+        loaded = BM25Index.load(workdir / "bm25.json")
+        assert loaded.fingerprint == "abc"
+        assert [(d.page_content, s) for d, s in loaded.search("blockchain")] == \
+               [(d.page_content, s) for d, s in index.search("blockchain")]
+        print("   ✅ Persisted index reloads with identical scores")
+
+        from src.hybrid import load_or_build_bm25_index
+        from src.indexer import save_manifest
+        data_dir = workdir / "data"
+        data_dir.mkdir()
+        (data_dir / "fees.md").write_text("## Fees\nInfiniteTap débito 1,37%", encoding="utf-8")
+        manifest = workdir / "vector_store" / "index_manifest.json"
+        save_manifest(manifest, {"config": {}, "files": {"fees.md": {"hash": "x", "chunks": {"fees.md::a": "a"}}}})
+        built = load_or_build_bm25_index(manifest, data_dir=data_dir)
+        assert (manifest.parent / "bm25_index.json").exists() and len(built.documents) == 1
+        assert load_or_build_bm25_index(manifest, data_dir=data_dir).fingerprint == built.fingerprint
+        print("   ✅ Built index saved next to the vector store's manifest")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+def test_fusion():
+    """Reciprocal rank fusion rewards chunks found by both retrievers."""
+    print("\n" + "=" * 60)
+    print("Testing Reciprocal Rank Fusion")
+    print("=" * 60)
+
+    from src.hybrid import reciprocal_rank_fusion
+
+    a, b, c = _docs()
+    fused = reciprocal_rank_fusion([[b, a], [c, a]], k=3)
+    assert [d.metadata["chunk_id"] for d in fused] == ["pt-1", "en-1", "en-2"]
+    print("   ✅ Chunk ranked by both lists comes first")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Hybrid Retrieval Tests")
+
+    success = True
+    for test in (test_bm25, test_fusion):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Test script for the CloudWalk Helper incremental indexer.
+Runs offline with deterministic fake embeddings.
+Run with: python tests/test_indexer.py
+"""
+
+import sys
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that remember how many texts were embedded, and the largest batch."""
+    embedded: int = 0
+    largest_batch: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        self.largest_batch = max(self.largest_batch, len(texts))
+        return super().embed_documents(texts)
+
+
+def _paragraphs(prefix, count):
+    return "\n\n".join(f"## {prefix} {i}\n" + f"{prefix} fact number {i}. " * 30 for i in range(count))
+
+
+def test_incremental_sync():
+    """Only changed chunks are embedded; stale chunks are deleted."""
+    print("=" * 60)
+    print("Testing Incremental Indexer")
+    print("=" * 60)
+
+    from langchain_chroma import Chroma
+    from src.indexer import sync_vector_store
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        data_dir = workdir / "data"
+        data_dir.mkdir()
+        (data_dir / "en.md").write_text(_paragraphs("CloudWalk", 6), encoding="utf-8")
+        (data_dir / "pt.md").write_text(_paragraphs("InfinitePay", 6), encoding="utf-8")
+        manifest = workdir / "chroma_db" / "index_manifest.json"
+
+        embeddings = CountingEmbeddings(size=32)
+        store = Chroma(collection_name="test", embedding_function=embeddings,
+                       persist_directory=str(workdir / "chroma_db"))
+
+        print("\n1. Initial sync...")
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir)
+        total = store._collection.count()
+        assert report.full_rebuild and report.chunks_added == total == embeddings.embedded
+        print(f"   ✅ Indexed {total} chunks")
+
+        print("\n2. Sync with no changes...")
+        embeddings.embedded = 0
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir)
+        assert not report.changed and embeddings.embedded == 0
+        assert report.files_unchanged == 2
+        print(f"   ✅ Nothing embedded ({report.elapsed * 1000:.1f}ms)")
+
+        print("\n3. Edit one paragraph...")
+        text = (data_dir / "pt.md").read_text(encoding="utf-8")
+        (data_dir / "pt.md").write_text(text.replace("InfinitePay fact number 3.", "Edited fact.", 1),
+                                        encoding="utf-8")
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir)
+        assert report.files_changed == ["pt.md"]
+        assert 0 < embeddings.embedded == report.chunks_added < total / 2
+        assert store._collection.count() == total - report.chunks_removed + report.chunks_added
+        assert store.similarity_search("Edited fact.", k=total)
+        print(f"   ✅ Re-embedded {report.chunks_added} chunk(s), removed {report.chunks_removed}")
+
+        print("\n4. Insert text at the start of a file...")
+        from src.context_packer import merge_passages
+        text = "## Intro\nA new opening paragraph.\n\n" + (data_dir / "pt.md").read_text(encoding="utf-8")
+        (data_dir / "pt.md").write_text(text, encoding="utf-8")
+        embeddings.embedded = 0
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir)
+        assert report.chunks_moved > 0 and embeddings.embedded == report.chunks_added < report.chunks_moved
+        stored = store.get(where={"source": str(data_dir / "pt.md")})
+        docs = [Document(page_content=t, metadata=m) for t, m in zip(stored["documents"], stored["metadatas"])]
+        assert all(text[d.metadata["start_index"]:].startswith(d.page_content) for d in docs)
+        [(_, passage)] = merge_passages(docs)
+        assert passage.split() == text.split(), "Merged passage cut or duplicated text"
+        print(f"   ✅ Offsets of {report.chunks_moved} shifted chunks updated without re-embedding, "
+              f"merged passage matches the file")
+
+        print("\n5. Remove a file...")
+        (data_dir / "en.md").unlink()
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir)
+        remaining = store.get()["metadatas"]
+        assert report.files_removed == ["en.md"]
+        assert all(meta["source"].endswith("pt.md") for meta in remaining)
+        print(f"   ✅ Deleted {report.chunks_removed} stale chunks")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n✅ Indexer tests passed!")
+    return True
+
+
+def test_streaming_ingestion():
+    """Many files are split on a process pool and embedded and written in fixed-size batches."""
+    print("\n" + "=" * 60)
+    print("Testing Streaming Ingestion")
+    print("=" * 60)
+
+    from src.indexer import INGEST_PROCESS_MIN_FILES, sync_vector_store
+    from src.vector_index import NumpyVectorStore
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        data_dir = workdir / "data"
+        (data_dir / "help").mkdir(parents=True)
+        for i in range(INGEST_PROCESS_MIN_FILES + 4):
+            (data_dir / "help" / f"page_{i:02d}.md").write_text(_paragraphs(f"Article{i}", 3), encoding="utf-8")
+
+        embeddings = CountingEmbeddings(size=32)
+        store = NumpyVectorStore(embeddings, persist_directory=workdir / "numpy_index")
+        writes = []
+        persist = store.persist
+        store.persist = lambda: writes.append(store._persist_deferred) or persist()
+
+        report = sync_vector_store(store, manifest_path=workdir / "numpy_index" / "index_manifest.json",
+                                   data_dir=data_dir, batch_size=5, workers=2, embed_threads=2)
+        assert len(report.files_added) == INGEST_PROCESS_MIN_FILES + 4
+        assert report.chunks_added == len(store) == embeddings.embedded
+        assert embeddings.largest_batch == 5 and report.batches == -(-report.chunks_added // 5)
+        print(f"   ✅ {report.chunks_added} chunks in {report.batches} batches of at most 5")
+
+        assert writes.count(0) == 2, writes  # Reset, then once after all batches
+        assert NumpyVectorStore(embeddings, persist_directory=workdir / "numpy_index")._size == len(store)
+        print("   ✅ Index written once, not once per batch")
+
+        assert report.docs_per_sec > 0 and report.chunks_per_sec > 0
+        print(f"   ✅ {report.summary()}")
+        sources = {Path(metadata["source"]).name for metadata in store._metadatas}
+        assert sources == {f"page_{i:02d}.md" for i in range(INGEST_PROCESS_MIN_FILES + 4)}
+
+        class FailingEmbeddings(CountingEmbeddings):
+            def embed_documents(self, texts):
+                raise RuntimeError("Embedding model crashed")
+
+        manifest = workdir / "numpy_index" / "index_manifest.json"
+        broken = NumpyVectorStore(FailingEmbeddings(size=32), persist_directory=workdir / "numpy_index")
+        try:
+            sync_vector_store(broken, manifest_path=manifest, data_dir=data_dir, full=True, workers=1)
+            raise AssertionError("Rebuild did not fail")
+        except RuntimeError:
+            pass
+        assert not manifest.exists()
+        report = sync_vector_store(store, manifest_path=manifest, data_dir=data_dir, workers=1)
+        assert report.full_rebuild and report.chunks_added == len(store) > 0
+        print("   ✅ A rebuild that dies part-way leaves no manifest, so the next sync rebuilds")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Indexer Tests")
+
+    success = True
+    for test in (test_incremental_sync, test_streaming_ingestion):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Test script for CloudWalk Helper language tagging and partition routing.
+Runs offline with deterministic fake embeddings.
+Run with: python tests/test_language.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Normalized fake embeddings, like the real model's, that count document (chunk) encodes."""
+    documents: int = 0
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = super().embed_query(text)
+        norm = sum(x * x for x in vector) ** 0.5
+        return [x / norm for x in vector]
+
+
+def test_tagging():
+    """Chunks are tagged from the filename suffix, falling back to their text."""
+    print("=" * 60)
+    print("Testing Language Tagging")
+    print("=" * 60)
+
+    from src.embeddings import load_documents, split_documents
+
+    chunks = split_documents(load_documents())
+    languages = {Path(c.metadata["source"]).name: c.metadata["language"] for c in chunks}
+    assert languages == {"cloudwalk_knowledge.md": "English", "cloudwalk_knowledge_pt.md": "Portuguese"}, languages
+    print(f"   ✅ {len(chunks)} chunks tagged: {sorted(set(languages.values()))}")
+
+    untagged = [Document(page_content="Qual é a taxa do cartão de crédito para a maquininha?",
+                         metadata={"source": "notes.md"})]
+    assert split_documents(untagged)[0].metadata["language"] == "Portuguese"
+    print("   ✅ Text detection when the filename has no language suffix")
+    return True
+
+
+def test_routing():
+    """Questions search their own language, falling back to every language on weak matches."""
+    print("\n" + "=" * 60)
+    print("Testing Language Routing")
+    print("=" * 60)
+
+    from src.hybrid import DenseRetriever
+    from src.language import CROSS_LANGUAGE, LanguageRoutedRetriever, PartitionStats
+    from src.vector_index import NumpyVectorStore
+
+    embeddings = CountingEmbeddings(size=32)
+    store = NumpyVectorStore(embeddings)
+    texts = ["JIM is an AI assistant", "O JIM é um assistente de IA", "Stratus is a blockchain"]
+    metadatas = [{"language": "English"}, {"language": "Portuguese"}, {"language": "English"}]
+    store.add_texts(texts, metadatas=metadatas)
+    embeddings.documents = 0
+    stats = PartitionStats()
+    inner = DenseRetriever(vector_store=store, k=3)
+
+    routed = LanguageRoutedRetriever(retriever=inner, min_score=-1.0, stats=stats)
+    docs, partition = routed.route("O que é o JIM?")
+    assert partition == "Portuguese" and [d.page_content for d in docs] == ["O JIM é um assistente de IA"]
+    docs = routed.invoke("What is JIM?")
+    assert len(docs) == 2 and all(d.metadata["language"] == "English" for d in docs)
+    print("   ✅ Searches limited to the question's language")
+
+    strict = LanguageRoutedRetriever(retriever=inner, min_score=1.1, stats=stats)
+    docs, partition = strict.route("O que é o JIM?")
+    assert partition == CROSS_LANGUAGE and len(docs) == 3
+    assert embeddings.documents == 0
+    print("   ✅ Weak matches fall back to a cross-language search, scored without re-encoding chunks")
+
+    import tempfile
+    from langchain_chroma import Chroma
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = Chroma(collection_name="routing", embedding_function=embeddings, persist_directory=tmp)
+        chroma.add_texts(texts, metadatas=metadatas)
+        for question in ("O que é o JIM?", "What is Stratus?"):
+            _, expected = inner.scored_search(question)
+            _, score = DenseRetriever(vector_store=chroma, k=3).scored_search(question)
+            assert abs(score - expected) < 1e-4, (score, expected)
+    print("   ✅ Chroma distances converted to the same cosine similarity as the NumPy index")
+
+    stats.record_llm("Portuguese", 2.0)
+    snapshot = stats.snapshot()
+    assert snapshot["Portuguese"]["queries"] == 1 and snapshot["Portuguese"]["avg_llm_time"] == 2.0
+    assert snapshot[CROSS_LANGUAGE]["fallbacks"] == 1
+    assert snapshot["Portuguese"]["avg_context_chars"] < snapshot[CROSS_LANGUAGE]["avg_context_chars"]
+    print(f"   ✅ Per-partition stats: {sorted(snapshot)}")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Language Routing Tests")
+
+    success = True
+    for test in (test_tagging, test_routing):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
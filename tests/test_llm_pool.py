@@ -0,0 +1,121 @@
+"""
+Test script for the CloudWalk Helper LLM provider pool.
+Runs offline against local OpenAI-compatible and Ollama-compatible stub servers.
+Run with: python tests/test_llm_pool.py
+"""
+
+import sys
+import io
+import time
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.messages import HumanMessage
+
+from tests.llm_stubs import StubLLMServer
+
+QUESTION = [HumanMessage("What is CloudWalk?")]
+
+
+def _pool(openai, ollama, hedge_after=0.0):
+    from src import llm_pool
+
+    llm_pool.OPENROUTER_API_KEY = "stub-key"
+    return llm_pool.build_pool(["openrouter", "ollama"], hedge_after=hedge_after,
+                               base_urls={"openrouter": openai.base_url, "ollama": ollama.base_url})
+
+
+def test_latency_routing():
+    """After measuring both providers, requests go to the faster one over a reused connection."""
+    print("=" * 60)
+    print("Testing Latency-Aware Routing")
+    print("=" * 60)
+
+    with StubLLMServer("openai", "slow answer", delay=0.2) as openai, \
+            StubLLMServer("ollama", "fast answer") as ollama:
+        pool = _pool(openai, ollama)
+        answers = [pool.invoke(QUESTION).content for _ in range(6)]
+        assert answers[0] == "slow answer" and answers[-4:] == ["fast answer"] * 4, answers
+        print(f"   ✅ Routed to the faster provider: {answers}")
+
+        assert ollama.requests == 5 and ollama.connections == 1, (ollama.requests, ollama.connections)
+        print(f"   ✅ {ollama.requests} requests over {ollama.connections} keep-alive connection")
+
+        stats = pool.snapshot()["providers"]
+        assert stats["ollama"]["p50_time_to_first_token"] < stats["openrouter"]["p50_time_to_first_token"]
+    return True
+
+
+def test_failover():
+    """A rate-limited provider is skipped and its request answered by the next one."""
+    print("\n" + "=" * 60)
+    print("Testing Failover")
+    print("=" * 60)
+
+    with StubLLMServer("openai", status=429) as openai, StubLLMServer("ollama", "fallback answer") as ollama:
+        pool = _pool(openai, ollama)
+        chunks = [chunk.content for chunk in pool.stream(QUESTION)]
+        assert "".join(chunks) == "fallback answer", chunks
+        stats = pool.snapshot()["providers"]["openrouter"]
+        assert stats["errors"] == 1 and not stats["healthy"], stats
+        print("   ✅ Streamed from Ollama, OpenRouter cooling down after the 429")
+
+        assert pool.invoke(QUESTION).content == "fallback answer" and openai.requests == 1
+        print("   ✅ Cooling-down provider not called again")
+    return True
+
+
+def test_hedging():
+    """A provider without a token by the deadline is hedged; the first to answer wins."""
+    print("\n" + "=" * 60)
+    print("Testing Hedged Requests")
+    print("=" * 60)
+
+    with StubLLMServer("openai", "late answer", delay=1.0) as openai, \
+            StubLLMServer("ollama", "hedged answer") as ollama:
+        pool = _pool(openai, ollama, hedge_after=0.1)
+        start = time.perf_counter()
+        assert pool.invoke(QUESTION).content == "hedged answer"
+        assert time.perf_counter() - start < 0.8
+        print(f"   ✅ Sync request hedged after {pool.hedge_after}s")
+
+        for provider in pool.providers:
+            provider.stats.latencies.clear()  # Make OpenRouter the first choice again
+
+        async def run():
+            return await pool.ainvoke(QUESTION)
+
+        start = time.perf_counter()
+        assert asyncio.run(run()).content == "hedged answer"
+        assert time.perf_counter() - start < 0.8
+        snapshot = pool.snapshot()
+        assert snapshot["hedges"] == 2 and snapshot["providers"]["ollama"]["hedges_won"] == 2, snapshot
+        print("   ✅ Async request hedged, losing request cancelled")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - LLM Provider Pool Tests")
+
+    success = True
+    for test in (test_latency_routing, test_failover, test_hedging):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Test script for CloudWalk Helper LLM admission control.
+Runs offline: the scheduler is exercised directly with short rate limits,
+then through the provider pool against a local OpenAI-compatible stub.
+Run with: python tests/test_llm_scheduler.py
+"""
+
+import sys
+import io
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.messages import HumanMessage
+
+from tests.llm_stubs import StubLLMServer
+
+QUESTION = [HumanMessage("What is CloudWalk?")]
+
+
+def test_rate_limit_and_priority():
+    """Calls beyond the bucket wait, and queued interactive calls go before earlier batch calls."""
+    print("=" * 60)
+    print("Testing Rate Limit and Priority Queue")
+    print("=" * 60)
+
+    from src.llm_scheduler import LLMScheduler, QueueStatus, llm_admission, parse_rate_limits
+
+    assert parse_rate_limits("openrouter=20/60, ollama=0") == {"openrouter": (20, 60.0), "ollama": (0, 1.0)}
+    try:
+        parse_rate_limits("openrouter=fast")
+        raise AssertionError("Malformed LLM_RATE_LIMITS accepted")
+    except ValueError:
+        pass
+
+    scheduler = LLMScheduler({"openrouter": (2, 0.4)}, queue_size=8)  # 5 calls/s, 2 at once
+    start = time.monotonic()
+    assert [scheduler.admit(["openrouter"]) for _ in range(2)] == ["openrouter"] * 2
+    assert time.monotonic() - start < 0.05
+    assert scheduler.admit(["ollama", "openrouter"]) == "ollama"  # No limit configured
+    print("   ✅ Burst admitted at once, unlimited providers never wait")
+
+    order = []
+    statuses = {}
+
+    def call(name, priority):
+        with llm_admission(priority, status=QueueStatus()) as status:
+            statuses[name] = status
+            scheduler.admit(["openrouter"])
+            order.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"batch-{i}", "batch")) for i in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert statuses["batch-2"].position == 3 and statuses["batch-2"].eta > 0, statuses["batch-2"]
+    threads.append(threading.Thread(target=call, args=("interactive", "interactive")))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+    assert order[0] == "interactive", order
+    assert order[1:] == ["batch-0", "batch-1", "batch-2"], order
+    assert statuses["batch-2"].waited >= 0.5 and statuses["batch-2"].position is None
+    stats = scheduler.stats()
+    assert stats["queued"] == 4 and stats["admitted"] == 7 and stats["waiting"] == {"interactive": 0, "batch": 0}
+    print(f"   ✅ Interactive call overtook 3 queued batch calls, order {order}")
+    return True
+
+
+def test_deadlines_and_full_queue():
+    """Calls that can't start in time are turned away with their position and ETA."""
+    print("\n" + "=" * 60)
+    print("Testing Deadlines and Queue Limits")
+    print("=" * 60)
+
+    from src.llm_scheduler import LLMScheduler, QueueStatus, llm_admission
+
+    scheduler = LLMScheduler({"openrouter": (1, 10.0)}, queue_size=1)
+    scheduler.admit(["openrouter"])
+    status = QueueStatus()
+    start = time.monotonic()
+    try:
+        with llm_admission("interactive", timeout=2, status=status):
+            scheduler.admit(["openrouter"])
+        raise AssertionError("Call admitted past its deadline")
+    except TimeoutError:
+        pass
+    assert time.monotonic() - start < 0.1
+    assert status.rejected and status.position == 1 and 9 < status.eta <= 10, status
+    print(f"   ✅ Dropped at once: next slot in {status.eta:.1f}s, deadline 2s")
+
+    errors = {}
+
+    def batch_call(name):
+        try:
+            with llm_admission("batch"):
+                scheduler.admit(["openrouter"])
+        except TimeoutError as e:
+            errors[name] = str(e)
+
+    waiter = threading.Thread(target=batch_call, args=("queued",))
+    waiter.start()
+    time.sleep(0.05)
+    batch_call("overflow")
+    assert "full" in errors["overflow"], errors
+
+    async def interactive_call():
+        with llm_admission("interactive", timeout=20, status=QueueStatus()) as status:
+            task = asyncio.create_task(scheduler.aadmit(["openrouter"]))
+            await asyncio.sleep(0.05)
+            assert status.position == 1 and not status.rejected
+            task.cancel()  # The client went away
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    asyncio.run(interactive_call())
+    waiter.join(timeout=1)
+    assert "pushed out" in errors["queued"], errors
+    stats = scheduler.stats()
+    assert stats["rejected"] == 1 and stats["evicted"] == 1 and stats["dropped"] == 1
+    assert stats["waiting"] == {"interactive": 0, "batch": 0}
+    print("   ✅ Full queue: batch call turned away, queued batch call pushed out by an interactive one")
+    return True
+
+
+def test_pool_admission():
+    """The provider pool waits for capacity and backs off a provider that answered 429."""
+    print("\n" + "=" * 60)
+    print("Testing Pool Admission")
+    print("=" * 60)
+
+    from src import llm_pool, llm_scheduler
+    from src.llm_scheduler import QueueStatus, llm_admission
+
+    original_limits = llm_scheduler.LLM_RATE_LIMITS
+    llm_pool.OPENROUTER_API_KEY = "stub-key"
+    try:
+        llm_scheduler.LLM_RATE_LIMITS = "openrouter=2/0.5"
+        with StubLLMServer("openai", "rate limited answer") as openai:
+            pool = llm_pool.build_pool(["openrouter"], base_urls={"openrouter": openai.base_url})
+            status = QueueStatus()
+            start = time.monotonic()
+            with llm_admission(status=status):
+                answers = [pool.invoke(QUESTION).content for _ in range(3)]
+            assert answers == ["rate limited answer"] * 3 and openai.requests == 3
+            assert time.monotonic() - start >= 0.2 and status.waited > 0.1, status
+            assert pool.snapshot()["scheduler"]["queued"] == 1
+            print(f"   ✅ Third call waited {status.waited:.2f}s for a token instead of bursting")
+
+        with StubLLMServer("openai", status=429) as openai:
+            pool = llm_pool.build_pool(["openrouter"], base_urls={"openrouter": openai.base_url})
+            try:
+                pool.invoke(QUESTION)
+            except Exception:
+                pass
+            blocked = pool.snapshot()["scheduler"]["providers"]["openrouter"]["blocked_for"]
+            requests = openai.requests  # Includes the client's own retries
+            assert blocked > 0, blocked
+            try:
+                with llm_admission(timeout=0.5):
+                    pool.invoke(QUESTION)
+                raise AssertionError("Call admitted to a rate-limited provider")
+            except TimeoutError:
+                pass
+            assert openai.requests == requests
+            print(f"   ✅ After a 429 calls hold off for {blocked:.0f}s instead of retrying the provider")
+    finally:
+        llm_scheduler.LLM_RATE_LIMITS = original_limits
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - LLM Scheduler Tests")
+
+    success = True
+    for test in (test_rate_limit_and_priority, test_deadlines_and_full_queue, test_pool_admission):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
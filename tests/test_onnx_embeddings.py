@@ -0,0 +1,84 @@
+"""
+Test script for the CloudWalk Helper ONNX embedding backend helpers.
+Runs offline: pooling and the parity check are tested with fake embeddings.
+Run with: python tests/test_onnx_embeddings.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class NoisyEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings plus a fixed perturbation, standing in for quantization error."""
+    noise: float = 0.0
+
+    def embed_documents(self, texts):
+        rng = np.random.default_rng(0)
+        vectors = np.asarray(super().embed_documents(texts))
+        return (vectors + self.noise * rng.standard_normal(vectors.shape)).tolist()
+
+
+def test_mean_pool():
+    """Padding tokens do not contribute to the sentence embedding."""
+    print("=" * 60)
+    print("Testing Mean Pooling")
+    print("=" * 60)
+
+    from src.onnx_embeddings import mean_pool
+
+    hidden = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]], dtype=np.float32)
+    pooled = mean_pool(hidden, np.array([[1, 1, 0]]))
+    assert np.allclose(pooled, [[2.0, 3.0]]), pooled
+    print("   ✅ Padding masked out")
+    return True
+
+
+def test_parity_check():
+    """Small perturbations pass; large ones fail."""
+    print("\n" + "=" * 60)
+    print("Testing Parity Check")
+    print("=" * 60)
+
+    from src.onnx_embeddings import parity_check
+
+    texts = [f"chunk {i}" for i in range(20)]
+    reference = DeterministicFakeEmbedding(size=64)
+    close = parity_check(reference, NoisyEmbeddings(size=64, noise=0.01), texts)
+    assert close["passed"] and close["top1_agreement"] >= 0.9, close
+    print(f"   ✅ Close vectors pass (min cosine {close['min_cosine']:.4f})")
+
+    far = parity_check(reference, NoisyEmbeddings(size=64, noise=1.0), texts)
+    assert not far["passed"], far
+    print(f"   ✅ Diverging vectors fail (min cosine {far['min_cosine']:.4f})")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - ONNX Embedding Tests")
+
+    success = True
+    for test in (test_mean_pool, test_parity_check):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
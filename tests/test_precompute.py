@@ -0,0 +1,127 @@
+"""
+Test script for CloudWalk Helper precomputed answers.
+Runs offline with the fake pipeline and a temporary copy of the knowledge base.
+Run with: python tests/test_precompute.py
+"""
+
+import sys
+import io
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from tests.fake_pipeline import install_fake_pipeline
+
+QUESTIONS = ["What is CloudWalk?", "O que é o JIM?"]
+PRECOMPUTED = "CloudWalk builds payment products such as InfinitePay, JIM and the Stratus blockchain."
+
+
+def _install(tmp: Path):
+    """Fake pipeline plus precomputed answers stored under `tmp`, over a copy of data/."""
+    from src import embeddings, precompute
+
+    data_dir = tmp / "data"
+    shutil.copytree(embeddings.DATA_DIR, data_dir)
+    embeddings.DATA_DIR = data_dir
+    pipeline = install_fake_pipeline(PRECOMPUTED)
+    precompute.PRECOMPUTED_ANSWERS = True  # Turned off by the fake pipeline
+    precompute._precomputed = precompute.PrecomputedAnswers(tmp / "precomputed_answers.json", QUESTIONS)
+    return pipeline, precompute._precomputed
+
+
+def test_precompute_and_serve():
+    """Canned questions are answered once, then served as a simulated stream without the LLM."""
+    print("=" * 60)
+    print("Testing Precomputed Answers")
+    print("=" * 60)
+
+    from src import embeddings, precompute
+    from src.rag_chain import aask, stream_ask
+
+    original_data_dir = embeddings.DATA_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            pipeline, precomputed = _install(Path(tmp))
+            assert precomputed.is_stale() and precomputed.refresh(pipeline) == 2
+            assert not precomputed.is_stale() and precomputed.refresh(pipeline) == 0
+            print("   ✅ Answers generated once per knowledge-base version")
+
+            reloaded = precompute.PrecomputedAnswers(Path(tmp) / "precomputed_answers.json", QUESTIONS)
+            assert reloaded.lookup("  what is CLOUDWALK ") == PRECOMPUTED
+            print("   ✅ Answers stored with the hash and matched after normalization")
+
+            pipeline.generation_chain = None  # Any LLM call would fail from here on
+            metrics = {}
+            chunks = list(stream_ask("What is CloudWalk?", metrics))
+            assert "".join(chunks) == PRECOMPUTED and len(chunks) > 1, chunks
+            assert metrics["precomputed"] and metrics["cached"] and metrics["total_time"] < 1, metrics
+            assert asyncio.run(aask("O que é o JIM?")) == PRECOMPUTED
+            print(f"   ✅ Served in {len(chunks)} chunks, {metrics['total_time'] * 1000:.0f}ms, no LLM call")
+        finally:
+            embeddings.DATA_DIR = original_data_dir
+            precompute.PRECOMPUTED_ANSWERS, precompute._precomputed = False, None
+    return True
+
+
+def test_refresh_on_change():
+    """Editing data/ stops the stale answers being served and regenerates them in the background."""
+    print("\n" + "=" * 60)
+    print("Testing Refresh After a Knowledge-Base Change")
+    print("=" * 60)
+
+    from src import embeddings, precompute
+
+    original_data_dir = embeddings.DATA_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            pipeline, precomputed = _install(Path(tmp))
+            precomputed.refresh(pipeline)
+            assert not precomputed.refresh_in_background(pipeline)
+            print("   ✅ No regeneration while data/ is unchanged")
+
+            with open(embeddings.DATA_DIR / "cloudwalk_knowledge.md", "a", encoding="utf-8") as f:
+                f.write("\n\nCloudWalk opened a new office.\n")
+            assert precomputed.lookup("What is CloudWalk?") is None
+            print("   ✅ Stale answer not served after data/ changed")
+
+            pipeline.llm = FakeListChatModel(responses=["Updated answer."])
+            pipeline.generation_chain = pipeline.prompt | pipeline.llm | pipeline.generation_chain.last
+            assert precomputed.refresh_in_background(pipeline)
+            precomputed._refresh_thread.join(timeout=30)
+            assert precomputed.lookup("What is CloudWalk?") == "Updated answer."
+            assert precomputed.stats()["refreshes"] == 2
+            print("   ✅ Regenerated in the background")
+        finally:
+            embeddings.DATA_DIR = original_data_dir
+            precompute.PRECOMPUTED_ANSWERS, precompute._precomputed = False, None
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Precomputed Answer Tests")
+
+    success = True
+    for test in (test_precompute_and_serve, test_refresh_on_change):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
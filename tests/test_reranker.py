@@ -0,0 +1,107 @@
+"""
+Test script for the CloudWalk Helper cross-encoder reranker.
+Runs offline with a scripted scoring model instead of a cross-encoder download.
+Run with: python tests/test_reranker.py
+"""
+
+import sys
+import io
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+
+class OverlapModel:
+    """Scores a pair by shared words and remembers how many pairs it scored."""
+
+    def __init__(self):
+        self.pairs = 0
+        self.batches = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=None):
+        self.pairs += len(pairs)
+        self.batches += 1
+        return [len(set(q.lower().split()) & set(text.lower().split())) for q, text in pairs]
+
+
+def _docs():
+    texts = ["Stratus is a blockchain", "JIM is an AI assistant", "Pix transfers are instant",
+             "InfinitePay card fees", "JIM assistant answers questions about sales"]
+    return [Document(page_content=text, metadata={"chunk_id": f"c{i}"}) for i, text in enumerate(texts)]
+
+
+def test_rerank():
+    """Candidates are scored in one batch, cached, and narrowed to the top-n."""
+    print("=" * 60)
+    print("Testing Reranker")
+    print("=" * 60)
+
+    from src.reranker import Reranker
+
+    model = OverlapModel()
+    reranker = Reranker(model=model, top_n=2, time_budget=10.0, cache_size=100)
+    docs, reranked = reranker.rerank("JIM assistant questions", _docs())
+    assert reranked and [d.metadata["chunk_id"] for d in docs] == ["c4", "c1"], docs
+    assert model.batches == 1 and model.pairs == 5
+    print("   ✅ One batch, top-2 by score")
+
+    reranker.rerank("jim  Assistant questions", _docs())
+    assert model.pairs == 5 and reranker.stats.snapshot()["cache_hits"] == 5
+    print("   ✅ Repeated question served from the score cache")
+
+    small = Reranker(model=OverlapModel(), top_n=2, cache_size=3)
+    small.rerank("fees", _docs())
+    assert len(small._cache) == 3
+    print("   ✅ Score cache bounded")
+    return True
+
+
+def test_time_budget():
+    """Reranking is skipped when scoring is predicted to exceed the budget."""
+    print("\n" + "=" * 60)
+    print("Testing Reranker Time Budget")
+    print("=" * 60)
+
+    from src.reranker import Reranker
+
+    model = OverlapModel()
+    reranker = Reranker(model=model, top_n=2, time_budget=0.05)
+    reranker._seconds_per_pair = 0.1
+    docs, reranked = reranker.rerank("JIM", _docs(), fallback_k=4)
+    assert not reranked and model.pairs == 0
+    assert [d.metadata["chunk_id"] for d in docs] == ["c0", "c1", "c2", "c3"]
+    print("   ✅ Retrieval order kept within fallback_k")
+
+    reranker.stats.record_llm(True, 1.0)
+    reranker.stats.record_llm(False, 1.5)
+    stats = reranker.stats.snapshot()
+    assert stats["skipped"] == 1 and stats["llm_time_saved"] == 0.5
+    print(f"   ✅ Stats report LLM time saved: {stats['llm_time_saved']}s")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Reranker Tests")
+
+    success = True
+    for test in (test_rerank, test_time_budget):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
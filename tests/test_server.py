@@ -0,0 +1,95 @@
+"""
+Test script for the CloudWalk Helper HTTP API.
+Runs offline against a fake pipeline.
+Run with: python tests/test_server.py
+"""
+
+import sys
+import io
+import json
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.fake_pipeline import install_fake_pipeline, FAKE_ANSWER
+
+
+def test_endpoints():
+    """/ask returns the answer and /ask/stream emits token events."""
+    print("=" * 60)
+    print("Testing HTTP API")
+    print("=" * 60)
+
+    from starlette.testclient import TestClient
+    from src.server import app
+
+    install_fake_pipeline()
+    with TestClient(app) as client:
+        response = client.post("/ask", json={"question": "What is CloudWalk?"})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["answer"] == FAKE_ANSWER and body["language"] == "English"
+        assert "total_time" in body["metrics"]
+        print("   ✅ /ask answered")
+
+        response = client.post("/ask/stream", json={"question": "O que é a InfinitePay?"})
+        assert response.status_code == 200
+        tokens = [json.loads(line[len("data: "):])["token"]
+                  for line in response.text.splitlines() if line.startswith("data: {\"token\"")]
+        assert "".join(tokens) == FAKE_ANSWER and len(tokens) > 1
+        assert "event: done" in response.text
+        print(f"   ✅ /ask/stream sent {len(tokens)} token events")
+
+        assert client.post("/ask", json={}).status_code == 400
+        print("   ✅ Missing question rejected")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200 and 'span="request"' in response.text
+        print("   ✅ /metrics exported span histograms")
+    return True
+
+
+def test_concurrent_questions():
+    """Many concurrent async questions complete on one event loop."""
+    print("\n" + "=" * 60)
+    print("Testing Concurrent Async Questions")
+    print("=" * 60)
+
+    from src.rag_chain import aask
+
+    install_fake_pipeline()
+
+    async def run():
+        questions = [f"Question number {i} about Stratus?" for i in range(20)]
+        return await asyncio.gather(*(aask(q) for q in questions))
+
+    answers = asyncio.run(run())
+    assert answers == [FAKE_ANSWER] * 20
+    print(f"   ✅ Answered {len(answers)} concurrent questions")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - API Tests")
+
+    success = True
+    for test in (test_endpoints, test_concurrent_questions):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
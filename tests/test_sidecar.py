@@ -0,0 +1,211 @@
+"""
+Test script for the CloudWalk Helper embedding/search sidecar.
+Runs offline: the sidecar is served from a thread over a temporary Unix
+socket with deterministic fake embeddings.
+Run with: python tests/test_sidecar.py
+"""
+
+import sys
+import io
+import os
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings with a fixed cost per model call, like a real forward pass."""
+
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(0.02)
+        return super().embed_documents(texts)
+
+
+class NormalizedFakeEmbedding(DeterministicFakeEmbedding):
+    """Unit-length fake embeddings, like the real model's (Chroma scores are converted assuming this)."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.asarray(super().embed_query(text))
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _start_sidecar(embeddings, store=None):
+    """Serve a vector store (NumPy by default) over data/ on a temporary socket; returns (server, store, path)."""
+    from src.embeddings import load_documents, split_documents
+    from src.sidecar import SidecarServer
+    from src.vector_index import NumpyVectorStore
+
+    chunks = split_documents(load_documents())
+    store = NumpyVectorStore(embeddings) if store is None else store
+    store.add_documents(chunks, ids=[f"chunk-{i}" for i in range(len(chunks))])
+    socket_path = os.path.join(tempfile.mkdtemp(), "sidecar.sock")
+    server = SidecarServer(socket_path, embeddings, store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store, socket_path
+
+
+def test_same_results_as_in_process():
+    """Embeddings and searches through the socket match the in-process model and index."""
+    print("=" * 60)
+    print("Testing Sidecar Embeddings and Search")
+    print("=" * 60)
+
+    from src.sidecar import SidecarClient, SidecarEmbeddings, SidecarVectorStore
+
+    embeddings = DeterministicFakeEmbedding(size=64)
+    server, store, socket_path = _start_sidecar(embeddings)
+    try:
+        client = SidecarClient(socket_path)
+        remote_embeddings = SidecarEmbeddings(client)
+        texts = ["What is InfiniteTap?", "Quanto custa o Pix?"]
+        assert np.allclose(remote_embeddings.embed_documents(texts), embeddings.embed_documents(texts))
+        assert np.allclose(remote_embeddings.embed_query(texts[0]), embeddings.embed_query(texts[0]))
+        print("   ✅ Embeddings match the in-process model")
+
+        remote = SidecarVectorStore(client)
+        local_hits = store.similarity_search_with_score(texts[0], k=4)
+        remote_hits = remote.similarity_search_with_score(texts[0], k=4)
+        assert [(d.id, d.page_content, d.metadata) for d, _ in remote_hits] == \
+            [(d.id, d.page_content, d.metadata) for d, _ in local_hits]
+        assert np.allclose([s for _, s in remote_hits], [s for _, s in local_hits], atol=1e-5)
+        print("   ✅ Text search returns the same chunks and scores")
+
+        source = local_hits[0][0].metadata["source"]
+        filtered = remote.similarity_search(texts[1], k=3, filter={"source": source})
+        assert filtered and all(d.metadata["source"] == source for d in filtered)
+        vectors = embeddings.embed_documents(texts)
+        batched = remote.search_batch(vectors, k=2)
+        assert [[d.id for d, _ in hits] for hits in batched] == \
+            [[d.id for d, _ in hits] for hits in store.search_batch(vectors, k=2)]
+        print("   ✅ Filters and batched vector search pass through")
+
+        try:
+            remote.add_texts(["New chunk"])
+            raise AssertionError("Worker was allowed to write to the shared index")
+        except NotImplementedError:
+            pass
+        print("   ✅ Index is read-only for workers")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return True
+
+
+def test_chroma_backend():
+    """With the default Chroma backend searches work and score by cosine similarity, like the NumPy index."""
+    print("\n" + "=" * 60)
+    print("Testing Sidecar over Chroma")
+    print("=" * 60)
+
+    from langchain_chroma import Chroma
+    from src.sidecar import SidecarClient, SidecarVectorStore
+    from src.vector_index import NumpyVectorStore
+
+    embeddings = NormalizedFakeEmbedding(size=64)
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = Chroma(collection_name="sidecar", embedding_function=embeddings, persist_directory=tmp)
+        server, _, socket_path = _start_sidecar(embeddings, chroma)
+        numpy_server, _, numpy_socket = _start_sidecar(embeddings)
+        try:
+            remote = SidecarVectorStore(SidecarClient(socket_path))
+            expected = SidecarVectorStore(SidecarClient(numpy_socket))
+            question = "What is InfiniteTap?"
+            hits = remote.similarity_search_with_score(question, k=4)
+            expected_hits = expected.similarity_search_with_score(question, k=4)
+            assert [d.id for d, _ in hits] == [d.id for d, _ in expected_hits]
+            assert np.allclose([s for _, s in hits], [s for _, s in expected_hits], atol=1e-4), hits
+            print(f"   ✅ Text search returns cosine similarities (best {hits[0][1]:.3f})")
+
+            source = hits[0][0].metadata["source"]
+            filtered = remote.similarity_search_with_score_by_vector(
+                embeddings.embed_query(question), k=3, filter={"source": source})
+            assert filtered and all(d.metadata["source"] == source for d, _ in filtered)
+            batched = remote.search_batch(embeddings.embed_documents([question]), k=2)
+            assert [d.id for d, _ in batched[0]] == [d.id for d, _ in hits[:2]]
+            print("   ✅ Vector, filtered and batched searches work")
+        finally:
+            for running in (server, numpy_server):
+                running.shutdown()
+                running.server_close()
+    return True
+
+
+def test_concurrent_requests_batched():
+    """Queries from concurrent workers share model calls, and the pipeline factories use the sidecar."""
+    print("\n" + "=" * 60)
+    print("Testing Request Batching")
+    print("=" * 60)
+
+    from src import sidecar
+    from src.embeddings import get_embeddings, get_vector_store
+    from src.sidecar import SidecarClient, SidecarEmbeddings, SidecarVectorStore
+
+    embeddings = SlowFakeEmbedding(size=64)
+    server, store, socket_path = _start_sidecar(embeddings)
+    try:
+        server.batcher.window = 0.01
+        embeddings.calls = 0  # Indexing the chunks above
+        client = SidecarClient(socket_path)
+        queries = [f"Question {i} about InfinitePay" for i in range(16)]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(SidecarEmbeddings(client).embed_query, queries))
+        assert np.allclose(results, DeterministicFakeEmbedding(size=64).embed_documents(queries))
+        assert embeddings.calls < len(queries), embeddings.calls
+        stats = SidecarVectorStore(client).stats()
+        assert stats["texts"] == len(queries) and stats["largest_batch"] > 1
+        print(f"   ✅ {len(queries)} concurrent queries in {embeddings.calls} model calls "
+              f"(largest batch {stats['largest_batch']})")
+
+        original_socket = sidecar.EMBEDDING_SIDECAR_SOCKET
+        original_client = sidecar._client
+        sidecar.EMBEDDING_SIDECAR_SOCKET, sidecar._client = socket_path, None
+        try:
+            assert isinstance(get_embeddings(), SidecarEmbeddings)
+            vector_store = get_vector_store()
+            assert isinstance(vector_store, SidecarVectorStore) and vector_store.snapshot_dir is None
+            assert vector_store.similarity_search("What is JIM?", k=2)
+        finally:
+            sidecar.EMBEDDING_SIDECAR_SOCKET, sidecar._client = original_socket, original_client
+        print("   ✅ get_embeddings() and get_vector_store() return sidecar clients")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Embedding Sidecar Tests")
+
+    success = True
+    for test in (test_same_results_as_in_process, test_chroma_backend, test_concurrent_requests_batched):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
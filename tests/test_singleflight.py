@@ -0,0 +1,146 @@
+"""
+Test script for CloudWalk Helper request coalescing.
+Runs offline against a fake pipeline with a slow scripted LLM.
+Run with: python tests/test_singleflight.py
+"""
+
+import sys
+import io
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from tests.fake_pipeline import install_fake_pipeline
+
+ANSWERS = ["JIM is the AI assistant built into InfinitePay.", "A second, different answer."]
+
+
+def _install():
+    """Fake pipeline whose LLM streams slowly, with a fresh registry and no answer cache."""
+    from src import answer_cache, singleflight
+
+    pipeline = install_fake_pipeline()
+    pipeline.llm = FakeListChatModel(responses=ANSWERS, sleep=0.005)
+    pipeline.generation_chain = pipeline.prompt | pipeline.llm | pipeline.generation_chain.last
+    singleflight._single_flight = singleflight.SingleFlight()
+    answer_cache.ANSWER_CACHE_ENABLED = False  # Only coalescing may save LLM calls here
+    return pipeline, singleflight._single_flight
+
+
+def test_duplicates_share_one_answer():
+    """Identical concurrent questions, sync or async, share one generation and its token stream."""
+    print("=" * 60)
+    print("Testing Coalesced Questions")
+    print("=" * 60)
+
+    from src import answer_cache
+    from src.rag_chain import aask, stream_ask
+
+    cache_enabled = answer_cache.ANSWER_CACHE_ENABLED
+    try:
+        pipeline, single_flight = _install()
+
+        def ask(question):
+            metrics = {}
+            chunks = list(stream_ask(question, metrics))
+            return chunks, metrics
+
+        questions = ["What is JIM?", "  what is jim ", "WHAT IS JIM?"] * 4
+        with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+            results = list(pool.map(ask, questions))
+        assert all("".join(chunks) == ANSWERS[0] and len(chunks) > 1 for chunks, _ in results)
+        assert pipeline.llm.i == 1
+        assert sum(metrics["coalesced"] for _, metrics in results) == len(questions) - 1
+        assert all("total_time" in metrics for _, metrics in results)
+        stats = single_flight.stats()
+        assert stats["coalesced"] == stats["llm_calls_saved"] == len(questions) - 1 and stats["in_flight"] == 0
+        print(f"   ✅ {len(questions)} concurrent threads, 1 LLM call, same {len(results[0][0])}-chunk stream")
+
+        async def run():
+            return await asyncio.gather(*(aask(q) for q in ["What is JIM?"] * 6 + ["O que é o JIM?"]))
+
+        answers = asyncio.run(run())
+        # Two generations, one per language, each getting the next scripted answer
+        assert len(set(answers[:6])) == 1 and answers[6] != answers[0] and set(answers) == set(ANSWERS)
+        assert single_flight.stats()["llm_calls_saved"] == len(questions) - 1 + 5
+        print("   ✅ Async duplicates coalesced, other languages answered separately")
+    finally:
+        answer_cache.ANSWER_CACHE_ENABLED = cache_enabled
+    return True
+
+
+def test_errors_and_history():
+    """A failure reaches every waiter; questions with conversation history are never shared."""
+    print("\n" + "=" * 60)
+    print("Testing Coalesced Errors")
+    print("=" * 60)
+
+    import time
+    from src import answer_cache
+    from src.conversation import ConversationMemory
+    from src.rag_chain import stream_ask
+
+    cache_enabled = answer_cache.ANSWER_CACHE_ENABLED
+    try:
+        pipeline, single_flight = _install()
+
+        def fail(inputs):
+            time.sleep(0.1)
+            raise ConnectionError("LLM provider unavailable")
+
+        pipeline.generation_chain = RunnableLambda(fail)
+
+        def ask(question):
+            try:
+                "".join(stream_ask(question))
+            except ConnectionError as e:
+                return str(e)
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            errors = list(pool.map(ask, ["Como funciona o Pix?"] * 5))
+        assert errors == ["LLM provider unavailable"] * 5
+        stats = single_flight.stats()
+        assert stats["errors"] == 1 and stats["coalesced"] == 4 and stats["llm_calls_saved"] == 0
+        assert stats["in_flight"] == 0
+        print("   ✅ One failure raised in all 5 waiters, the flight is cleared")
+
+        pipeline, single_flight = _install()
+        memory = ConversationMemory()
+        memory.add_turn("What is InfinitePay?", "A payments app.")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda _: "".join(stream_ask("And JIM?", memory=memory)), range(2)))
+        assert single_flight.stats()["flights"] == 0
+        print("   ✅ Follow-ups with conversation history answered on their own")
+    finally:
+        answer_cache.ANSWER_CACHE_ENABLED = cache_enabled
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Request Coalescing Tests")
+
+    success = True
+    for test in (test_duplicates_share_one_answer, test_errors_and_history):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Test script for CloudWalk Helper index snapshots.
+Runs offline with deterministic fake embeddings.
+Run with: python tests/test_snapshot.py
+"""
+
+import sys
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def _expect_refusal(snapshot_dir, words, verify=False):
+    from src.snapshot import load_snapshot
+
+    try:
+        load_snapshot(snapshot_dir, DeterministicFakeEmbedding(size=64), verify=verify)
+    except ValueError as e:
+        assert words in str(e), e
+        return str(e)
+    raise AssertionError("Snapshot was not refused")
+
+
+def test_export_and_load():
+    """An exported snapshot opens memory-mapped and searches like a freshly built index."""
+    print("=" * 60)
+    print("Testing Snapshot Export and Load")
+    print("=" * 60)
+
+    from src import rag_chain, snapshot
+    from src.embeddings import load_documents, split_documents
+
+    workdir = Path(tempfile.mkdtemp())
+    original_dir = snapshot.VECTOR_SNAPSHOT_DIR
+    try:
+        embeddings = DeterministicFakeEmbedding(size=64)
+        info = snapshot.export_snapshot(workdir / "index_snapshot", embeddings)
+        chunks = split_documents(load_documents())
+        assert info["rows"] == len(chunks) and info["dim"] == 64
+        assert sorted(p.name for p in (workdir / "index_snapshot").iterdir()) == [
+            "bm25_index.json", "index_manifest.json", "metadata.json", "snapshot.json", "vectors.npy"]
+        assert [p.name for p in workdir.iterdir()] == ["index_snapshot"]  # No build leftovers
+        print(f"   ✅ Exported {info['rows']} chunks with checksums")
+
+        store = snapshot.load_snapshot(workdir / "index_snapshot", embeddings)
+        assert isinstance(store.matrix, np.memmap) and not store.matrix.flags.writeable
+        query = embeddings.embed_query(chunks[3].page_content)
+        assert store.similarity_search_by_vector(query, k=1)[0].page_content == chunks[3].page_content
+        print("   ✅ Vectors memory-mapped read-only, search finds the right chunk")
+
+        snapshot.VECTOR_SNAPSHOT_DIR = workdir / "index_snapshot"
+        current = snapshot.open_current_snapshot(embeddings)
+        assert current is not None and current.snapshot_info["kb_hash"] == info["kb_hash"]
+        retriever = rag_chain.get_retriever(current)
+        assert retriever.invoke("What is InfiniteTap?")
+        print("   ✅ Retriever uses the snapshot's manifest and BM25 index")
+
+        store.add_vectors([query], ["New chunk"], [{"source": "new.md"}], ids=["new"])
+        reopened = snapshot.load_snapshot(workdir / "index_snapshot", embeddings)
+        assert len(store) == info["rows"] + 1 and len(reopened) == info["rows"]
+        print("   ✅ Changes stay in memory, the snapshot files are untouched")
+    finally:
+        snapshot.VECTOR_SNAPSHOT_DIR = original_dir
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+def test_refuse_incompatible():
+    """Snapshots from another model, another chunking config or with corrupted files are refused."""
+    print("\n" + "=" * 60)
+    print("Testing Incompatible Snapshots")
+    print("=" * 60)
+
+    from src import indexer, snapshot
+
+    workdir = Path(tempfile.mkdtemp())
+    snapshot_dir = workdir / "index_snapshot"
+    try:
+        snapshot.export_snapshot(snapshot_dir, DeterministicFakeEmbedding(size=64))
+        info_path = snapshot_dir / "snapshot.json"
+        original = info_path.read_text(encoding="utf-8")
+
+        info = json.loads(original)
+        info["embedding_model"] = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        info_path.write_text(json.dumps(info), encoding="utf-8")
+        print(f"   ✅ {_expect_refusal(snapshot_dir, 'embedding model')}")
+        info_path.write_text(original, encoding="utf-8")
+
+        chunk_size = indexer.CHUNK_SIZE
+        indexer.CHUNK_SIZE = chunk_size // 2
+        try:
+            print(f"   ✅ {_expect_refusal(snapshot_dir, 'chunking config')[:80]}...")
+        finally:
+            indexer.CHUNK_SIZE = chunk_size
+
+        vectors = (snapshot_dir / "vectors.npy").read_bytes()
+        with open(snapshot_dir / "vectors.npy", "r+b") as f:
+            f.seek(-4, 2)
+            f.write(b"\x00\x00\x80\x7f")
+        snapshot.load_snapshot(snapshot_dir, DeterministicFakeEmbedding(size=64))  # Startup reads no vectors
+        print(f"   ✅ {_expect_refusal(snapshot_dir, 'checksum', verify=True)}")
+        (snapshot_dir / "vectors.npy").write_bytes(vectors[:-4])
+        print(f"   ✅ {_expect_refusal(snapshot_dir, 'expected')}")
+        (snapshot_dir / "vectors.npy").write_bytes(vectors)
+
+        original_dir = snapshot.VECTOR_SNAPSHOT_DIR
+        snapshot.VECTOR_SNAPSHOT_DIR = snapshot_dir
+        try:
+            info = json.loads(original)
+            info["kb_hash"] = "0" * 64
+            info_path.write_text(json.dumps(info), encoding="utf-8")
+            assert snapshot.open_current_snapshot(DeterministicFakeEmbedding(size=64)) is None
+            print("   ✅ Snapshot of an older data/ ignored, the index is synced instead")
+        finally:
+            snapshot.VECTOR_SNAPSHOT_DIR = original_dir
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Index Snapshot Tests")
+
+    success = True
+    for test in (test_export_and_load, test_refuse_incompatible):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
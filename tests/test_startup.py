@@ -0,0 +1,73 @@
+"""
+Test script for CloudWalk Helper background preload and startup profiling.
+Runs offline with the fake pipeline.
+Run with: python tests/test_startup.py
+"""
+
+import sys
+import io
+import subprocess
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.fake_pipeline import install_fake_pipeline
+
+
+def test_lightweight_import():
+    """The startup module imports neither LangChain nor the embedding model."""
+    print("=" * 60)
+    print("Testing Startup Imports")
+    print("=" * 60)
+
+    code = ("import sys; import src.startup; "
+            "print(any(m.split('.')[0] in ('langchain_core', 'langchain_chroma', 'torch') for m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).parent.parent)
+    assert result.stdout.strip() == "False", result.stdout + result.stderr
+    print("   ✅ No heavy modules imported with src.startup")
+    return True
+
+
+def test_background_preload():
+    """The pipeline is warmed up on a background thread and each step is profiled."""
+    print("\n" + "=" * 60)
+    print("Testing Background Preload")
+    print("=" * 60)
+
+    from src import startup
+
+    pipeline = install_fake_pipeline()
+    startup.start_preload()
+    assert startup.wait_for_pipeline(timeout=60) is pipeline and startup.preload_ready()
+    print("   ✅ Preloaded pipeline returned")
+
+    steps = [entry["step"] for entry in startup.startup_profile.report()]
+    assert "import src.rag_chain" in steps and "warmup" in steps, steps
+    print(f"   ✅ Profiled steps: {steps}")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Startup Tests")
+
+    success = True
+    for test in (test_lightweight_import, test_background_preload):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Test script for CloudWalk Helper request tracing and metrics export.
+Runs offline with the fake pipeline.
+Run with: python tests/test_tracing.py
+"""
+
+import sys
+import io
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.fake_pipeline import install_fake_pipeline
+
+
+def test_span_histograms():
+    """Nested spans share a trace and feed duration and attribute histograms."""
+    print("=" * 60)
+    print("Testing Spans and Histograms")
+    print("=" * 60)
+
+    from src import tracing
+
+    tracing.metrics.clear()
+    with tracing.span("outer") as outer:
+        with tracing.span("inner", chunks=5, language="English") as inner:
+            pass
+    assert inner.trace_id == outer.trace_id and inner.parent_id == outer.span_id
+    print("   ✅ Inner span is a child of the outer span")
+
+    text = tracing.render_metrics()
+    assert 'cloudwalk_helper_span_duration_seconds_count{span="inner"} 1' in text, text
+    assert 'cloudwalk_helper_span_attribute_bucket{span="inner",attribute="chunks",le="8"} 1' in text
+    assert 'attribute="language"' not in text
+    print("   ✅ Prometheus text has duration and numeric attribute histograms")
+    return True
+
+
+def test_request_spans():
+    """A streamed answer records every pipeline stage under one trace, also in the JSON trace file."""
+    print("\n" + "=" * 60)
+    print("Testing Request Spans")
+    print("=" * 60)
+
+    from src import tracing
+    from src.rag_chain import aask, answer_question
+
+    install_fake_pipeline()
+    tracing.metrics.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = Path(tmp) / "traces.jsonl"
+        writer = tracing._trace_writer
+        tracing._trace_writer = tracing.TraceWriter(str(trace_path))
+        try:
+            answer_question("What does the InfiniteTap card reader cost?")
+            asyncio.run(aask("Como funciona o Pix na InfinitePay?"))
+        finally:
+            tracing._trace_writer._file.close()
+            tracing._trace_writer = writer
+        entries = [json.loads(line) for line in trace_path.read_text(encoding="utf-8").splitlines()]
+
+    stages = {"request", "language_detection", "retrieval", "vector_search", "bm25_search",
+              "prompt_build", "prompt_format", "llm_first_token", "llm_generation", "output_parsing"}
+    snapshot = tracing.metrics.snapshot()
+    assert stages <= set(snapshot), sorted(snapshot)
+    assert snapshot["request"]["count"] == 2
+    print(f"   ✅ Recorded stages: {sorted(snapshot)}")
+
+    for request in (e for e in entries if e["name"] == "request"):
+        trace = {e["name"] for e in entries if e["trace_id"] == request["trace_id"]}
+        assert stages <= trace, sorted(trace)
+    build = next(e for e in entries if e["name"] == "prompt_build")
+    assert build["attributes"]["context_chars"] > 0 and build["attributes"]["context_tokens"] > 0
+    print("   ✅ Sync and async requests each form a complete trace")
+    return True
+
+
+def test_chroma_vector_search():
+    """The Chroma backend's dense searches are timed as vector_search, in hybrid and dense mode."""
+    print("\n" + "=" * 60)
+    print("Testing Chroma Vector Search Spans")
+    print("=" * 60)
+
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src import tracing
+    from src.embeddings import load_documents, split_documents
+    from src.hybrid import BM25Index, DenseRetriever, HybridRetriever
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Chroma(collection_name="tracing", embedding_function=DeterministicFakeEmbedding(size=32),
+                       persist_directory=tmp)
+        chunks = split_documents(load_documents())
+        store.add_documents(chunks)
+        tracing.metrics.clear()
+        dense = DenseRetriever(vector_store=store, k=3)
+        hybrid = HybridRetriever(vector_store=store, bm25=BM25Index(chunks), k=3)
+        assert len(dense.invoke("What is JIM?")) == 3
+        assert hybrid.invoke("What is JIM?", filter={"language": chunks[0].metadata["language"]})
+        snapshot = tracing.metrics.snapshot()
+        assert snapshot["vector_search"]["count"] == 2, sorted(snapshot)
+        print("   ✅ One vector_search span per dense search")
+    return True
+
+
+def test_disabled():
+    """With tracing disabled, spans are the shared no-op and nothing is recorded."""
+    print("\n" + "=" * 60)
+    print("Testing Disabled Tracing")
+    print("=" * 60)
+
+    from src import tracing
+
+    tracing.metrics.clear()
+    tracing.TRACING_ENABLED = False
+    try:
+        with tracing.span("ignored", k=3) as ignored:
+            ignored.set(chunks=1)
+        assert ignored is tracing.NOOP_SPAN and tracing.llm_config(ignored) is None
+    finally:
+        tracing.TRACING_ENABLED = True
+    assert tracing.metrics.snapshot() == {}
+    print("   ✅ No spans recorded")
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Tracing Tests")
+
+    success = True
+    for test in (test_span_histograms, test_request_spans, test_chroma_vector_search, test_disabled):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())
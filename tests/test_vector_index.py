@@ -0,0 +1,107 @@
+"""
+Test script for the CloudWalk Helper NumPy vector index.
+Runs offline with deterministic fake embeddings.
+Run with: python tests/test_vector_index.py
+"""
+
+import sys
+import io
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def test_exact_search():
+    """Top-k matches a brute-force ranking, single and batched."""
+    print("=" * 60)
+    print("Testing NumPy Vector Index")
+    print("=" * 60)
+
+    from src.vector_index import NumpyVectorStore
+
+    embeddings = DeterministicFakeEmbedding(size=32)
+    texts = [f"chunk about topic {i}" for i in range(50)]
+    store = NumpyVectorStore.from_texts(texts, embeddings, metadatas=[{"n": i % 2} for i in range(50)],
+                                        ids=[str(i) for i in range(50)])
+
+    query = embeddings.embed_query("chunk about topic 7")
+    matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    expected = list(np.argsort(-(matrix @ (np.asarray(query) / np.linalg.norm(query))))[:5])
+    hits = store.similarity_search_with_score_by_vector(query, k=5)
+    assert [int(doc.id) for doc, _ in hits] == expected
+    assert hits[0][0].page_content == "chunk about topic 7" and abs(hits[0][1] - 1.0) < 1e-5
+    print("   ✅ Top-k matches brute force")
+
+    batch = store.search_batch([query, embeddings.embed_query("chunk about topic 3")], k=5)
+    assert [doc.id for doc, _ in batch[0]] == [doc.id for doc, _ in hits]
+    assert batch[1][0][0].page_content == "chunk about topic 3"
+    print("   ✅ Batched queries agree")
+
+    filtered = store.similarity_search_by_vector(query, k=5, filter={"n": 0})
+    assert len(filtered) == 5 and all(doc.metadata["n"] == 0 for doc in filtered)
+    print("   ✅ Metadata filter applied")
+
+    store.add_texts(["chunk about topic 7"], metadatas=[{"n": 2}], ids=["new"])
+    assert [doc.id for doc in store.similarity_search_by_vector(query, k=1, filter={"n": 2})] == ["new"]
+    print("   ✅ Cached filter masks follow index changes")
+    return True
+
+
+def test_upsert_delete_and_persist():
+    """Upserts replace rows, deletes compact, and the index reloads from disk."""
+    print("\n" + "=" * 60)
+    print("Testing NumPy Vector Index Persistence")
+    print("=" * 60)
+
+    from src.vector_index import NumpyVectorStore, VECTORS_FILE, METADATA_FILE
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        embeddings = DeterministicFakeEmbedding(size=16)
+        store = NumpyVectorStore(embeddings, persist_directory=workdir)
+        store.add_texts(["a", "b", "c"], ids=["1", "2", "3"])
+        store.add_texts(["B"], ids=["2"])
+        store.delete(ids=["1"])
+        assert len(store) == 2 and [d.page_content for d in store.get_by_ids(["2", "3"])] == ["B", "c"]
+        print("   ✅ Upsert and delete")
+
+        assert (workdir / VECTORS_FILE).exists() and (workdir / METADATA_FILE).exists()
+        reloaded = NumpyVectorStore(embeddings, persist_directory=workdir)
+        assert np.array_equal(reloaded.matrix, store.matrix)
+        assert reloaded.similarity_search("c", k=1)[0].id == "3"
+        print("   ✅ Reloaded from .npy + metadata")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+def main():
+    """Run all tests."""
+    print("\n🧪 CloudWalk Helper - Vector Index Tests")
+
+    success = True
+    for test in (test_exact_search, test_upsert_delete_and_persist):
+        try:
+            if not test():
+                success = False
+        except Exception as e:
+            print(f"\n❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("\n" + "=" * 60)
+    print("🎉 All tests passed!" if success else "❌ Some tests failed. Check the errors above.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    # Fix Windows console encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.exit(main())